@@ -11,7 +11,7 @@ load_dotenv()
 warnings.filterwarnings("ignore")
 
 def print_usage():
-    print("Usage: python main.py [train|eval|test]")
+    print("Usage: python main.py [prepare-data|train|batching-report|eval|test|predict|translate-file|serve|benchmark] [options]")
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -20,10 +20,18 @@ if __name__ == "__main__":
 
     command = sys.argv[1].lower()
 
-    if command == "train":
+    if command == "prepare-data":
+        from src.data_loader import main as prepare_data_main
+        prepare_data_main(sys.argv[2:])
+
+    elif command == "train":
         from src.train import main as train_main
         train_main()
 
+    elif command == "batching-report":
+        from src.batching_report import main as batching_report_main
+        batching_report_main(sys.argv[2:])
+
     elif command == "eval":
         from src.eval import main as eval_main
         eval_main()
@@ -40,6 +48,18 @@ if __name__ == "__main__":
         translation = translate(text)
         print("Traducción:", translation)
 
+    elif command == "translate-file":
+        from src.translate_file import main as translate_file_main
+        translate_file_main(sys.argv[2:])
+
+    elif command == "serve":
+        from src.server import main as serve_main
+        serve_main(sys.argv[2:])
+
+    elif command == "benchmark":
+        from src.benchmark import main as benchmark_main
+        benchmark_main(sys.argv[2:])
+
     else:
-        print("Invalid command. Options are: train, eval, test")
+        print("Invalid command. Options are: prepare-data, train, batching-report, eval, test, predict, translate-file, serve, benchmark")
         print_usage()
@@ -0,0 +1,110 @@
+# src/batching.py
+
+import random
+import torch
+from torch.utils.data import BatchSampler, RandomSampler
+
+def length_bucketed_batches(lengths, max_batch_size, max_batch_tokens=None):
+    """
+    Groups items into batches of similar length to minimize padding.
+
+    Items are sorted by length and cut into consecutive batches of at most
+    max_batch_size items whose padded size (items x longest item) stays within
+    max_batch_tokens. Returns lists of item indices; an item longer than
+    max_batch_tokens gets a batch of its own.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches = []
+    batch = []
+    for i in order:
+        # Sorted ascending, so the newest item is the longest of the batch
+        if batch and (len(batch) >= max_batch_size
+                      or (max_batch_tokens and (len(batch) + 1) * lengths[i] > max_batch_tokens)):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def padding_ratio(lengths, batches):
+    """
+    Fraction of the padded batch positions that are padding.
+    """
+    padded = sum(len(batch) * max(lengths[i] for i in batch) for batch in batches)
+    if not padded:
+        return 0.0
+    return 1 - sum(lengths[i] for batch in batches for i in batch) / padded
+
+
+class LengthGroupedBatchSampler:
+    """
+    Training batch sampler that puts examples of similar length together.
+
+    Every epoch the examples are shuffled and cut into pools of pool_size
+    batches; each pool is sorted by length and split into batches of
+    batch_size examples or, with max_tokens, into batches of at most max_tokens
+    padded tokens. The order of all batches is then shuffled, so batches stay
+    random while their examples have similar lengths.
+    """
+
+    def __init__(self, lengths, batch_size=None, max_tokens=None, pool_size=50, seed=0):
+        if not batch_size and not max_tokens:
+            raise ValueError("Either batch_size or max_tokens is required")
+        self.lengths = list(lengths)
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.pool_size = pool_size
+        self.seed = seed
+        self.epoch = 0
+        self._batches = None
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+        self._batches = None
+
+    def _make_batches(self):
+        rng = random.Random(self.seed + self.epoch)
+        order = list(range(len(self.lengths)))
+        rng.shuffle(order)
+        # With a token budget the pool holds as many examples as pool_size average batches
+        pool_examples = (self.batch_size * self.pool_size if self.batch_size
+                         else max(1, self.max_tokens * self.pool_size * len(self.lengths) // max(1, sum(self.lengths))))
+        batches = []
+        for start in range(0, len(order), pool_examples):
+            pool = order[start:start + pool_examples]
+            pool_lengths = [self.lengths[i] for i in pool]
+            for batch in length_bucketed_batches(pool_lengths, self.batch_size or len(pool), self.max_tokens):
+                batches.append([pool[j] for j in batch])
+        rng.shuffle(batches)
+        return batches
+
+    def __iter__(self):
+        batches = self._batches or self._make_batches()
+        # Advance so the next epoch is shuffled differently even without set_epoch
+        self.set_epoch(self.epoch + 1)
+        return iter(batches)
+
+    def __len__(self):
+        # With a token budget the number of batches can differ slightly between epochs
+        if self._batches is None:
+            self._batches = self._make_batches()
+        return len(self._batches)
+
+
+def make_batch_sampler(batching, lengths, batch_size, max_tokens=None, pool_size=50, seed=0):
+    """
+    Batch sampler for a training batching mode: "random" (plain random batches of
+    batch_size), "length" (length-grouped batches of batch_size) or "tokens"
+    (length-grouped batches of at most max_tokens padded tokens).
+    """
+    if batching == "random":
+        generator = torch.Generator()
+        generator.manual_seed(seed)
+        return BatchSampler(RandomSampler(range(len(lengths)), generator=generator), batch_size, drop_last=False)
+    if batching == "length":
+        return LengthGroupedBatchSampler(lengths, batch_size=batch_size, pool_size=pool_size, seed=seed)
+    if batching == "tokens":
+        return LengthGroupedBatchSampler(lengths, max_tokens=max_tokens, pool_size=pool_size, seed=seed)
+    raise ValueError(f"Unknown batching mode '{batching}'. Options are: random, length, tokens")
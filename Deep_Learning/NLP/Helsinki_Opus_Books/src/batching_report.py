@@ -0,0 +1,89 @@
+# src/batching_report.py
+
+import argparse
+import time
+import torch
+from torch.utils.data import DataLoader
+from transformers import DataCollatorForSeq2Seq
+from src import config
+from src.batching import make_batch_sampler
+from src.data_loader import load_and_prepare_dataset
+from src.model import load_model_and_tokenizer
+
+def padding_report(batches, source_lengths, target_lengths):
+    """
+    Padding of one epoch of batches; sources and targets are padded separately.
+    """
+    real = padded = 0
+    for batch in batches:
+        for lengths in (source_lengths, target_lengths):
+            real += sum(lengths[i] for i in batch)
+            padded += len(batch) * max(lengths[i] for i in batch)
+    return {
+        "batches": len(batches),
+        "mean_batch_size": sum(len(batch) for batch in batches) / len(batches),
+        "padding_ratio": 1 - real / padded,
+    }
+
+def measure_training(model, dataset, collator, batch_sampler, steps, warmup_steps=3):
+    """
+    Runs training steps (forward, backward, optimizer step) and returns the
+    real (non-padding) source+target tokens and examples processed per second.
+    """
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model.to(device).train()
+    optimizer = torch.optim.AdamW(model.parameters(), lr=5e-5)
+    loader = DataLoader(dataset, batch_sampler=batch_sampler, collate_fn=collator)
+
+    tokens = examples = 0
+    start = None
+    for step, batch in enumerate(loader):
+        if step == warmup_steps:
+            if device == "cuda":
+                torch.cuda.synchronize()
+            start = time.perf_counter()
+        if step == warmup_steps + steps:
+            break
+        batch = {name: tensor.to(device) for name, tensor in batch.items()}
+        loss = model(**batch).loss
+        loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+        if start is not None:
+            tokens += int(batch["attention_mask"].sum()) + int((batch["labels"] != -100).sum())
+            examples += len(batch["labels"])
+    if device == "cuda":
+        torch.cuda.synchronize()
+    seconds = time.perf_counter() - start
+    return {"tokens_per_sec": tokens / seconds, "examples_per_sec": examples / seconds}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare padding and training throughput of the batching modes.")
+    parser.add_argument("--modes", nargs="+", default=["random", "length", "tokens"])
+    parser.add_argument("--batch-size", type=int, default=config.PER_DEVICE_TRAIN_BATCH_SIZE)
+    parser.add_argument("--max-tokens", type=int, default=config.MAX_TOKENS_PER_BATCH)
+    parser.add_argument("--steps", type=int, default=50, help="Training steps timed per mode (0 skips timing)")
+    args = parser.parse_args(argv)
+
+    model, tokenizer = load_model_and_tokenizer()
+    train_dataset = load_and_prepare_dataset(tokenizer)["train"]
+    source_lengths = [len(ids) for ids in train_dataset["input_ids"]]
+    target_lengths = [len(ids) for ids in train_dataset["labels"]]
+    lengths = [source + target for source, target in zip(source_lengths, target_lengths)]
+    model_dataset = train_dataset.select_columns(["input_ids", "attention_mask", "labels"])
+    collator = DataCollatorForSeq2Seq(tokenizer, model=model)
+
+    print(f"{'mode':<8} {'batches':>8} {'batch':>7} {'padding':>8} {'tokens/s':>10} {'examples/s':>11}")
+    for mode in args.modes:
+        sampler = make_batch_sampler(mode, lengths, args.batch_size, args.max_tokens, config.LENGTH_GROUPING_POOL)
+        report = padding_report(list(sampler), source_lengths, target_lengths)
+        if args.steps:
+            report.update(measure_training(model, model_dataset, collator,
+                                           make_batch_sampler(mode, lengths, args.batch_size, args.max_tokens,
+                                                              config.LENGTH_GROUPING_POOL, seed=1),
+                                           args.steps))
+        print(f"{mode:<8} {report['batches']:>8} {report['mean_batch_size']:>7.1f} {report['padding_ratio']:>8.1%} "
+              f"{report.get('tokens_per_sec', 0):>10.0f} {report.get('examples_per_sec', 0):>11.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# src/benchmark.py
+
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datasets import load_dataset
+from src import config
+from src.predict import Translator
+from src.server import DynamicBatcher
+
+def load_sentences(num_sentences, seed=0):
+    """
+    Samples source sentences from the opus_books training data.
+    """
+    dataset = load_dataset(config.DATASET_NAME, config.DATASET_CONFIG, split="train")
+    indices = random.Random(seed).sample(range(len(dataset)), num_sentences)
+    return [dataset[i]["translation"][config.SOURCE_LANG] for i in indices]
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+def run_clients(translate_one, sentences, concurrency):
+    """
+    Sends every sentence as its own request from `concurrency` client threads.
+    Returns (total seconds, per-request latencies).
+    """
+    latencies = []
+
+    def request(text):
+        start = time.perf_counter()
+        translate_one(text)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(request, sentences))
+    return time.perf_counter() - start, latencies
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare per-call translation with dynamic batching.")
+    parser.add_argument("--num-sentences", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--batch-window-ms", type=float, default=config.SERVER_BATCH_WINDOW_MS)
+    parser.add_argument("--max-batch-size", type=int, default=config.SERVER_MAX_BATCH_SIZE)
+    parser.add_argument("--max-batch-tokens", type=int, default=config.SERVER_MAX_BATCH_TOKENS)
+    args = parser.parse_args(argv)
+
+    # Without the translation memory, which would answer repeated runs without the model
+    translator = Translator(memory_path="")
+    sentences = load_sentences(args.num_sentences)
+    # Warm up so the first measured request does not pay for lazy initialization
+    translator.translate_batch(sentences[:2])
+
+    print(f"{'mode':<10} {'clients':>7} {'sent/s':>8} {'p50 ms':>8} {'p99 ms':>9} {'batch':>6} {'padding':>8}")
+    for concurrency in args.concurrency:
+        # Current path: one generate call per request, one request at a time
+        lock = threading.Lock()
+
+        def translate_per_call(text):
+            with lock:
+                return translator.translate_batch([text])
+
+        seconds, latencies = run_clients(translate_per_call, sentences, concurrency)
+        print(f"{'per-call':<10} {concurrency:>7} {len(sentences) / seconds:>8.1f} "
+              f"{percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 99) * 1000:>9.0f} "
+              f"{1:>6.1f} {0.0:>8.1%}")
+
+        batcher = DynamicBatcher(translator, args.batch_window_ms, args.max_batch_size,
+                                 args.max_batch_tokens).start()
+        try:
+            seconds, latencies = run_clients(lambda text: batcher.submit(text).result(), sentences, concurrency)
+        finally:
+            batcher.stop()
+        stats = batcher.stats()
+        print(f"{'batched':<10} {concurrency:>7} {len(sentences) / seconds:>8.1f} "
+              f"{percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 99) * 1000:>9.0f} "
+              f"{stats['mean_batch_size']:>6.1f} {stats['padding_ratio']:>8.1%}")
+
+if __name__ == "__main__":
+    main()
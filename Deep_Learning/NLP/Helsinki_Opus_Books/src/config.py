@@ -6,10 +6,25 @@ DATASET_CONFIG = "en-es"
 NUM_TRAIN_EPOCHS = 1
 PER_DEVICE_TRAIN_BATCH_SIZE = 22
 
+# Training batches: "random" (random batches of PER_DEVICE_TRAIN_BATCH_SIZE examples),
+# "length" (batches of that size grouped by source+target token length) or "tokens"
+# (length-grouped batches of at most MAX_TOKENS_PER_BATCH padded source+target tokens).
+# Lengths are grouped within pools of LENGTH_GROUPING_POOL batches.
+TRAIN_BATCHING = "length"
+MAX_TOKENS_PER_BATCH = 4096
+LENGTH_GROUPING_POOL = 50
+
 # Language pair settings
 SOURCE_LANG = "en"
 TARGET_LANG = "es"
 
+# Dataset preprocessing: tokenized splits are cached under TOKENIZED_CACHE_DIR,
+# keyed by tokenizer, max lengths and split seed, and reused by train and eval
+TOKENIZED_CACHE_DIR = "./data_cache"
+VALIDATION_SIZE = 0.1
+SPLIT_SEED = 42
+PREPROCESS_NUM_PROC = None  # None uses up to 8 processes, one per CPU
+
 # Training hyperparameters
 TRAINING_ARGS = {
     "output_dir": "./results",
@@ -19,4 +34,26 @@ TRAINING_ARGS = {
     "evaluation_strategy": "epoch",
     "save_strategy": "epoch",
     "logging_dir": "./logs"
-}
\ No newline at end of file
+}
+
+# Inference settings
+FINAL_MODEL_DIR = "./final_model"
+
+# Translation server: requests arriving within the batch window are grouped by
+# source length into padded batches of at most SERVER_MAX_BATCH_SIZE sentences
+# and SERVER_MAX_BATCH_TOKENS padded source tokens
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8000
+SERVER_BATCH_WINDOW_MS = 10
+SERVER_MAX_BATCH_SIZE = 32
+SERVER_MAX_BATCH_TOKENS = 4096
+
+# Bulk file translation: the input is read TRANSLATE_FILE_CHUNK_LINES lines at a time,
+# sorted into length buckets and translated in large batches; progress is
+# checkpointed after every chunk
+TRANSLATE_FILE_CHUNK_LINES = 4096
+TRANSLATE_FILE_BATCH_SIZE = 64
+TRANSLATE_FILE_BATCH_TOKENS = 8192
+
+# Exact-match translation memory consulted before translating ("" disables it)
+TRANSLATION_MEMORY_PATH = "./translation_memory/memory.db"
@@ -1,7 +1,52 @@
 # src/custom_trainer.py
+from torch.utils.data import DataLoader
 from transformers import Trainer
+from src import config
+from src.batching import make_batch_sampler
 
 class CustomSeq2SeqTrainer(Trainer):
+    def __init__(self, *args, train_batching="random", max_tokens_per_batch=config.MAX_TOKENS_PER_BATCH,
+                 length_grouping_pool=config.LENGTH_GROUPING_POOL, **kwargs):
+        """
+        train_batching elige cómo se forman los batches de entrenamiento:
+        "random", "length" o "tokens" (ver make_batch_sampler).
+        """
+        super().__init__(*args, **kwargs)
+        self.train_batching = train_batching
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.length_grouping_pool = length_grouping_pool
+
+    def get_train_dataloader(self):
+        """
+        Con "length" o "tokens", agrupa ejemplos de longitud parecida (fuente + destino)
+        en cada batch para reducir el padding.
+        """
+        if self.train_batching == "random":
+            return super().get_train_dataloader()
+
+        if "length" in self.train_dataset.column_names:
+            lengths = self.train_dataset["length"]
+        else:
+            lengths = [len(source) + len(target)
+                       for source, target in zip(self.train_dataset["input_ids"], self.train_dataset["labels"])]
+        batch_sampler = make_batch_sampler(
+            self.train_batching,
+            lengths,
+            self.args.per_device_train_batch_size,
+            max_tokens=self.max_tokens_per_batch,
+            pool_size=self.length_grouping_pool,
+            seed=self.args.seed
+        )
+        train_dataset = self._remove_unused_columns(self.train_dataset, description="training")
+        dataloader = DataLoader(
+            train_dataset,
+            batch_sampler=batch_sampler,
+            collate_fn=self.data_collator,
+            num_workers=self.args.dataloader_num_workers,
+            pin_memory=self.args.dataloader_pin_memory
+        )
+        return self.accelerator.prepare(dataloader)
+
     def prediction_step(self, model, inputs, prediction_loss_only, ignore_keys=None):
         """
         Sobrescribe el método prediction_step para llamar a model.generate y obtener
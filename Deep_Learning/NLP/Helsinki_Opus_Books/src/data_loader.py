@@ -1,16 +1,52 @@
 # src/data_loader.py
 
-from datasets import load_dataset
+import hashlib
+import json
+import os
+import shutil
+from datasets import load_dataset, load_from_disk
 from src import config
 
-def load_and_prepare_dataset(tokenizer, max_source_length=128, max_target_length=128):
+# Bump when preprocess_function changes so old caches are not reused
+CACHE_FORMAT_VERSION = 2
+
+def tokenized_cache_path(tokenizer, max_source_length, max_target_length, seed, test_size):
+    """
+    Directory of the cached tokenized splits for one preprocessing configuration.
+    """
+    key = {
+        "version": CACHE_FORMAT_VERSION,
+        "dataset": config.DATASET_NAME,
+        "dataset_config": config.DATASET_CONFIG,
+        "languages": [config.SOURCE_LANG, config.TARGET_LANG],
+        "tokenizer": tokenizer.name_or_path,
+        "vocab_size": len(tokenizer),
+        "max_source_length": max_source_length,
+        "max_target_length": max_target_length,
+        "split_seed": seed,
+        "test_size": test_size,
+    }
+    digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    name = f"{config.DATASET_NAME.replace('/', '_')}-{config.DATASET_CONFIG}-{digest}"
+    return os.path.join(config.TOKENIZED_CACHE_DIR, name), key
+
+def load_and_prepare_dataset(tokenizer, max_source_length=128, max_target_length=128, seed=config.SPLIT_SEED,
+                             test_size=config.VALIDATION_SIZE, num_proc=config.PREPROCESS_NUM_PROC, overwrite=False):
     """
     Loads the Helsinki-NLP/opus_books dataset for the specified language pair and preprocesses it.
+
+    The tokenized splits are saved once as Arrow files under TOKENIZED_CACHE_DIR and
+    loaded from there on later runs with the same tokenizer, max lengths and split seed.
     """
+    cache_path, key = tokenized_cache_path(tokenizer, max_source_length, max_target_length, seed, test_size)
+    if os.path.isdir(cache_path) and not overwrite:
+        print(f"Loading tokenized dataset from {cache_path}")
+        return load_from_disk(cache_path)
+
     # Load the dataset with the given configuration (e.g., "en-es")
     raw_datasets = load_dataset(config.DATASET_NAME, config.DATASET_CONFIG)
 
-    # Preprocessing function: tokenize source (English) and target (French) texts.
+    # Preprocessing function: tokenize source (English) and target (Spanish) texts.
     def preprocess_function(examples):
         # Each example contains a "translation" field with keys "en" and "es"
         inputs = [ex[config.SOURCE_LANG] for ex in examples["translation"]]
@@ -20,12 +56,50 @@ def load_and_prepare_dataset(tokenizer, max_source_length=128, max_target_length
         with tokenizer.as_target_tokenizer():
             labels = tokenizer(targets, max_length=max_target_length, truncation=True)
         model_inputs["labels"] = labels["input_ids"]
+        # Source + target tokens, used to group examples of similar length into batches
+        model_inputs["length"] = [len(source) + len(target)
+                                  for source, target in zip(model_inputs["input_ids"], labels["input_ids"])]
         return model_inputs
 
-    # Map the preprocessing function to the dataset in batched mode.
-    tokenized_datasets = raw_datasets.map(preprocess_function, batched=True)
-    
-    # If there is no dedicated validation split, create one.
+    # Tokenize in batched mode on several processes; the raw text columns are not
+    # needed for training and would only grow the cache.
+    num_proc = num_proc or min(8, os.cpu_count() or 1)
+    tokenized_datasets = raw_datasets.map(
+        preprocess_function,
+        batched=True,
+        num_proc=num_proc,
+        remove_columns=raw_datasets["train"].column_names,
+        desc="Tokenizing"
+    )
+
+    # If there is no dedicated validation split, create one (seeded, so eval always sees the same data).
     if "validation" not in tokenized_datasets:
-        tokenized_datasets = tokenized_datasets["train"].train_test_split(test_size=0.1)
-    return tokenized_datasets
+        tokenized_datasets = tokenized_datasets["train"].train_test_split(test_size=test_size, seed=seed)
+
+    # Write to a temporary directory first so an interrupted run never leaves a partial cache
+    temp_path = cache_path + ".tmp"
+    shutil.rmtree(temp_path, ignore_errors=True)
+    tokenized_datasets.save_to_disk(temp_path)
+    with open(os.path.join(temp_path, "cache_key.json"), "w", encoding="utf-8") as f:
+        json.dump(key, f, indent=2)
+    shutil.rmtree(cache_path, ignore_errors=True)
+    os.replace(temp_path, cache_path)
+    print(f"Tokenized dataset cached at {cache_path}")
+    return load_from_disk(cache_path)
+
+def main(argv=None):
+    import argparse
+    from transformers import MarianTokenizer
+
+    parser = argparse.ArgumentParser(description="Tokenize the dataset once and cache the splits on disk.")
+    parser.add_argument("--num-proc", type=int, default=config.PREPROCESS_NUM_PROC)
+    parser.add_argument("--overwrite", action="store_true", help="Rebuild the cache even if it exists")
+    args = parser.parse_args(argv)
+
+    tokenizer = MarianTokenizer.from_pretrained(config.MODEL_NAME)
+    tokenized_datasets = load_and_prepare_dataset(tokenizer, num_proc=args.num_proc, overwrite=args.overwrite)
+    for split, dataset in tokenized_datasets.items():
+        print(f"{split}: {len(dataset)} examples")
+
+if __name__ == "__main__":
+    main()
@@ -2,21 +2,86 @@
 
 import torch
 from transformers import MarianTokenizer, MarianMTModel
+from src import config
+from src.translation_memory import TranslationMemory, model_fingerprint, group_missing
 
-# Cargar el modelo entrenado
-model_path = "./final_model"  # Asegúrate de que esta ruta es correcta
-model = MarianMTModel.from_pretrained(model_path)
-tokenizer = MarianTokenizer.from_pretrained(model_path)
+class Translator:
+    """
+    Trained MarianMT model that translates lists of sentences in padded batches,
+    reusing earlier translations from a translation memory.
+    """
+
+    def __init__(self, model_path=config.FINAL_MODEL_DIR, device=None,
+                 memory_path=config.TRANSLATION_MEMORY_PATH):
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.tokenizer = MarianTokenizer.from_pretrained(model_path)
+        self.model = MarianMTModel.from_pretrained(model_path).to(self.device)
+        self.model.eval()
+        self.memory = TranslationMemory(memory_path, model_fingerprint(model_path)) if memory_path else None
+
+    def lookup(self, texts):
+        """
+        Returns the remembered translation of each sentence, or None where there is
+        none (always None without a translation memory).
+        """
+        if self.memory is None:
+            return [None] * len(texts)
+        return self.memory.lookup(texts)
+
+    def remember(self, texts, translations):
+        """
+        Stores new translations in the translation memory, if there is one.
+        """
+        if self.memory is not None:
+            self.memory.store(texts, translations)
+
+    def encode(self, texts):
+        """
+        Tokenizes sentences without padding, returning one list of token ids per sentence.
+        """
+        return self.tokenizer(list(texts), truncation=True)["input_ids"]
+
+    def translate_ids(self, input_ids):
+        """
+        Translates already tokenized sentences with one padded generate call.
+        """
+        inputs = self.tokenizer.pad({"input_ids": input_ids}, return_tensors="pt").to(self.device)
+        with torch.inference_mode():
+            outputs = self.model.generate(**inputs)
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    def translate_batch(self, texts):
+        """
+        Translates a list of sentences as one batch. Remembered sentences are not
+        sent to the model, and repeated ones are translated once.
+        """
+        translations = self.lookup(texts)
+        groups = group_missing(texts, translations)
+        if groups:
+            sources = [texts[indices[0]] for indices in groups.values()]
+            new_translations = self.translate_ids(self.encode(sources))
+            self.remember(sources, new_translations)
+            for indices, translation in zip(groups.values(), new_translations):
+                for i in indices:
+                    translations[i] = translation
+        return translations
+
+
+# Cargar el modelo entrenado la primera vez que se usa, no al importar el módulo
+_translator = None
+
+def get_translator():
+    """
+    Returns the shared Translator, loading the trained model on first use.
+    """
+    global _translator
+    if _translator is None:
+        _translator = Translator()
+    return _translator
 
 # Función para traducir un texto
 def translate(text):
-    inputs = tokenizer(text, return_tensors="pt", padding=True, truncation=True)
-    
-    with torch.no_grad():
-        outputs = model.generate(**inputs)
-
-    translated_text = tokenizer.batch_decode(outputs, skip_special_tokens=True)[0]
-    return translated_text
+    return get_translator().translate_batch([text])[0]
 
 if __name__ == "__main__":
     # Solicitar input del usuario
@@ -0,0 +1,236 @@
+# src/server.py
+
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src import config
+from src.batching import length_bucketed_batches
+from src.translation_memory import group_missing
+
+class DynamicBatcher:
+    """
+    Queues translation requests from many threads and answers them in batches.
+
+    A worker thread waits for a request, keeps collecting requests for
+    batch_window_ms, answers remembered sentences from the translation memory,
+    groups the distinct remaining ones by source length into padded batches and
+    runs one generate call per batch. Each caller gets a Future.
+    """
+
+    def __init__(self, translator, batch_window_ms=config.SERVER_BATCH_WINDOW_MS,
+                 max_batch_size=config.SERVER_MAX_BATCH_SIZE, max_batch_tokens=config.SERVER_MAX_BATCH_TOKENS):
+        self.translator = translator
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self._queue = queue.Queue()
+        self._thread = None
+        # Statistics
+        self.batches = 0
+        self.sentences = 0
+        self.real_tokens = 0
+        self.padded_tokens = 0
+        self.memory_hits = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="translation-batcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def submit(self, text):
+        """
+        Queues one sentence and returns a Future resolving to its translation.
+        """
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def translate(self, texts):
+        """
+        Translates sentences through the queue, blocking until all are done.
+        """
+        futures = [self.submit(text) for text in texts]
+        return [future.result() for future in futures]
+
+    def stats(self):
+        stats = {
+            "batches": self.batches,
+            "sentences": self.sentences,
+            "memory_hits": self.memory_hits,
+            "mean_batch_size": self.sentences / self.batches if self.batches else 0.0,
+            "padding_ratio": 1 - self.real_tokens / self.padded_tokens if self.padded_tokens else 0.0,
+        }
+        if getattr(self.translator, "memory", None) is not None:
+            stats["translation_memory"] = self.translator.memory.stats()
+        return stats
+
+    def _collect(self):
+        """
+        Blocks for the first request, then collects more until the window closes.
+        Returns None once stopped.
+        """
+        first = self._queue.get()
+        if first is None:
+            return None
+        items = [first]
+        deadline = time.perf_counter() + self.batch_window
+        # Bound the work taken at once so late arrivals do not wait behind a huge window
+        while len(items) < self.max_batch_size * 4:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            items.append(item)
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            if items is None:
+                return
+            texts = [text for text, _ in items]
+            try:
+                remembered = self.translator.lookup(texts)
+                for (_, future), translation in zip(items, remembered):
+                    if translation is not None:
+                        self.memory_hits += 1
+                        future.set_result(translation)
+                # Requests for the same sentence share one translation
+                groups = list(group_missing(texts, remembered).values())
+                sources = [texts[indices[0]] for indices in groups]
+                if not sources:
+                    continue
+                input_ids = self.translator.encode(sources)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            lengths = [len(ids) for ids in input_ids]
+            for batch in length_bucketed_batches(lengths, self.max_batch_size, self.max_batch_tokens):
+                try:
+                    translations = self.translator.translate_ids([input_ids[j] for j in batch])
+                except Exception as e:
+                    for j in batch:
+                        for i in groups[j]:
+                            items[i][1].set_exception(e)
+                    continue
+
+                self.batches += 1
+                self.sentences += len(batch)
+                self.real_tokens += sum(lengths[j] for j in batch)
+                self.padded_tokens += len(batch) * max(lengths[j] for j in batch)
+                for j, translation in zip(batch, translations):
+                    for i in groups[j]:
+                        items[i][1].set_result(translation)
+
+                # The callers already have their translations; a failed write only loses the cache entries
+                try:
+                    self.translator.remember([sources[j] for j in batch], translations)
+                except Exception as e:
+                    print(f"Could not store translations in the translation memory: {e}")
+
+
+def parse_request(body):
+    """
+    Validates a /translate body. Returns (texts, whether several were sent);
+    raises ValueError unless it is {"text": str} or {"texts": [str, ...]}.
+    """
+    payload = json.loads(body)
+    if not isinstance(payload, dict):
+        raise ValueError("the body must be a JSON object")
+    if "texts" in payload:
+        texts = payload["texts"]
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise ValueError("'texts' must be a list of strings")
+        return texts, True
+    if not isinstance(payload.get("text"), str):
+        raise ValueError("'text' must be a string")
+    return [payload["text"]], False
+
+
+def make_handler(batcher):
+    """
+    HTTP handler for the translation endpoints.
+
+    POST /translate: {"text": "..."} -> {"translation": "..."}
+                     {"texts": [...]} -> {"translations": [...]}
+    GET /health: batching statistics
+    """
+    class TranslationHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, dict(batcher.stats(), status="ok"))
+            else:
+                self._send_json(404, {"error": f"No route for GET {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/translate":
+                self._send_json(404, {"error": f"No route for POST {self.path}"})
+                return
+            try:
+                texts, many = parse_request(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            except ValueError as e:
+                self._send_json(400, {"error": f"Invalid request: {e}"})
+                return
+            try:
+                translations = batcher.translate(texts)
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+                return
+            self._send_json(200, {"translations": translations} if many else {"translation": translations[0]})
+
+        def log_message(self, format, *args):
+            pass
+
+    return TranslationHandler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the trained translator with dynamic batching.")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--batch-window-ms", type=float, default=config.SERVER_BATCH_WINDOW_MS)
+    parser.add_argument("--max-batch-size", type=int, default=config.SERVER_MAX_BATCH_SIZE)
+    parser.add_argument("--max-batch-tokens", type=int, default=config.SERVER_MAX_BATCH_TOKENS)
+    args = parser.parse_args(argv)
+
+    from src.predict import get_translator
+
+    batcher = DynamicBatcher(get_translator(), args.batch_window_ms, args.max_batch_size,
+                             args.max_batch_tokens).start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(batcher))
+    print(f"Translation server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.stop()
+
+if __name__ == "__main__":
+    main()
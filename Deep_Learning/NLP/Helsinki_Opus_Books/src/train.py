@@ -67,7 +67,8 @@ def main():
         eval_dataset=eval_dataset,
         processing_class=tokenizer,
         data_collator=data_collator,
-        compute_metrics=compute_metrics
+        compute_metrics=compute_metrics,
+        train_batching=config.TRAIN_BATCHING
     )
 
     # Start training.
@@ -0,0 +1,174 @@
+# src/translate_file.py
+
+import argparse
+import json
+import os
+import time
+from src import config
+from src.batching import length_bucketed_batches
+from src.translation_memory import group_missing
+
+def checkpoint_path(output_path):
+    return output_path + ".checkpoint.json"
+
+def load_checkpoint(input_path, output_path):
+    """
+    Returns the saved progress of an interrupted run over the same, unmodified input, or None.
+    """
+    path = checkpoint_path(output_path)
+    if not os.path.exists(path) or not os.path.exists(output_path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    stat = os.stat(input_path)
+    # An edit that keeps the size (e.g. a corrected typo) still changes the modification time
+    if (checkpoint["input"] != os.path.abspath(input_path) or checkpoint["input_size"] != stat.st_size
+            or checkpoint.get("input_mtime_ns") != stat.st_mtime_ns):
+        print(f"Ignoring {path}: it belongs to a different or modified input file")
+        return None
+    return checkpoint
+
+def save_checkpoint(input_path, output_path, checkpoint):
+    """
+    Atomically records how far the input has been translated.
+    """
+    path = checkpoint_path(output_path)
+    stat = os.stat(input_path)
+    checkpoint = dict(checkpoint, input=os.path.abspath(input_path), input_size=stat.st_size,
+                      input_mtime_ns=stat.st_mtime_ns)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+def read_chunks(input_path, offset, chunk_lines):
+    """
+    Streams the input from a byte offset in chunks of lines.
+    Yields (lines, byte offset after the chunk).
+    """
+    with open(input_path, "rb") as f:
+        f.seek(offset)
+        lines = []
+        for raw in f:
+            offset += len(raw)
+            lines.append(raw.decode("utf-8").rstrip("\r\n"))
+            if len(lines) == chunk_lines:
+                yield lines, offset
+                lines = []
+        if lines:
+            yield lines, offset
+
+def translate_chunk(translator, texts, batch_size, batch_tokens):
+    """
+    Translates a chunk of sentences in length-bucketed batches, keeping their order.
+    Empty and remembered sentences are not sent to the model, and repeated ones
+    are translated once.
+    Returns (translations, real source tokens, padded source tokens).
+    """
+    translations = [""] * len(texts)
+    todo = [i for i, text in enumerate(texts) if text.strip()]
+    if not todo:
+        return translations, 0, 0
+    for i, translation in zip(todo, translator.lookup([texts[i] for i in todo])):
+        translations[i] = translation
+    groups = list(group_missing(texts, translations).values())
+    sources = [texts[indices[0]] for indices in groups]
+    if not sources:
+        return translations, 0, 0
+
+    input_ids = translator.encode(sources)
+    lengths = [len(ids) for ids in input_ids]
+    padded = 0
+    for batch in length_bucketed_batches(lengths, batch_size, batch_tokens):
+        padded += len(batch) * max(lengths[j] for j in batch)
+        batch_translations = translator.translate_ids([input_ids[j] for j in batch])
+        translator.remember([sources[j] for j in batch], batch_translations)
+        for j, translation in zip(batch, batch_translations):
+            for i in groups[j]:
+                translations[i] = translation
+    return translations, sum(lengths), padded
+
+def translate_file(translator, input_path, output_path, input_format="text", field=config.SOURCE_LANG,
+                   output_field=config.TARGET_LANG, chunk_lines=config.TRANSLATE_FILE_CHUNK_LINES,
+                   batch_size=config.TRANSLATE_FILE_BATCH_SIZE, batch_tokens=config.TRANSLATE_FILE_BATCH_TOKENS):
+    """
+    Translates a text file (one sentence per line) or a JSONL file (source text
+    under `field`, translation added under `output_field`) into output_path,
+    line for line. Resumes from the checkpoint of an interrupted run.
+    """
+    checkpoint = load_checkpoint(input_path, output_path)
+    if checkpoint:
+        print(f"Resuming after {checkpoint['lines']} lines")
+        output = open(output_path, "r+b")
+        output.truncate(checkpoint["output_bytes"])
+        output.seek(checkpoint["output_bytes"])
+    else:
+        checkpoint = {"lines": 0, "input_offset": 0, "output_bytes": 0}
+        output = open(output_path, "wb")
+
+    start = time.perf_counter()
+    sentences = 0
+    real_tokens = padded_tokens = 0
+    try:
+        for lines, offset in read_chunks(input_path, checkpoint["input_offset"], chunk_lines):
+            records = None
+            texts = lines
+            if input_format == "jsonl":
+                records = [json.loads(line) if line.strip() else None for line in lines]
+                texts = [record[field] if record else "" for record in records]
+
+            translations, real, padded = translate_chunk(translator, texts, batch_size, batch_tokens)
+            real_tokens += real
+            padded_tokens += padded
+            sentences += sum(1 for text in texts if text.strip())
+
+            if records is not None:
+                out_lines = [json.dumps(dict(record, **{output_field: translation}), ensure_ascii=False)
+                             if record else "" for record, translation in zip(records, translations)]
+            else:
+                out_lines = [translation.replace("\n", " ") for translation in translations]
+            output.write(("\n".join(out_lines) + "\n").encode("utf-8"))
+            output.flush()
+            os.fsync(output.fileno())
+
+            checkpoint.update(lines=checkpoint["lines"] + len(lines), input_offset=offset,
+                              output_bytes=output.tell())
+            save_checkpoint(input_path, output_path, checkpoint)
+            elapsed = time.perf_counter() - start
+            print(f"{checkpoint['lines']} lines translated, {sentences / elapsed:.1f} sentences/s")
+    finally:
+        output.close()
+
+    # The run is complete, so a later run over the same files starts from scratch
+    if os.path.exists(checkpoint_path(output_path)):
+        os.remove(checkpoint_path(output_path))
+    elapsed = time.perf_counter() - start
+    padding = 1 - real_tokens / padded_tokens if padded_tokens else 0.0
+    print(f"Done: {sentences} sentences in {elapsed:.1f}s ({sentences / max(elapsed, 1e-9):.1f} sentences/s, "
+          f"{padding:.1%} padding) -> {output_path}")
+    if getattr(translator, "memory", None) is not None:
+        stats = translator.memory.stats()
+        print(f"Translation memory: {stats['hit_rate']:.1%} hit rate ({stats['hits']} hits, "
+              f"{stats['misses']} misses, {stats['entries']} entries)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Translate a text or JSONL file line by line.")
+    parser.add_argument("input", help="Input file: one sentence per line, or one JSON object per line")
+    parser.add_argument("output", help="Output file, with one translation (or JSON object) per input line")
+    parser.add_argument("--format", choices=["text", "jsonl"],
+                        help="Input format (default: jsonl for .jsonl files, text otherwise)")
+    parser.add_argument("--field", default=config.SOURCE_LANG, help="JSONL field with the source text")
+    parser.add_argument("--output-field", default=config.TARGET_LANG, help="JSONL field for the translation")
+    parser.add_argument("--chunk-lines", type=int, default=config.TRANSLATE_FILE_CHUNK_LINES)
+    parser.add_argument("--batch-size", type=int, default=config.TRANSLATE_FILE_BATCH_SIZE)
+    parser.add_argument("--batch-tokens", type=int, default=config.TRANSLATE_FILE_BATCH_TOKENS)
+    args = parser.parse_args(argv)
+
+    input_format = args.format or ("jsonl" if args.input.endswith(".jsonl") else "text")
+
+    from src.predict import get_translator
+
+    translate_file(get_translator(), args.input, args.output, input_format, args.field, args.output_field,
+                   args.chunk_lines, args.batch_size, args.batch_tokens)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# src/translation_memory.py
+
+import os
+import sqlite3
+import threading
+
+# SQLite limits the number of parameters of one statement
+LOOKUP_CHUNK_SIZE = 500
+
+def normalize(text):
+    """
+    Normalizes a source segment for exact matching (surrounding and repeated whitespace).
+    """
+    return " ".join(text.split())
+
+def model_fingerprint(model_path):
+    """
+    Identifies a model checkpoint by its directory and the size and modification
+    time of its weights, so retraining into the same directory starts a new memory.
+    """
+    parts = [os.path.abspath(model_path)]
+    for name in ("model.safetensors", "pytorch_model.bin"):
+        weights = os.path.join(model_path, name)
+        if os.path.exists(weights):
+            stat = os.stat(weights)
+            parts += [name, str(stat.st_size), str(stat.st_mtime_ns)]
+    return ":".join(parts)
+
+class TranslationMemory:
+    """
+    Exact-match translation memory (normalized source -> translation) persisted
+    in SQLite and keyed by model checkpoint. Safe to share between threads.
+    """
+
+    def __init__(self, path, model_key):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.model_key = model_key
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            "model TEXT NOT NULL, source TEXT NOT NULL, target TEXT NOT NULL, "
+            "PRIMARY KEY (model, source)) WITHOUT ROWID"
+        )
+        self._connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, texts):
+        """
+        Returns the stored translation of each text, or None where there is none.
+        """
+        keys = [normalize(text) for text in texts]
+        found = {}
+        unique = list(set(keys))
+        with self._lock:
+            for start in range(0, len(unique), LOOKUP_CHUNK_SIZE):
+                chunk = unique[start:start + LOOKUP_CHUNK_SIZE]
+                rows = self._connection.execute(
+                    f"SELECT source, target FROM segments WHERE model = ? AND source IN "
+                    f"({','.join('?' * len(chunk))})",
+                    [self.model_key] + chunk
+                )
+                found.update(rows)
+            results = [found.get(key) for key in keys]
+            hits = sum(result is not None for result in results)
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def store(self, texts, translations):
+        """
+        Adds translations to the memory, replacing older ones of the same segments.
+        """
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO segments (model, source, target) VALUES (?, ?, ?)",
+                [(self.model_key, normalize(text), translation) for text, translation in zip(texts, translations)]
+            )
+            self._connection.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._connection.execute(
+                "SELECT COUNT(*) FROM segments WHERE model = ?", (self.model_key,)
+            ).fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+def group_missing(texts, translations):
+    """
+    Groups the texts that have no translation yet by normalized segment, so each
+    distinct segment is translated once. Returns {segment: [indices]} in first-seen order.
+    """
+    groups = {}
+    for i, (text, translation) in enumerate(zip(texts, translations)):
+        if translation is None:
+            groups.setdefault(normalize(text), []).append(i)
+    return groups
@@ -1,6 +1,17 @@
 """Results display component for the Streamlit RAG application."""
 import streamlit as st
 
+# Stage timings shown in the debug panel, in pipeline order
+DEBUG_STAGES = (
+    ("embed", "Query embedding"),
+    ("search", "Index search"),
+    ("rerank", "Reranking"),
+    ("prompt", "Prompt building and tokenization"),
+    ("generate", "Generation"),
+    ("first_token", "Time to first token"),
+    ("total", "Total"),
+)
+
 def render_results(results):
     """Render the query results in the Streamlit interface.
     
@@ -11,13 +22,61 @@ def render_results(results):
     st.subheader("Answer")
     st.markdown(f"**{results['response']}**")
     
+    _render_sources(results)
+    _render_debug(results)
+
+def render_streaming_results(result_stream):
+    """Render query results while the answer is still being generated.
+    
+    Args:
+        result_stream: Iterator of partial result dictionaries, as produced
+            by RAGPipeline.query_stream
+            
+    Returns:
+        The final result dictionary, or None if the stream was empty
+    """
+    st.subheader("Answer")
+    answer_placeholder = st.empty()
+    
+    # Retrieval happens before the first partial result arrives
+    with st.spinner("Processing your question..."):
+        results = next(result_stream, None)
+    
+    if results is None:
+        return None
+    
+    answer_placeholder.markdown(f"**{results['response']}▌**")
+    for results in result_stream:
+        answer_placeholder.markdown(f"**{results['response']}▌**")
+    answer_placeholder.markdown(f"**{results['response']}**")
+    
+    _render_sources(results)
+    _render_debug(results)
+    return results
+
+def _render_sources(results):
+    """Render the retrieved source contexts and feedback buttons.
+    
+    Args:
+        results: Dictionary containing the query, response, and contexts
+    """
     # Display source contexts
     st.subheader("Sources")
     
+    stats = results.get("context_stats")
+    if stats:
+        st.caption(f"Prompt context: {stats['packed_tokens']} tokens from {stats['packed_chunks']} chunks, "
+                   f"{stats['dropped_tokens']} tokens dropped")
+    
     for i, context in enumerate(results["contexts"]):
         with st.expander(f"Source {i+1}: {context['metadata']['doc_id']}", expanded=i==0):
             st.markdown(context["text"])
-            st.caption(f"Relevance score: {context['score']:.4f}")
+            if context.get("score_type") == "rrf":
+                st.caption(f"Fusion score (RRF, higher is better): {context['score']:.4f}")
+            else:
+                st.caption(f"Distance (L2, lower is better): {context['score']:.4f}")
+            if "rerank_score" in context:
+                st.caption(f"Rerank score: {context['rerank_score']:.4f}")
             
             # Display document metadata
             st.info(f"""
@@ -30,4 +89,28 @@ def render_results(results):
     with col1:
         st.button("👍 Helpful")
     with col2:
-        st.button("👎 Not helpful")
\ No newline at end of file
+        st.button("👎 Not helpful")
+
+
+def _render_debug(results):
+    """Render the per-stage latency and token breakdown of the answer.
+    
+    Args:
+        results: Dictionary containing the timings and context statistics
+    """
+    timings = results.get("timings")
+    if not timings:
+        return
+    
+    with st.expander("Debug: latency breakdown"):
+        rows = [{"Stage": label, "ms": round(timings[stage] * 1000, 1)}
+                for stage, label in DEBUG_STAGES if stage in timings]
+        st.table(rows)
+        if "batch_size" in timings:
+            st.caption(f"Timings are for a batch of {timings['batch_size']} queries")
+        
+        stats = results.get("context_stats") or {}
+        if "prompt_tokens" in stats:
+            st.caption(f"Tokens: {stats['prompt_tokens']} prompt, {stats.get('output_tokens', 0)} generated")
+        if not {"prompt", "generate"} & timings.keys():
+            st.caption("Answer served from the cache")
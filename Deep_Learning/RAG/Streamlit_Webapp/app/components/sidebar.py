@@ -2,6 +2,7 @@
 import os
 import streamlit as st
 import tempfile
+from app.utils.registry import get_pipeline, reset_pipeline, pipeline_ready, startup_status
 
 def render_sidebar():
     """Render the sidebar with document upload functionality."""
@@ -22,13 +23,11 @@ def render_sidebar():
     # Document status
     st.sidebar.subheader("System Status")
     
-    if hasattr(st.session_state.rag_pipeline.retriever, 'index') and \
-       st.session_state.rag_pipeline.retriever.index is not None:
-        doc_count = len(st.session_state.rag_pipeline.retriever.documents)
-        chunk_count = len(st.session_state.rag_pipeline.retriever.doc_chunks)
-        st.sidebar.success(f"✅ {doc_count} documents processed ({chunk_count} chunks)")
+    if pipeline_ready():
+        render_document_status()
     else:
-        st.sidebar.warning("No documents loaded")
+        with st.sidebar:
+            render_warming_up()
     
     # Settings
     st.sidebar.subheader("Settings")
@@ -46,64 +45,96 @@ def render_sidebar():
             reset_system()
             st.sidebar.success("System reset successfully!")
 
+def render_document_status():
+    """Render the document count and the remove-document control."""
+    status = get_pipeline().document_status()
+    if status["chunks"]:
+        st.sidebar.success(f"✅ {status['documents']} documents processed ({status['chunks']} chunks)")
+        
+        # Remove a single document without resetting the system
+        doc_ids = status["document_ids"]
+        if doc_ids:
+            doc_to_remove = st.sidebar.selectbox("Remove a document", doc_ids)
+            if st.sidebar.button("Remove Document"):
+                removed = get_pipeline().remove_document(doc_to_remove)
+                st.sidebar.success(f"Removed {doc_to_remove} ({removed} chunks)")
+                st.rerun()
+    else:
+        st.sidebar.warning("No documents loaded")
+    render_startup_report()
+
+@st.fragment(run_every=1)
+def render_warming_up():
+    """Show the startup step in progress, polling until the pipeline has loaded."""
+    stage, timings = startup_status()
+    if pipeline_ready():
+        # Redraw the whole app now that queries can be answered
+        st.rerun()
+    elif stage == "failed":
+        st.error("Failed to load the models; see the server log")
+    else:
+        st.info(f"⏳ Warming up: {stage} ({timings['total']:.0f}s)")
+
+def render_startup_report():
+    """Render the cold-start timing report."""
+    _, timings = startup_status()
+    with st.sidebar.expander("Startup timing"):
+        for name, seconds in timings.items():
+            st.text(f"{name}: {seconds:.2f}s")
+
 def process_documents(uploaded_files):
     """Process uploaded documents and add them to the RAG pipeline.
     
+    Pages are extracted and chunked on a process pool while completed chunks
+    are embedded in batches, with a progress bar reporting throughput.
+    
     Args:
         uploaded_files: List of uploaded file objects
     """
-    documents = []
-    document_ids = []
+    from rag.ingest import IngestPipeline
     
-    for file in uploaded_files:
-        temp_dir = tempfile.mkdtemp()
-        temp_path = os.path.join(temp_dir, file.name)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = []
+        document_ids = []
         
-        # Save the file temporarily
-        with open(temp_path, "wb") as f:
-            f.write(file.getvalue())
+        for file in uploaded_files:
+            temp_path = os.path.join(temp_dir, f"{len(paths)}_{file.name}")
+            
+            # Save the file temporarily
+            with open(temp_path, "wb") as f:
+                f.write(file.getvalue())
+            
+            paths.append(temp_path)
+            document_ids.append(file.name)
         
-        # Extract text based on file type
-        if file.name.endswith('.txt'):
-            with open(temp_path, 'r', encoding='utf-8') as f:
-                text = f.read()
-        elif file.name.endswith('.pdf'):
-            try:
-                from PyPDF2 import PdfReader
-                reader = PdfReader(temp_path)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-            except ImportError:
-                st.error("Please install PyPDF2 to process PDF files")
-                continue
-        elif file.name.endswith('.docx'):
-            try:
-                import docx
-                doc = docx.Document(temp_path)
-                text = "\n".join([para.text for para in doc.paragraphs])
-            except ImportError:
-                st.error("Please install python-docx to process DOCX files")
-                continue
-        else:
-            st.error(f"Unsupported file format: {file.name}")
-            continue
+        progress_bar = st.progress(0.0, text="Extracting documents...")
         
-        documents.append(text)
-        document_ids.append(file.name)
+        def report_progress(stats):
+            fraction = stats["pages"] / stats["total_pages"] if stats["total_pages"] else 1.0
+            progress_bar.progress(
+                min(fraction, 1.0),
+                text=(f"{stats['pages']}/{stats['total_pages']} pages · "
+                      f"{stats['pages_per_sec']:.1f} pages/s · {stats['chunks_per_sec']:.1f} chunks/s")
+            )
+        
+        stats = IngestPipeline(get_pipeline()).run(paths, document_ids, progress_callback=report_progress)
+    
+    progress_bar.empty()
+    for error in stats["errors"]:
+        st.error(error)
     
-    # Add documents to the RAG pipeline
-    if documents:
-        st.session_state.rag_pipeline.add_documents(documents, document_ids)
-        st.success(f"Successfully processed {len(documents)} documents")
+    if stats["documents"]:
+        st.success(
+            f"Successfully processed {stats['documents']} documents "
+            f"({stats['pages']} pages, {stats['chunks']} chunks in {stats['seconds']:.1f}s: "
+            f"{stats['pages_per_sec']:.1f} pages/s, {stats['chunks_per_sec']:.1f} chunks/s)"
+        )
 
 def reset_system():
     """Reset the RAG system and clear session state."""
-    # Create a new RAG pipeline
-    st.session_state.rag_pipeline = None
     st.session_state.query_history = []
     st.session_state.current_results = None
     
-    # Reinitialize the pipeline
-    from rag.pipeline import RAGPipeline
-    st.session_state.rag_pipeline = RAGPipeline()
\ No newline at end of file
+    # Drop the shared pipeline; it is reloaded on next use
+    reset_pipeline()
+    get_pipeline()
\ No newline at end of file
@@ -14,9 +14,19 @@ class RAGConfig(BaseModel):
     # Model settings
     embedding_model: str = Field(default=os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"))
     llm_model: str = Field(default=os.getenv("LLM_MODEL", "google/flan-t5-base"))
+    # Embedding inference backend: pytorch (fp32), pytorch_int8 or onnx
+    embedding_backend: str = Field(default=os.getenv("EMBEDDING_BACKEND", "pytorch"))
+    # Generator inference backend: pytorch (fp32), pytorch_int8 or onnx
+    generator_backend: str = Field(default=os.getenv("GENERATOR_BACKEND", "pytorch"))
     
     # Vector database settings
     vector_db_path: str = Field(default=os.getenv("VECTOR_DB_PATH", "./vector_db"))
+    # Split the store into this many shards (by document id hash), searched in parallel
+    num_shards: int = Field(default=int(os.getenv("NUM_SHARDS") or 1))
+    
+    # Embedding cache settings (embedding_cache_size = 0 disables the cache)
+    embedding_cache_path: str = Field(default=os.getenv("EMBEDDING_CACHE_PATH") or "./embedding_cache/embeddings.db")
+    embedding_cache_size: int = 200000
     
     # Application settings
     log_level: str = Field(default=os.getenv("LOG_LEVEL", "INFO"))
@@ -24,8 +34,69 @@ class RAGConfig(BaseModel):
     # RAG pipeline settings
     chunk_size: int = 512
     chunk_overlap: int = 50
+    
+    # Ingestion settings (ingest_workers = 0 uses one process per CPU)
+    ingest_workers: int = 0
+    ingest_pages_per_task: int = 8
+    ingest_batch_size: int = 256
     top_k: int = 5
     
+    # Retrieval mode: dense (FAISS only) or hybrid (FAISS + BM25 with reciprocal-rank fusion)
+    retrieval_mode: str = Field(default=os.getenv("RETRIEVAL_MODE") or "hybrid")
+    # Candidates taken from each ranker before fusion, and the RRF constant
+    hybrid_candidates: int = 20
+    rrf_k: int = 60
+    
+    # Cross-encoder reranking: rerank_candidates chunks are scored and the best top_k kept;
+    # reranking that exceeds the time budget falls back to retrieval order
+    rerank_enabled: bool = Field(default=os.getenv("RERANK_ENABLED", "false").lower() == "true")
+    rerank_model: str = Field(default=os.getenv("RERANK_MODEL") or "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    rerank_candidates: int = 20
+    rerank_batch_size: int = 16
+    rerank_time_budget_ms: float = 300.0
+    
+    # Query caches (0 disables a cache)
+    query_cache_size: int = 256
+    answer_cache_size: int = 128
+    
+    # Generator input length in tokens; retrieved chunks are packed up to this budget
+    max_input_tokens: int = 1024
+    
+    # Streaming generation (greedy unless sampling is enabled)
+    stream_sampling: bool = False
+    stream_temperature: float = 0.7
+    stream_top_p: float = 0.9
+    
+    # Query service (rag/service.py): the app is a thin client when service_url is set.
+    # Queries arriving within the batch window are answered in one batch
+    service_url: str = Field(default=os.getenv("RAG_SERVICE_URL", ""))
+    service_batch_window_ms: float = 10.0
+    service_max_batch_size: int = 16
+    
+    # Query metrics export: stage latency histograms and token counters are written to
+    # metrics_file every metrics_flush_seconds and/or served in the Prometheus text
+    # format at http://127.0.0.1:<metrics_port>/metrics (empty / 0 disables each)
+    metrics_file: str = Field(default=os.getenv("METRICS_FILE", ""))
+    metrics_port: int = Field(default=int(os.getenv("METRICS_PORT") or 0))
+    metrics_flush_seconds: float = 10.0
+    
+    # Vector index settings (index_type: flat, ivf_flat, ivf_pq, hnsw)
+    index_type: str = Field(default=os.getenv("INDEX_TYPE", "flat"))
+    ivf_nlist: int = 100
+    ivf_nprobe: int = 10
+    pq_m: int = 8
+    pq_nbits: int = 8
+    hnsw_m: int = 32
+    hnsw_ef_construction: int = 40
+    hnsw_ef_search: int = 64
+    # Stored vector precision: float32, float16 or sq8 (8-bit scalar quantizer)
+    vector_precision: str = Field(default=os.getenv("VECTOR_PRECISION", "float32"))
+    # Promote a flat index to IVF-Flat once it holds this many vectors (0 disables)
+    ivf_promotion_threshold: int = 200000
+    
+    # Merge on-disk segments in the background once there are more than this many
+    max_segments: int = 8
+    
     def validate_config(self) -> bool:
         """Validate that all required settings are present."""
         if not self.huggingface_token:
@@ -7,10 +7,10 @@ parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(parent_dir)
 
 import streamlit as st
-from rag.pipeline import RAGPipeline
 from app.components.sidebar import render_sidebar
-from app.components.results import render_results
+from app.components.results import render_results, render_streaming_results
 from app.utils.helpers import load_css, apply_custom_theme
+from app.utils.registry import get_pipeline, pipeline_ready
 
 # Page configuration
 st.set_page_config(
@@ -25,10 +25,7 @@ load_css()
 apply_custom_theme()
 
 
-# Initialize session state
-if "rag_pipeline" not in st.session_state:
-    st.session_state.rag_pipeline = RAGPipeline()
-
+# Initialize session state (models and index are shared, see get_pipeline)
 if "query_history" not in st.session_state:
     st.session_state.query_history = []
 
@@ -55,6 +52,10 @@ else:
 
 st.markdown("Ask questions based on your documents using advanced AI.")
 
+# Models load on a background thread; the page is usable while they do
+if not pipeline_ready():
+    st.info("The models are still loading. Questions submitted now are answered as soon as they are ready.")
+
 
 # Render sidebar with file upload functionality
 render_sidebar()
@@ -68,33 +69,34 @@ with st.form(key="query_form", clear_on_submit=True):
 
 
 # Process query when submitted
+streamed = False
 if submit_button and query:
-    with st.spinner("Processing your question..."):
-        # Check if documents are available
+    # Check if documents are available
+    
+    if not get_pipeline().has_documents():
+        st.error("Please upload documents first!")
+
+    else:
+        # Process query through RAG pipeline, rendering the answer as it is generated
+        results = render_streaming_results(get_pipeline().query_stream(query))
+        streamed = True
+        
+        # Store results in session state
+        st.session_state.current_results = results
         
-        if not st.session_state.rag_pipeline.has_documents():
-            st.error("Please upload documents first!")
-
-        else:
-            # Process query through RAG pipeline
-            results = st.session_state.rag_pipeline.query(query)
-            
-            # Store results in session state
-            st.session_state.current_results = results
-            
-            # Add to query history
-            st.session_state.query_history.append({
-                "query": query,
-                "response": results["response"],
-                "timestamp": st.session_state.get("timestamp", None)
-            })
-            
-            # Clear query input
-            #st.session_state.query_input = ""
-
-
-# Display results
-if st.session_state.current_results:
+        # Add to query history
+        st.session_state.query_history.append({
+            "query": query,
+            "response": results["response"],
+            "timestamp": st.session_state.get("timestamp", None)
+        })
+        
+        # Clear query input
+        #st.session_state.query_input = ""
+
+
+# Display results (already rendered while streaming a new answer)
+if st.session_state.current_results and not streamed:
     render_results(st.session_state.current_results)
 
 
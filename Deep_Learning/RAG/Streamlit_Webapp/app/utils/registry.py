@@ -0,0 +1,54 @@
+"""Process-wide registry of the shared RAG pipeline."""
+import streamlit as st
+from app.config import config
+
+@st.cache_resource(show_spinner=False)
+def _get_loader():
+    """Start loading the pipeline shared by all sessions of this process.
+    
+    Models and the vector index are loaded once per process, on a background
+    thread, so the page renders while the heavy imports and model loads run.
+    When RAG_SERVICE_URL is set, the app is a thin client of the query
+    service (rag/service.py) and no models are loaded in this process.
+    
+    Returns:
+        PipelineLoader holding the pipeline once it is ready
+    """
+    from rag.startup import PipelineLoader
+    if config.service_url:
+        from rag.client import ServiceClient
+        return PipelineLoader(lambda report: ServiceClient(config.service_url)).start()
+    return PipelineLoader().start()
+
+def get_pipeline():
+    """Get the RAG pipeline shared by all sessions of this process.
+    
+    Blocks until the background load has finished. The pipeline is
+    thread-safe: queries run concurrently, while document ingestion takes an
+    exclusive lock on the index.
+    
+    Returns:
+        The shared RAGPipeline instance, or a ServiceClient
+    """
+    loader = _get_loader()
+    if not loader.ready:
+        with st.spinner(f"Warming up ({loader.stage})..."):
+            return loader.wait()
+    return loader.pipeline
+
+def pipeline_ready() -> bool:
+    """Whether the shared pipeline has finished loading (starts loading it if needed)."""
+    return _get_loader().ready
+
+def startup_status():
+    """Startup step in progress and the timing report so far.
+    
+    Returns:
+        Tuple of (stage, dictionary of step name to seconds)
+    """
+    loader = _get_loader()
+    return loader.stage, loader.report.as_dict()
+
+def reset_pipeline():
+    """Drop the shared pipeline so the next get_pipeline call reloads it."""
+    _get_loader.clear()
@@ -0,0 +1,81 @@
+"""Compare recall@k, query latency and size of the supported FAISS index types.
+
+Run from the project root:
+    python -m benchmarks.ann_recall --num-vectors 200000 --k 5
+    python -m benchmarks.ann_recall --vectors vectors.npy --nprobe 16
+    python -m benchmarks.ann_recall --index-types flat hnsw --precisions float32 float16 sq8
+"""
+import argparse
+import numpy as np
+from rag.index_factory import INDEX_TYPES, VECTOR_PRECISIONS, recall_report
+
+
+def synthetic_vectors(num_vectors: int, dimension: int, num_clusters: int = 64,
+                      seed: int = 0) -> np.ndarray:
+    """Generate clustered vectors that roughly mimic sentence embeddings.
+
+    Args:
+        num_vectors: Number of vectors
+        dimension: Vector dimension
+        num_clusters: Number of Gaussian clusters
+        seed: Random seed
+
+    Returns:
+        float32 matrix of shape (num_vectors, dimension)
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(num_clusters, dimension)).astype(np.float32)
+    labels = rng.integers(0, num_clusters, size=num_vectors)
+    vectors = centers[labels] + 0.3 * rng.normal(size=(num_vectors, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", help="Optional .npy file with corpus vectors")
+    parser.add_argument("--num-vectors", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--index-types", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    parser.add_argument("--precisions", nargs="+", default=["float32"], choices=VECTOR_PRECISIONS)
+    parser.add_argument("--nlist", type=int, default=100)
+    parser.add_argument("--nprobe", type=int, default=10)
+    parser.add_argument("--pq-m", type=int, default=8)
+    parser.add_argument("--pq-nbits", type=int, default=8)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-search", type=int, default=64)
+    args = parser.parse_args()
+
+    if args.vectors:
+        base = np.load(args.vectors).astype(np.float32)
+    else:
+        base = synthetic_vectors(args.num_vectors + args.num_queries, args.dimension)
+    base, queries = base[args.num_queries:], base[:args.num_queries]
+
+    rows = []
+    for precision in args.precisions:
+        # ivf_pq is already compressed, so it is only measured once
+        index_types = [t for t in args.index_types if precision == args.precisions[0] or t != "ivf_pq"]
+        rows.extend(recall_report(
+            base, queries, args.k,
+            index_types=index_types,
+            nlist=args.nlist,
+            pq_m=args.pq_m,
+            pq_nbits=args.pq_nbits,
+            hnsw_m=args.hnsw_m,
+            precision=precision,
+            nprobe=args.nprobe,
+            ef_search=args.ef_search
+        ))
+
+    print(f"{len(base)} vectors, {len(queries)} queries, k={args.k}")
+    print(f"{'index':<10} {'precision':>10} {'size MB':>10} {'build s':>10} {'query ms':>10} "
+          f"{'recall@' + str(args.k):>10}")
+    for row in rows:
+        print(f"{row['index_type']:<10} {row['precision']:>10} {row['index_mb']:>10.1f} "
+              f"{row['build_seconds']:>10.2f} {row['query_ms']:>10.3f} {row[f'recall@{args.k}']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Compare per-query retrieval with batched retrieval throughput.
+
+Builds a temporary store from synthetic documents using the configured
+embedding model, then times DocumentRetriever.retrieve in a loop against a
+single DocumentRetriever.retrieve_batch call.
+
+Run from the project root:
+    python -m benchmarks.batch_retrieval --num-documents 200 --num-queries 256
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from app.config import config
+
+WORDS = ("wizard castle owl wand potion dragon forest letter train school friend "
+         "shadow spell library secret door staircase ghost portrait garden lake").split()
+
+
+def synthetic_documents(num_documents: int, words_per_document: int, seed: int = 0):
+    """Generate random documents from a small vocabulary."""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(words_per_document)) for _ in range(num_documents)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-documents", type=int, default=200)
+    parser.add_argument("--words-per-document", type=int, default=400)
+    parser.add_argument("--num-queries", type=int, default=256)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    config.vector_db_path = temp_dir
+    try:
+        # Imported after the config change so the retriever writes to the temp dir
+        from rag.retriever import DocumentRetriever
+
+        retriever = DocumentRetriever()
+        retriever.add_documents(synthetic_documents(args.num_documents, args.words_per_document))
+        queries = synthetic_documents(args.num_queries, 8, seed=1)
+        print(f"Indexed {retriever.index.ntotal} chunks, running {len(queries)} queries (top_k={args.top_k})")
+
+        # Warm up the encoder
+        retriever.retrieve_batch(queries[:8], args.top_k)
+
+        start = time.perf_counter()
+        for query in queries:
+            retriever.retrieve(query, args.top_k)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        retriever.retrieve_batch(queries, args.top_k)
+        batched = time.perf_counter() - start
+
+        print(f"{'mode':<12} {'total s':>10} {'queries/s':>12}")
+        print(f"{'sequential':<12} {sequential:>10.3f} {len(queries) / sequential:>12.1f}")
+        print(f"{'batched':<12} {batched:>10.3f} {len(queries) / batched:>12.1f}")
+        print(f"Speedup: {sequential / batched:.1f}x")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
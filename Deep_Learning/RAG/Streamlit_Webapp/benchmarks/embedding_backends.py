@@ -0,0 +1,67 @@
+"""Compare throughput and retrieval agreement of the embedding backends.
+
+Encodes synthetic chunks and queries with each backend. Agreement is the mean
+cosine similarity to the fp32 vectors and the recall@k of an exact search over
+the backend's vectors against the fp32 neighbours.
+
+Run from the project root:
+    python -m benchmarks.embedding_backends --num-documents 2000 --k 5
+"""
+import argparse
+import time
+import numpy as np
+import faiss
+from benchmarks.batch_retrieval import synthetic_documents
+from rag.embeddings import EMBEDDING_BACKENDS, DocumentEmbedder
+
+
+def encode(backend: str, model_name: str, documents, queries):
+    """Encode documents and queries without the embedding cache.
+
+    Returns:
+        Tuple of (document vectors, query vectors, documents per second)
+    """
+    embedder = DocumentEmbedder(model_name=model_name, backend=backend)
+    embedder.model.encode(documents[:32])  # warm up
+
+    start = time.perf_counter()
+    doc_vectors = embedder.model.encode(documents, convert_to_numpy=True)
+    seconds = time.perf_counter() - start
+    query_vectors = embedder.model.encode(queries, convert_to_numpy=True)
+    return doc_vectors.astype(np.float32), query_vectors.astype(np.float32), len(documents) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="Model name (default: EMBEDDING_MODEL)")
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--num-documents", type=int, default=2000)
+    parser.add_argument("--words-per-document", type=int, default=80)
+    parser.add_argument("--num-queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    documents = synthetic_documents(args.num_documents, args.words_per_document)
+    queries = synthetic_documents(args.num_queries, 8, seed=1)
+
+    reference_docs, reference_queries, _ = encode("pytorch", args.model, documents, queries)
+    exact = faiss.IndexFlatL2(reference_docs.shape[1])
+    exact.add(reference_docs)
+    _, truth = exact.search(reference_queries, args.k)
+
+    print(f"{len(documents)} documents, {len(queries)} queries, k={args.k}")
+    print(f"{'backend':<14} {'docs/s':>10} {'cosine':>8} {'recall@' + str(args.k):>10}")
+    for backend in args.backends:
+        doc_vectors, query_vectors, docs_per_sec = encode(backend, args.model, documents, queries)
+        cosine = np.mean(np.sum(doc_vectors * reference_docs, axis=1) /
+                         (np.linalg.norm(doc_vectors, axis=1) * np.linalg.norm(reference_docs, axis=1)))
+
+        index = faiss.IndexFlatL2(doc_vectors.shape[1])
+        index.add(doc_vectors)
+        _, found = index.search(query_vectors, args.k)
+        recall = np.mean([len(set(t) & set(f)) / args.k for t, f in zip(truth, found)])
+        print(f"{backend:<14} {docs_per_sec:>10.1f} {cosine:>8.4f} {recall:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Compare output parity and latency of the generator inference backends.
+
+Runs a fixed set of prompts through each backend with greedy, deterministic
+generation. Parity is the fraction of answers identical to the fp32 PyTorch
+backend. The script exits with status 1 if any backend falls below
+--min-parity (default 0.9; 0 disables the check).
+
+Run from the project root:
+    python -m benchmarks.generator_backends --backends pytorch pytorch_int8 onnx
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from rag.generator import GENERATOR_BACKENDS, TextGenerator
+
+PROMPTS = [
+    ("Who delivers the mail to Hogwarts students?",
+     "At Hogwarts, owls deliver letters and parcels to the students every morning at breakfast."),
+    ("Where is the Hogwarts Express boarded?",
+     "The Hogwarts Express leaves from platform nine and three-quarters at King's Cross station."),
+    ("What does the Sorting Hat do?",
+     "The Sorting Hat is placed on each new student's head and chooses their house."),
+    ("What is the capital of France?",
+     "Paris is the capital and most populous city of France."),
+    ("How many houses are there at Hogwarts?",
+     "Hogwarts has four houses: Gryffindor, Hufflepuff, Ravenclaw and Slytherin."),
+    ("What sport is played on broomsticks?",
+     "Quidditch is a sport played on flying broomsticks with four balls and seven players per team."),
+    ("Who is the headmaster of Hogwarts?",
+     "Albus Dumbledore is the headmaster of Hogwarts School of Witchcraft and Wizardry."),
+    ("What does a Patronus protect against?",
+     "The Patronus charm conjures a guardian that protects the caster against Dementors."),
+]
+
+# Fraction of fp32 answers a backend must reproduce
+DEFAULT_MIN_PARITY = 0.9
+
+
+def parity(answers, reference) -> float:
+    """Fraction of answers identical to the reference answers."""
+    return sum(a == r for a, r in zip(answers, reference)) / len(reference)
+
+
+def run_backend(backend: str, model_name: str, max_length: int, repeats: int):
+    """Generate answers for all prompts and time each call.
+
+    Returns:
+        Tuple of (answers, per-call latencies in ms)
+    """
+    generator = TextGenerator(model_name=model_name, backend=backend)
+    # Greedy decoding so differences come from the backend, not the search
+    generator.generation_kwargs = {"num_beams": 1, "do_sample": False}
+
+    # Warm up
+    generator.generate(PROMPTS[0][0], [{"text": PROMPTS[0][1]}], max_length=max_length)
+
+    answers, latencies = [], []
+    for _ in range(repeats):
+        answers = []
+        for query, context in PROMPTS:
+            start = time.perf_counter()
+            answers.append(generator.generate(query, [{"text": context}], max_length=max_length))
+            latencies.append((time.perf_counter() - start) * 1000)
+    return answers, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="Model name (default: LLM_MODEL)")
+    parser.add_argument("--backends", nargs="+", default=list(GENERATOR_BACKENDS), choices=GENERATOR_BACKENDS)
+    parser.add_argument("--max-length", type=int, default=64)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--min-parity", type=float, default=DEFAULT_MIN_PARITY,
+                        help="Fail if a backend matches fewer fp32 answers than this fraction (0 disables)")
+    args = parser.parse_args()
+
+    reference, _ = run_backend("pytorch", args.model, args.max_length, 1)
+
+    print(f"{len(PROMPTS)} prompts x {args.repeats} repeats")
+    print(f"{'backend':<14} {'p50 ms':>10} {'p95 ms':>10} {'parity':>8}")
+    failed = False
+    for backend in args.backends:
+        answers, latencies = run_backend(backend, args.model, args.max_length, args.repeats)
+        backend_parity = parity(answers, reference)
+        failed = failed or backend_parity < args.min_parity
+        print(f"{backend:<14} {np.percentile(latencies, 50):>10.1f} "
+              f"{np.percentile(latencies, 95):>10.1f} {backend_parity:>8.2f}")
+
+    if failed:
+        print(f"Parity below {args.min_parity:.2f} for at least one backend")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
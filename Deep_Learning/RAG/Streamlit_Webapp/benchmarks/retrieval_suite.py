@@ -0,0 +1,236 @@
+"""Benchmark DocumentRetriever end to end on synthetic corpora, without models.
+
+For every corpus size, index type and precision this ingests a synthetic
+corpus through DocumentRetriever.add_chunks (with a stub embedder), writes a
+checkpoint, measures query latency percentiles per top_k, reloads the store
+from disk, and records the process RSS along the way. Results are written as
+JSON so runs can be compared offline.
+
+Run from the project root:
+    python -m benchmarks.retrieval_suite --num-chunks 10000 100000 --output results.json
+    python -m benchmarks.retrieval_suite --index-types flat hnsw --top-k 5 20 --baseline results.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+import numpy as np
+import faiss
+from app.config import config
+from benchmarks.synthetic import SyntheticCorpus, StubEmbedder
+from rag.index_factory import INDEX_TYPES, VECTOR_PRECISIONS
+from rag.retriever import DocumentRetriever
+
+# Metrics compared against a baseline run, and whether higher values are better
+COMPARED_METRICS = {
+    "ingest_chunks_per_sec": True,
+    "checkpoint_seconds": False,
+    "load_seconds": False,
+    "rss_mb": False,
+}
+
+
+def rss_mb() -> Optional[float]:
+    """Resident set size of this process in MB (peak RSS where /proc is unavailable).
+
+    Returns None where neither /proc nor the resource module exists (Windows).
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def rss_growth(start: Optional[float]) -> Optional[float]:
+    """RSS growth in MB since a rss_mb() reading, or None if RSS is unavailable."""
+    current = rss_mb()
+    return None if current is None or start is None else current - start
+
+
+def directory_mb(path: str) -> float:
+    """Total size of the files under a directory in MB."""
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names) / 2 ** 20
+
+
+def measure_queries(retriever: DocumentRetriever, texts: List[str], vectors: np.ndarray,
+                    top_k: int, hybrid: bool) -> Dict[str, float]:
+    """Latency percentiles of single queries, batched throughput and hit rate for one top_k."""
+    latencies = []
+    hits = 0
+    for i in range(len(vectors)):
+        start = time.perf_counter()
+        results = retriever.search_embeddings(vectors[i:i + 1], top_k, queries=[texts[i]] if hybrid else None)[0]
+        latencies.append(time.perf_counter() - start)
+        # Each query was drawn next to one corpus chunk
+        target = "c" + texts[i].split()[0][1:] + " "
+        hits += any(result["text"].startswith(target) for result in results)
+
+    start = time.perf_counter()
+    retriever.search_embeddings(vectors, top_k, queries=texts if hybrid else None)
+    batch_seconds = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "mean_ms": float(latencies_ms.mean()),
+        "batch_queries_per_sec": len(vectors) / batch_seconds,
+        "hit_rate": hits / len(vectors),
+    }
+
+
+def run_configuration(corpus: SyntheticCorpus, num_chunks: int, index_type: str, precision: str,
+                      args: argparse.Namespace) -> Dict[str, Any]:
+    """Ingest, checkpoint, query and reload one corpus with one index configuration."""
+    temp_dir = tempfile.mkdtemp(dir=args.work_dir)
+    config.vector_db_path = temp_dir
+    config.index_type = index_type
+    config.vector_precision = precision
+    config.retrieval_mode = args.retrieval_mode
+    # Benchmark the requested index type itself, without flat -> IVF promotion
+    config.ivf_promotion_threshold = 0
+    embedder = StubEmbedder(corpus)
+    result = {"num_chunks": num_chunks, "index_type": index_type, "precision": precision,
+              "retrieval_mode": args.retrieval_mode}
+
+    try:
+        rss_start = rss_mb()
+        retriever = DocumentRetriever(embedder=embedder)
+        start = time.perf_counter()
+        for chunks, metadata in corpus.batches(num_chunks, args.batch_size):
+            retriever.add_chunks(chunks, metadata)
+        retriever.wait_for_merge()
+        ingest_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        retriever.merge_segments()
+        checkpoint_seconds = time.perf_counter() - start
+
+        result.update(
+            ingest_seconds=ingest_seconds,
+            ingest_chunks_per_sec=num_chunks / ingest_seconds,
+            checkpoint_seconds=checkpoint_seconds,
+            disk_mb=directory_mb(temp_dir),
+            rss_mb=rss_growth(rss_start),
+        )
+
+        texts, vectors = corpus.queries(args.num_queries, num_chunks)
+        hybrid = args.retrieval_mode == "hybrid"
+        result["queries"] = {str(k): measure_queries(retriever, texts, vectors, k, hybrid) for k in args.top_k}
+
+        del retriever
+        gc.collect()
+        rss_start = rss_mb()
+        start = time.perf_counter()
+        loaded = DocumentRetriever(embedder=embedder)
+        loaded.load_index()
+        result["load_seconds"] = time.perf_counter() - start
+        result["loaded_rss_mb"] = rss_growth(rss_start)
+        # Reading from a freshly loaded (memory-mapped) index
+        result["loaded_queries"] = {str(k): measure_queries(loaded, texts, vectors, k, hybrid)
+                                    for k in args.top_k}
+        del loaded
+        gc.collect()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return result
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str) -> None:
+    """Print the change of each metric relative to a baseline results file."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["num_chunks"], r["index_type"], r["precision"], r["retrieval_mode"]): r
+                    for r in json.load(f)["results"]}
+
+    print(f"\nChange vs. {baseline_path} (positive = better)")
+    for result in results:
+        key = (result["num_chunks"], result["index_type"], result["precision"], result["retrieval_mode"])
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        changes = {name: (result[name], previous[name], higher) for name, higher in COMPARED_METRICS.items()}
+        for k, stats in result["queries"].items():
+            if k in previous["queries"]:
+                changes[f"p50_ms@{k}"] = (stats["p50_ms"], previous["queries"][k]["p50_ms"], False)
+                changes[f"p99_ms@{k}"] = (stats["p99_ms"], previous["queries"][k]["p99_ms"], False)
+
+        label = f"{result['num_chunks']} {result['index_type']}/{result['precision']}"
+        for name, (current, before, higher) in changes.items():
+            # Skip metrics missing from either run (e.g. RSS on Windows)
+            if before and current is not None:
+                change = (current - before) / abs(before) * (1 if higher else -1)
+                print(f"{label:<28} {name:<24} {before:>10.2f} -> {current:>10.2f} {change:>+8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-chunks", type=int, nargs="+", default=[10000])
+    parser.add_argument("--index-types", nargs="+", default=["flat", "hnsw"], choices=INDEX_TYPES)
+    parser.add_argument("--precisions", nargs="+", default=["float32"], choices=VECTOR_PRECISIONS)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[5, 20])
+    parser.add_argument("--num-queries", type=int, default=500)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--batch-size", type=int, default=config.ingest_batch_size)
+    parser.add_argument("--retrieval-mode", default="dense", choices=["dense", "hybrid"])
+    parser.add_argument("--work-dir", help="Directory for temporary stores (default: system temp)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previous JSON results file")
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(dimension=args.dimension, seed=args.seed)
+    results = []
+    print(f"{'chunks':>9} {'index':<9} {'precision':<9} {'ingest/s':>10} {'ckpt s':>8} {'load s':>8} "
+          f"{'RSS MB':>8} {'top_k':>6} {'p50 ms':>8} {'p99 ms':>8} {'hit':>6}")
+    for num_chunks in args.num_chunks:
+        for index_type in args.index_types:
+            for precision in args.precisions:
+                if index_type == "ivf_pq" and precision != "float32":
+                    continue
+                result = run_configuration(corpus, num_chunks, index_type, precision, args)
+                results.append(result)
+                rss = "n/a" if result["rss_mb"] is None else f"{result['rss_mb']:.0f}"
+                for k, stats in result["queries"].items():
+                    print(f"{num_chunks:>9} {index_type:<9} {precision:<9} {result['ingest_chunks_per_sec']:>10.0f} "
+                          f"{result['checkpoint_seconds']:>8.2f} {result['load_seconds']:>8.2f} "
+                          f"{rss:>8} {k:>6} {stats['p50_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+                          f"{stats['hit_rate']:>6.2f}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "faiss": faiss.__version__,
+            "cpu_count": os.cpu_count(),
+            "dimension": args.dimension,
+            "batch_size": args.batch_size,
+            "num_queries": args.num_queries,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
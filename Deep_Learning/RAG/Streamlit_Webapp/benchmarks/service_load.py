@@ -0,0 +1,62 @@
+"""Load-test the RAG query service: throughput vs. latency per concurrency level.
+
+Start the service first (python -m rag.service), then run from the project root:
+    python -m benchmarks.service_load --url http://127.0.0.1:8765 --concurrency 1 4 16 --requests 64
+
+Each client thread sends questions back to back; distinct questions are
+generated so the pipeline caches do not short-circuit the work.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from benchmarks.batch_retrieval import synthetic_documents
+from rag.client import ServiceClient
+
+
+def run_level(client: ServiceClient, queries, concurrency: int, top_k: int):
+    """Send all queries with a fixed number of concurrent clients.
+
+    Returns:
+        Tuple of (wall-clock seconds, per-request latencies in seconds)
+    """
+    def timed_query(query):
+        start = time.perf_counter()
+        client.query(query, top_k)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(timed_query, queries))
+    return time.perf_counter() - start, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=64, help="Requests per concurrency level")
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    client = ServiceClient(args.url)
+    if not client.has_documents():
+        parser.error("The service has no documents; upload some before load testing")
+
+    # Warm up models and caches of the service
+    client.query("warm up question", args.top_k)
+
+    print(f"{'clients':>8} {'requests':>9} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for level, concurrency in enumerate(args.concurrency):
+        queries = synthetic_documents(args.requests, 8, seed=level + 1)
+        seconds, latencies = run_level(client, queries, concurrency, args.top_k)
+        print(f"{concurrency:>8} {len(queries):>9} {len(queries) / seconds:>8.2f} "
+              f"{np.percentile(latencies, 50) * 1000:>9.1f} {np.percentile(latencies, 99) * 1000:>9.1f}")
+
+    health = client.health()
+    print(f"Service answered {health['queries']} queries in {health['batches']} batches "
+          f"({health['queries'] / max(health['batches'], 1):.1f} per batch)")
+
+
+if __name__ == "__main__":
+    main()
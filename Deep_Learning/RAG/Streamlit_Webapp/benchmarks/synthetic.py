@@ -0,0 +1,121 @@
+"""Synthetic chunk corpora and a stub embedder for model-free benchmarks.
+
+Chunk ``i`` has the text ``"c<i> ..."`` and a deterministic clustered
+embedding computed from ``i`` alone, so corpora of millions of chunks can be
+generated batch by batch without holding them in memory or loading a model.
+"""
+import re
+from typing import List, Iterator, Tuple, Dict, Any
+import numpy as np
+import torch
+from benchmarks.batch_retrieval import WORDS
+
+# Rows in the noise tables that are mixed to give every chunk its own vector
+NOISE_ROWS = 4099
+
+CHUNK_PATTERN = re.compile(r"^[cq](\d+)")
+
+
+class SyntheticCorpus:
+    """Clustered embedding space with numbered chunk and query texts."""
+
+    def __init__(self, dimension: int = 384, num_clusters: int = 256, noise: float = 0.3, seed: int = 0):
+        """Initialize the corpus generator.
+
+        Args:
+            dimension: Embedding dimension
+            num_clusters: Number of Gaussian clusters
+            noise: Spread of vectors around their cluster center
+            seed: Random seed
+        """
+        rng = np.random.default_rng(seed)
+        self.dimension = dimension
+        self.centers = rng.normal(size=(num_clusters, dimension)).astype(np.float32)
+        self._noise_a = (noise * rng.normal(size=(NOISE_ROWS, dimension))).astype(np.float32)
+        self._noise_b = (noise * rng.normal(size=(NOISE_ROWS, dimension))).astype(np.float32)
+
+    def vectors(self, numbers: np.ndarray) -> np.ndarray:
+        """Unit-norm embeddings of chunks (or queries) by number.
+
+        Args:
+            numbers: int64 chunk numbers
+
+        Returns:
+            float32 matrix with one row per number
+        """
+        numbers = np.asarray(numbers, dtype=np.int64)
+        # Hash the number into two noise rows; the pair is unique for numbers below NOISE_ROWS**2
+        mixed = (numbers * 2654435761) % (NOISE_ROWS * NOISE_ROWS)
+        vectors = (self.centers[numbers % len(self.centers)]
+                   + self._noise_a[mixed // NOISE_ROWS] + self._noise_b[mixed % NOISE_ROWS])
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    @staticmethod
+    def text(number: int, prefix: str = "c") -> str:
+        """Text of a chunk: its number followed by a few vocabulary words."""
+        words = " ".join(WORDS[(number * step) % len(WORDS)] for step in (1, 3, 7, 11))
+        return f"{prefix}{number} {words}"
+
+    def batches(self, num_chunks: int, batch_size: int,
+                documents_size: int = 100) -> Iterator[Tuple[List[str], List[Dict[str, Any]]]]:
+        """Chunk texts and metadata in ingestion batches.
+
+        Args:
+            num_chunks: Corpus size
+            batch_size: Chunks per batch
+            documents_size: Chunks per synthetic document
+
+        Yields:
+            Tuples of (chunk texts, metadata dicts)
+        """
+        for start in range(0, num_chunks, batch_size):
+            numbers = range(start, min(start + batch_size, num_chunks))
+            yield ([self.text(i) for i in numbers],
+                   [{"doc_id": f"doc_{i // documents_size}", "chunk_id": i % documents_size,
+                     "doc_index": i // documents_size} for i in numbers])
+
+    def queries(self, num_queries: int, num_chunks: int, seed: int = 1) -> Tuple[List[str], np.ndarray]:
+        """Query texts and vectors near random corpus chunks.
+
+        Args:
+            num_queries: Number of queries
+            num_chunks: Corpus size the queries are drawn from
+            seed: Random seed
+
+        Returns:
+            Tuple of (query texts, float32 query matrix)
+        """
+        rng = np.random.default_rng(seed)
+        targets = rng.integers(0, num_chunks, size=num_queries)
+        vectors = self.vectors(targets) + 0.05 * rng.normal(size=(num_queries, self.dimension)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return [self.text(int(i), prefix="q") for i in targets], vectors.astype(np.float32)
+
+
+class StubEmbedder:
+    """Stands in for DocumentEmbedder, mapping synthetic texts to their corpus vectors."""
+
+    def __init__(self, corpus: SyntheticCorpus):
+        """Initialize the embedder.
+
+        Args:
+            corpus: Corpus that generated the texts
+        """
+        self.corpus = corpus
+
+    def _embed(self, texts: List[str]) -> torch.Tensor:
+        numbers = np.fromiter((int(CHUNK_PATTERN.match(text).group(1)) for text in texts),
+                              dtype=np.int64, count=len(texts))
+        return torch.from_numpy(self.corpus.vectors(numbers))
+
+    def embed_documents(self, texts: List[str]) -> torch.Tensor:
+        """Embeddings of chunk texts."""
+        return self._embed(texts)
+
+    def embed_queries(self, queries: List[str]) -> torch.Tensor:
+        """Embeddings of query texts (the vector of the chunk they were drawn from)."""
+        return self._embed(queries)
+
+    def embed_query(self, query: str) -> torch.Tensor:
+        """Embedding of one query text."""
+        return self._embed([query])
@@ -0,0 +1,63 @@
+"""Client for the RAG query service (rag/service.py)."""
+import json
+import urllib.error
+import urllib.request
+from typing import List, Dict, Any, Iterator
+
+
+class ServiceClient:
+    """Talks to a running RAG service with the subset of the RAGPipeline
+    interface used by the Streamlit app and IngestPipeline."""
+
+    def __init__(self, url: str, timeout: float = 300.0):
+        """Initialize the client.
+
+        Args:
+            url: Base URL of the service, e.g. http://127.0.0.1:8765
+            timeout: Request timeout in seconds
+        """
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path: str, payload: Dict[str, Any] = None) -> Any:
+        """Send a request (POST with a JSON body, GET without) and decode the JSON response."""
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(self.url + path, data=data,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"RAG service request {path} failed: {e.read().decode('utf-8', 'replace')}")
+        except urllib.error.URLError as e:
+            raise RuntimeError(f"RAG service at {self.url} is unreachable: {e.reason}")
+
+    def health(self) -> Dict[str, Any]:
+        """Liveness and batching statistics (queries answered, batches run)."""
+        return self._request("/health")
+
+    def query(self, query: str, top_k: int = None) -> Dict[str, Any]:
+        """Answer a question (see RAGPipeline.query)."""
+        return self._request("/query", {"query": query, "top_k": top_k})
+
+    def query_stream(self, query: str, top_k: int = None) -> Iterator[Dict[str, Any]]:
+        """Answer a question; the service batches generation, so the result arrives in one piece."""
+        yield self.query(query, top_k)
+
+    def add_chunks(self, doc_chunks: List[str], chunk_metadata: List[Dict[str, Any]],
+                   replace_doc_ids: List[str] = ()) -> None:
+        """Embed and index pre-split chunks on the service, replacing the given documents."""
+        self._request("/chunks", {"chunks": doc_chunks, "metadata": chunk_metadata,
+                                  "replace": list(replace_doc_ids)})
+
+    def remove_document(self, doc_id: str) -> int:
+        """Remove a document's chunks; returns the number removed."""
+        return self._request("/remove", {"doc_id": doc_id})["removed"]
+
+    def document_status(self) -> Dict[str, Any]:
+        """Summary of the indexed documents (see RAGPipeline.document_status)."""
+        return self._request("/status")
+
+    def has_documents(self) -> bool:
+        """Check if the service has indexed documents."""
+        return self.document_status()["chunks"] > 0
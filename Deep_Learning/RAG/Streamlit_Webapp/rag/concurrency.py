@@ -0,0 +1,64 @@
+"""Synchronization primitives shared by the RAG components."""
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """Lock allowing many concurrent readers or a single writer.
+
+    Waiting writers block new readers, so a steady stream of queries cannot
+    starve document ingestion. The lock is not reentrant.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self) -> None:
+        """Block until no writer holds or is waiting for the lock, then register a reader."""
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+
+    def release_read(self) -> None:
+        """Unregister a reader."""
+        with self._condition:
+            self._readers -= 1
+            if self._readers == 0:
+                self._condition.notify_all()
+
+    def acquire_write(self) -> None:
+        """Block until there are no readers or writers, then take exclusive ownership."""
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self) -> None:
+        """Release exclusive ownership."""
+        with self._condition:
+            self._writer = False
+            self._condition.notify_all()
+
+    @contextmanager
+    def read_lock(self):
+        """Context manager holding the lock for reading."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_lock(self):
+        """Context manager holding the lock for writing."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
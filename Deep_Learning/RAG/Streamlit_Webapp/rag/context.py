@@ -0,0 +1,146 @@
+"""Token-budget packing of retrieved chunks into the generator prompt."""
+from typing import List, Dict, Any, Tuple
+
+# Shortest repeated span treated as chunk overlap rather than a coincidence
+MIN_OVERLAP_CHARS = 8
+# A chunk that would be cut to fewer tokens than this is dropped instead
+MIN_PARTIAL_TOKENS = 16
+
+
+def overlap_length(left: str, right: str, max_chars: int) -> int:
+    """Length of the longest suffix of left that is also a prefix of right.
+
+    Args:
+        left: Text that comes first in the document
+        right: Text that follows it
+        max_chars: Longest overlap to look for
+
+    Returns:
+        Overlap length in characters (0 if shorter than MIN_OVERLAP_CHARS)
+    """
+    for size in range(min(len(left), len(right), max_chars), MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def remove_overlaps(context_docs: List[Dict[str, Any]], max_overlap_chars: int) -> Tuple[List[str], int]:
+    """Strip text that a better-ranked chunk already contains.
+
+    The text splitter repeats up to chunk_overlap characters between adjacent
+    chunks of a document. A chunk keeps its text except for the spans shared
+    with neighbouring chunks (same doc_id, chunk_id +/- 1) ranked above it;
+    exact duplicates are emptied.
+
+    Args:
+        context_docs: Retrieved chunks, best first
+        max_overlap_chars: Longest overlap between adjacent chunks
+
+    Returns:
+        Tuple of (texts in the same order, number of characters removed)
+    """
+    kept = {}
+    seen = set()
+    texts = []
+    removed = 0
+    for doc in context_docs:
+        text = doc["text"]
+        if text in seen:
+            texts.append("")
+            removed += len(text)
+            continue
+        seen.add(text)
+
+        trimmed = text
+        metadata = doc.get("metadata", {})
+        doc_id, chunk_id = metadata.get("doc_id"), metadata.get("chunk_id")
+        if chunk_id is not None:
+            previous = kept.get((doc_id, chunk_id - 1))
+            if previous is not None:
+                trimmed = trimmed[overlap_length(previous, trimmed, max_overlap_chars):]
+            following = kept.get((doc_id, chunk_id + 1))
+            if following is not None:
+                trimmed = trimmed[:len(trimmed) - overlap_length(trimmed, following, max_overlap_chars)]
+            kept[(doc_id, chunk_id)] = text
+
+        trimmed = trimmed.strip()
+        removed += len(text) - len(trimmed)
+        texts.append(trimmed)
+    return texts, removed
+
+
+class ContextPacker:
+    """Builds generator input ids that fit the model's input budget.
+
+    The prompt pieces and all chunks are tokenized in one batch, overlap
+    between chunks is removed first, and chunks are then added in rank order
+    until the budget is full; the chunk that crosses the budget is truncated
+    at token level and the rest are dropped.
+    """
+
+    def __init__(self, tokenizer, max_input_tokens: int, max_overlap_chars: int):
+        """Initialize the packer.
+
+        Args:
+            tokenizer: HuggingFace tokenizer of the generator
+            max_input_tokens: Input length of the model, including special tokens
+            max_overlap_chars: Longest overlap between adjacent chunks
+        """
+        self.tokenizer = tokenizer
+        self.max_input_tokens = max_input_tokens
+        self.max_overlap_chars = max_overlap_chars
+
+    def pack(self, prefix: str, suffix: str,
+             context_docs: List[Dict[str, Any]]) -> Tuple[List[int], Dict[str, int]]:
+        """Encode a prompt made of prefix, numbered chunks and suffix.
+
+        Args:
+            prefix: Prompt text before the context (instructions and question)
+            suffix: Prompt text after the context
+            context_docs: Retrieved chunks, best first
+
+        Returns:
+            Tuple of (input ids, statistics). Statistics are budget_tokens,
+            packed_tokens, dropped_tokens, packed_chunks, dropped_chunks and
+            overlap_chars
+        """
+        texts, overlap_chars = remove_overlaps(context_docs, self.max_overlap_chars)
+        chunks = [text for text in texts if text]
+        headers = [f"Document {n + 1}:\n" for n in range(len(chunks))]
+        encoded = self.tokenizer([prefix, suffix] + headers + [f"{text}\n\n" for text in chunks],
+                                 add_special_tokens=False)["input_ids"]
+        prefix_ids, suffix_ids = encoded[0], encoded[1]
+        header_ids = encoded[2:2 + len(headers)]
+        chunk_ids = encoded[2 + len(headers):]
+
+        reserved = self.tokenizer.num_special_tokens_to_add() + len(suffix_ids)
+        # An overlong question is truncated rather than pushing out the answer cue
+        prefix_ids = prefix_ids[:max(self.max_input_tokens - reserved, 0)]
+        budget = max(self.max_input_tokens - reserved - len(prefix_ids), 0)
+
+        context_ids = []
+        packed_tokens = packed_chunks = dropped_tokens = 0
+        full = False
+        for n, ids in enumerate(chunk_ids):
+            room = budget - len(context_ids) - len(header_ids[n])
+            if full or room < min(len(ids), MIN_PARTIAL_TOKENS):
+                full = True
+                dropped_tokens += len(ids)
+                continue
+            taken = ids[:room]
+            full = len(taken) < len(ids)
+            context_ids.extend(header_ids[n])
+            context_ids.extend(taken)
+            packed_tokens += len(taken)
+            packed_chunks += 1
+            dropped_tokens += len(ids) - len(taken)
+
+        input_ids = self.tokenizer.build_inputs_with_special_tokens(prefix_ids + context_ids + suffix_ids)
+        return input_ids, {
+            "budget_tokens": budget,
+            "packed_tokens": packed_tokens,
+            "dropped_tokens": dropped_tokens,
+            "packed_chunks": packed_chunks,
+            "dropped_chunks": len(context_docs) - packed_chunks,
+            "overlap_chars": overlap_chars,
+        }
@@ -0,0 +1,141 @@
+"""Persistent content-addressed cache of chunk embeddings."""
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import List, Dict, Any
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so formatting-only differences share a cache entry.
+
+    Args:
+        text: Chunk text
+
+    Returns:
+        Normalized text
+    """
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def cache_key(text: str, model_name: str) -> str:
+    """Hash a chunk's normalized text together with the embedding model name.
+
+    Args:
+        text: Chunk text
+        model_name: Embedding model identifier
+
+    Returns:
+        Hex digest used as the cache key
+    """
+    return hashlib.sha256(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed map from content hash to embedding vector with LRU eviction."""
+
+    def __init__(self, path: str, max_entries: int = 200000):
+        """Open (or create) the cache database.
+
+        Args:
+            path: SQLite file path
+            max_entries: Maximum number of vectors kept; least recently used are evicted
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, dim INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Look up vectors for a list of keys and mark the hits as recently used.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Mapping of the keys that were found to their float32 vectors
+        """
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector, dim FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, vector, dim in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32, count=dim)
+
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                       [(now, key) for key in found])
+                self._conn.commit()
+
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Store vectors and evict the least recently used entries over the size bound.
+
+        Args:
+            items: Mapping of cache key to vector
+        """
+        if not items:
+            return
+
+        now = time.time()
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes(), len(vector), now)
+                for key, vector in items.items()]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+
+            excess = self._count() - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (excess,)
+                )
+            self._conn.commit()
+
+    def _count(self) -> int:
+        """Number of cached vectors."""
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size.
+
+        Returns:
+            Dictionary with hits, misses, hit_rate and entries
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": self._count()
+            }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -1,23 +1,41 @@
 """Document embedding functionality for the RAG system."""
 import os
 from typing import List, Dict, Any
+import numpy as np
 import torch
-from transformers import AutoTokenizer, AutoModel
 from sentence_transformers import SentenceTransformer
+from rag.embedding_cache import EmbeddingCache, cache_key
 from app.config import config
 
+# Supported values for RAGConfig.embedding_backend
+EMBEDDING_BACKENDS = ("pytorch", "pytorch_int8", "onnx")
+
 class DocumentEmbedder:
     """Handles document embedding using HuggingFace models."""
     
-    def __init__(self, model_name: str = None):
+    def __init__(self, model_name: str = None, cache_path: str = None, backend: str = None):
         """Initialize the embedder with a specified model.
         
         Args:
             model_name: HuggingFace model identifier
+            cache_path: Optional path of the embedding cache database
+            backend: Inference backend, one of EMBEDDING_BACKENDS
         """
         self.model_name = model_name or config.embedding_model
+        self.backend = (backend or config.embedding_backend or "pytorch").lower()
+        if self.backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unsupported embedding backend '{self.backend}'. "
+                             f"Options are: {', '.join(EMBEDDING_BACKENDS)}")
+        # Quantized backends produce slightly different vectors, so they get their own cache entries
+        self.cache_namespace = self.model_name if self.backend == "pytorch" else f"{self.model_name}@{self.backend}"
         self._load_model()
         
+        # Content-addressed cache consulted before encoding document chunks
+        self.cache = None
+        if config.embedding_cache_size > 0:
+            self.cache = EmbeddingCache(cache_path or config.embedding_cache_path,
+                                        max_entries=config.embedding_cache_size)
+        
     def _load_model(self):
         """Load the embedding model."""
         # Set HuggingFace token if available
@@ -25,21 +43,53 @@ class DocumentEmbedder:
             os.environ["HUGGINGFACE_TOKEN"] = config.huggingface_token
             
         try:
-            self.model = SentenceTransformer(self.model_name)
-            print(f"Successfully loaded model: {self.model_name}")
+            if self.backend == "onnx":
+                # Requires: pip install sentence-transformers[onnx]
+                self.model = SentenceTransformer(self.model_name, backend="onnx")
+            else:
+                self.model = SentenceTransformer(self.model_name)
+                self.model.eval()
+                if self.backend == "pytorch_int8":
+                    # Dynamic int8 quantization of the Linear layers for CPU inference
+                    self.model = torch.ao.quantization.quantize_dynamic(
+                        self.model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+            print(f"Successfully loaded model: {self.model_name} ({self.backend})")
         except Exception as e:
             raise RuntimeError(f"Failed to load embedding model: {e}")
     
     def embed_documents(self, documents: List[str]) -> torch.Tensor:
         """Embed a list of documents.
         
+        Documents whose normalized text was embedded before by the same model
+        are served from the cache; only the rest are encoded.
+        
         Args:
             documents: List of text documents to embed
             
         Returns:
             Tensor of document embeddings
         """
-        return self.model.encode(documents, convert_to_tensor=True)
+        if self.cache is None or not documents:
+            return self.model.encode(documents, convert_to_tensor=True)
+        
+        keys = [cache_key(doc, self.cache_namespace) for doc in documents]
+        vectors = self.cache.get_many(keys)
+        
+        # Encode each distinct missing text once
+        missing = {}
+        for key, doc in zip(keys, documents):
+            if key not in vectors:
+                missing.setdefault(key, doc)
+        
+        if missing:
+            encoded = self.model.encode(list(missing.values()), convert_to_tensor=True)
+            encoded_np = encoded.cpu().numpy().astype(np.float32)
+            new_vectors = dict(zip(missing.keys(), encoded_np))
+            self.cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+        
+        return torch.from_numpy(np.stack([vectors[key] for key in keys]))
     
     def embed_query(self, query: str) -> torch.Tensor:
         """Embed a single query string.
@@ -50,4 +100,15 @@ class DocumentEmbedder:
         Returns:
             Tensor of query embedding
         """
-        return self.model.encode(query, convert_to_tensor=True)
\ No newline at end of file
+        return self.model.encode(query, convert_to_tensor=True)
+    
+    def embed_queries(self, queries: List[str]) -> torch.Tensor:
+        """Embed several query strings in a single batch.
+        
+        Args:
+            queries: Query texts to embed
+            
+        Returns:
+            Tensor of query embeddings with one row per query
+        """
+        return self.model.encode(queries, convert_to_tensor=True)
\ No newline at end of file
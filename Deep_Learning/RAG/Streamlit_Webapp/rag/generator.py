@@ -1,80 +1,221 @@
 """Text generation functionality for the RAG system."""
-from typing import List, Dict, Any
+from threading import Thread
+from typing import List, Dict, Any, Iterator, Tuple
 import torch
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, TextIteratorStreamer
+from rag.context import ContextPacker
+from rag.metrics import timed
 from app.config import config
 
+# Supported values for RAGConfig.generator_backend
+GENERATOR_BACKENDS = ("pytorch", "pytorch_int8", "onnx")
+
 class TextGenerator:
     """Handles text generation using HuggingFace models."""
     
-    def __init__(self, model_name: str = None):
+    def __init__(self, model_name: str = None, backend: str = None):
         """Initialize the generator with a specified model.
         
         Args:
             model_name: HuggingFace model identifier
+            backend: Inference backend, one of GENERATOR_BACKENDS
         """
         self.model_name = model_name or config.llm_model
+        self.backend = (backend or config.generator_backend or "pytorch").lower()
+        if self.backend not in GENERATOR_BACKENDS:
+            raise ValueError(f"Unsupported generator backend '{self.backend}'. "
+                             f"Options are: {', '.join(GENERATOR_BACKENDS)}")
+        # Decoding settings passed to model.generate
+        self.generation_kwargs = {"num_beams": 4, "early_stopping": True}
+        # Decoding settings for streaming, which needs greedy search or sampling
+        self.stream_kwargs = {"do_sample": config.stream_sampling}
+        if config.stream_sampling:
+            self.stream_kwargs.update(temperature=config.stream_temperature, top_p=config.stream_top_p)
         self._load_model()
         
     def _load_model(self):
         """Load the text generation model."""
         try:
             self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            self.model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name)
-            print(f"Successfully loaded model: {self.model_name}")
+            self.packer = ContextPacker(self.tokenizer, config.max_input_tokens, config.chunk_overlap)
+            
+            if self.backend == "onnx":
+                # Optional dependency: pip install optimum[onnxruntime]
+                from optimum.onnxruntime import ORTModelForSeq2SeqLM
+                # Exports encoder, decoder and decoder-with-past (KV cache) graphs
+                self.model = ORTModelForSeq2SeqLM.from_pretrained(self.model_name, export=True, use_cache=True)
+            else:
+                self.model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name)
+                self.model.eval()
+                if self.backend == "pytorch_int8":
+                    # Dynamic int8 quantization of the Linear layers for CPU inference
+                    self.model = torch.ao.quantization.quantize_dynamic(
+                        self.model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+            
+            print(f"Successfully loaded model: {self.model_name} ({self.backend})")
         except Exception as e:
             raise RuntimeError(f"Failed to load text generation model: {e}")
     
-    def _prepare_context(self, context_docs: List[Dict[str, Any]]) -> str:
-        """Prepare context from retrieved documents.
+    def _prepare_inputs(self, query: str,
+                        context_docs: List[Dict[str, Any]]) -> Tuple[torch.Tensor, Dict[str, int]]:
+        """Encode the prompt, packing as much retrieved context as fits the input budget.
         
         Args:
-            context_docs: List of retrieved document chunks
+            query: The user's question
+            context_docs: List of retrieved document chunks, best first
             
         Returns:
-            Formatted context string
+            Tuple of (input ids tensor, context packing statistics with the prompt length)
         """
-        context_text = ""
-        
-        for i, doc in enumerate(context_docs):
-            context_text += f"Document {i+1}:\n{doc['text']}\n\n"
-            
-        return context_text.strip()
+        prefix = f"""
+Based on the following information, please answer this question:
+
+Question: {query}
+
+Information:
+"""
+        input_ids, stats = self.packer.pack(prefix, "\nAnswer:\n", context_docs)
+        stats["prompt_tokens"] = len(input_ids)
+        return torch.tensor([input_ids]), stats
+    
+    def _count_output_tokens(self, outputs: torch.Tensor) -> List[int]:
+        """Number of generated tokens per output row, not counting padding."""
+        return (outputs != self.tokenizer.pad_token_id).sum(dim=1).tolist()
     
     def generate(self, query: str, context_docs: List[Dict[str, Any]], 
-                 max_length: int = 512) -> str:
+                 max_length: int = 512, context_stats: Dict[str, int] = None,
+                 timings: Dict[str, float] = None) -> str:
         """Generate text based on query and context.
         
         Args:
             query: The user's question
             context_docs: List of retrieved document chunks
             max_length: Maximum length of generated text
+            context_stats: Optional dictionary filled with the context packing
+                statistics (see ContextPacker.pack) and the prompt_tokens and
+                output_tokens counts
+            timings: Optional dictionary to which the seconds spent in the
+                "prompt" and "generate" stages are added
             
         Returns:
             Generated text response
         """
-        context = self._prepare_context(context_docs)
+        with timed(timings, "prompt"):
+            input_ids, stats = self._prepare_inputs(query, context_docs)
         
-        prompt = f"""
-Based on the following information, please answer this question:
-
-Question: {query}
-
-Information:
-{context}
-
-Answer:
-"""
+        with timed(timings, "generate"), torch.inference_mode():
+            outputs = self.model.generate(
+                input_ids,
+                max_length=max_length,
+                **self.generation_kwargs
+            )
+            response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+        
+        if context_stats is not None:
+            context_stats.update(stats, output_tokens=self._count_output_tokens(outputs[:1])[0])
+        
+        return response
+    
+    def generate_batch(self, queries: List[str], context_docs_batch: List[List[Dict[str, Any]]],
+                       max_length: int = 512,
+                       context_stats_batch: List[Dict[str, int]] = None,
+                       timings: Dict[str, float] = None) -> List[str]:
+        """Generate answers for several questions in one padded forward pass.
+        
+        Args:
+            queries: The user's questions
+            context_docs_batch: Retrieved document chunks per question
+            max_length: Maximum length of generated text
+            context_stats_batch: Optional dictionaries, one per question, filled
+                with the context packing statistics and token counts
+            timings: Optional dictionary to which the seconds spent on the whole
+                batch in the "prompt" and "generate" stages are added
+            
+        Returns:
+            Generated text responses, in question order
+        """
+        with timed(timings, "prompt"):
+            encoded = [self._prepare_inputs(query, docs) for query, docs in zip(queries, context_docs_batch)]
+            inputs = self.tokenizer.pad({"input_ids": [input_ids[0].tolist() for input_ids, _ in encoded]},
+                                        return_tensors="pt")
+        
+        with timed(timings, "generate"), torch.inference_mode():
+            outputs = self.model.generate(
+                inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+                max_length=max_length,
+                **self.generation_kwargs
+            )
+            responses = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+        
+        if context_stats_batch is not None:
+            output_tokens = self._count_output_tokens(outputs)
+            for context_stats, (_, stats), count in zip(context_stats_batch, encoded, output_tokens):
+                context_stats.update(stats, output_tokens=count)
+        
+        return responses
+    
+    def generate_stream(self, query: str, context_docs: List[Dict[str, Any]],
+                        max_length: int = 512, context_stats: Dict[str, int] = None,
+                        timings: Dict[str, float] = None) -> Iterator[str]:
+        """Generate text based on query and context, yielding it as it is decoded.
+        
+        Beam search cannot stream, so this uses greedy decoding (or sampling,
+        see stream_kwargs) on a background thread feeding a token streamer.
+        
+        Args:
+            query: The user's question
+            context_docs: List of retrieved document chunks
+            max_length: Maximum length of generated text
+            context_stats: Optional dictionary filled with the context packing
+                statistics before the first piece is yielded, and with the
+                output_tokens count once generation has finished
+            timings: Optional dictionary to which the seconds spent in the
+                "prompt" and "generate" stages are added; the generate time
+                excludes time the consumer spends between pieces
+            
+        Yields:
+            Successive pieces of the generated response
+        """
+        with timed(timings, "prompt"):
+            input_ids, stats = self._prepare_inputs(query, context_docs)
+        if context_stats is not None:
+            context_stats.update(stats)
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        errors = []
         
-        inputs = self.tokenizer(prompt, return_tensors="pt", truncation=True, max_length=1024)
+        def run_generation():
+            try:
+                with torch.inference_mode():
+                    self.model.generate(
+                        input_ids,
+                        max_length=max_length,
+                        streamer=streamer,
+                        **self.stream_kwargs
+                    )
+            except Exception as e:
+                # Unblock the consumer instead of leaving it waiting for tokens
+                errors.append(e)
+                streamer.end()
         
-        outputs = self.model.generate(
-            inputs.input_ids,
-            max_length=max_length,
-            num_beams=4,
-            early_stopping=True
-        )
+        thread = Thread(target=run_generation, daemon=True)
+        thread.start()
         
-        response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+        pieces = []
+        stream = iter(streamer)
+        while True:
+            with timed(timings, "generate"):
+                text = next(stream, None)
+            if text is None:
+                break
+            if text:
+                pieces.append(text)
+                yield text
         
-        return response
\ No newline at end of file
+        thread.join()
+        if errors:
+            raise RuntimeError(f"Text generation failed: {errors[0]}")
+        if context_stats is not None:
+            output_ids = self.tokenizer(["".join(pieces)], add_special_tokens=False)["input_ids"][0]
+            context_stats["output_tokens"] = len(output_ids)
\ No newline at end of file
@@ -0,0 +1,340 @@
+"""FAISS index construction and tuning for the RAG retriever."""
+import time
+from typing import List, Dict, Any, Optional
+import numpy as np
+import faiss
+
+# Supported values for RAGConfig.index_type
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# Supported values for RAGConfig.vector_precision
+VECTOR_PRECISIONS = ("float32", "float16", "sq8")
+
+# FAISS k-means warns below this many training points per centroid
+POINTS_PER_CENTROID = 39
+
+# The 8-bit scalar quantizer learns per-dimension ranges from this many vectors
+SQ8_TRAINING_POINTS = 1000
+
+_SCALAR_QUANTIZER_TYPES = {
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit
+}
+
+
+def validate_index_type(index_type: str) -> str:
+    """Check that an index type is one of the supported values.
+
+    Args:
+        index_type: Requested index type
+
+    Returns:
+        The normalized index type
+    """
+    index_type = (index_type or "flat").lower()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unsupported index type '{index_type}'. Options are: {', '.join(INDEX_TYPES)}")
+    return index_type
+
+
+def validate_precision(precision: str) -> str:
+    """Check that a vector precision is one of the supported values.
+
+    Args:
+        precision: Requested precision
+
+    Returns:
+        The normalized precision
+    """
+    precision = (precision or "float32").lower()
+    if precision not in VECTOR_PRECISIONS:
+        raise ValueError(f"Unsupported vector precision '{precision}'. "
+                         f"Options are: {', '.join(VECTOR_PRECISIONS)}")
+    return precision
+
+
+def min_training_points(index_type: str, nlist: int = 100, pq_nbits: int = 8,
+                        precision: str = "float32") -> int:
+    """Number of vectors needed before an index of this type can be trained.
+
+    Args:
+        index_type: Index type
+        nlist: Number of IVF cells
+        pq_nbits: Bits per PQ sub-quantizer code
+        precision: Vector precision (ignored for ivf_pq)
+
+    Returns:
+        Minimum number of training vectors (0 if no training is required)
+    """
+    index_type = validate_index_type(index_type)
+    if index_type == "ivf_pq":
+        return max(nlist, 2 ** pq_nbits) * POINTS_PER_CENTROID
+
+    points = nlist * POINTS_PER_CENTROID if index_type == "ivf_flat" else 0
+    if validate_precision(precision) == "sq8":
+        points = max(points, SQ8_TRAINING_POINTS)
+    return points
+
+
+def create_index(index_type: str, dimension: int, nlist: int = 100, pq_m: int = 8,
+                 pq_nbits: int = 8, hnsw_m: int = 32, ef_construction: int = 40,
+                 precision: str = "float32") -> faiss.Index:
+    """Create an empty FAISS index of the requested type.
+
+    Args:
+        index_type: One of INDEX_TYPES
+        dimension: Vector dimension
+        nlist: Number of IVF cells
+        pq_m: Number of PQ sub-quantizers
+        pq_nbits: Bits per PQ sub-quantizer code
+        hnsw_m: Number of HNSW neighbours per node
+        ef_construction: HNSW construction-time search depth
+        precision: One of VECTOR_PRECISIONS; float16 and sq8 store vectors with
+            a scalar quantizer (ivf_pq is already compressed and ignores it)
+
+    Returns:
+        An (untrained) FAISS index using L2 distance
+    """
+    index_type = validate_index_type(index_type)
+    qtype = _SCALAR_QUANTIZER_TYPES.get(validate_precision(precision))
+
+    if index_type == "flat":
+        if qtype is not None:
+            return faiss.IndexScalarQuantizer(dimension, qtype, faiss.METRIC_L2)
+        return faiss.IndexFlatL2(dimension)
+
+    if index_type == "hnsw":
+        if qtype is not None:
+            index = faiss.IndexHNSWSQ(dimension, qtype, hnsw_m)
+        else:
+            index = faiss.IndexHNSWFlat(dimension, hnsw_m)
+        index.hnsw.efConstruction = ef_construction
+        return index
+
+    quantizer = faiss.IndexFlatL2(dimension)
+    if index_type == "ivf_flat":
+        if qtype is not None:
+            return faiss.IndexIVFScalarQuantizer(quantizer, dimension, nlist, qtype, faiss.METRIC_L2)
+        return faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_L2)
+
+    if dimension % pq_m != 0:
+        raise ValueError(f"Vector dimension {dimension} is not divisible by pq_m={pq_m}")
+    return faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, pq_nbits)
+
+
+def apply_search_params(index: faiss.Index, nprobe: int = None, ef_search: int = None) -> None:
+    """Set query-time knobs on an index (no-op for index types without them).
+
+    Args:
+        index: FAISS index, possibly wrapped
+        nprobe: Number of IVF cells to visit per query
+        ef_search: HNSW search-time candidate list size
+    """
+    if nprobe:
+        try:
+            faiss.extract_index_ivf(index).nprobe = nprobe
+        except RuntimeError:
+            pass
+
+    if ef_search:
+        base = _unwrap(index)
+        if hasattr(base, "hnsw"):
+            base.hnsw.efSearch = ef_search
+
+
+def _unwrap(index: faiss.Index) -> faiss.Index:
+    """Downcast an index, looking through an IndexIDMap2 wrapper."""
+    base = faiss.downcast_index(index)
+    if isinstance(base, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        base = faiss.downcast_index(base.index)
+    return base
+
+
+def with_ids(index: faiss.Index) -> faiss.Index:
+    """Make an empty index addressable by explicit vector ids.
+
+    IVF indexes store ids natively; other types are wrapped in IndexIDMap2.
+
+    Args:
+        index: Empty FAISS index
+
+    Returns:
+        Index that supports add_with_ids
+    """
+    if isinstance(faiss.downcast_index(index), faiss.IndexIVF):
+        return index
+    return faiss.IndexIDMap2(index)
+
+
+def has_ids(index: faiss.Index) -> bool:
+    """Check whether an index stores explicit vector ids (see with_ids)."""
+    base = faiss.downcast_index(index)
+    return isinstance(base, (faiss.IndexIDMap, faiss.IndexIDMap2, faiss.IndexIVF))
+
+
+def supports_removal(index: faiss.Index) -> bool:
+    """Check whether vectors can be removed from an index (HNSW graphs cannot)."""
+    return not isinstance(_unwrap(index), faiss.IndexHNSW)
+
+
+def index_ids(index: faiss.Index) -> np.ndarray:
+    """Vector ids stored in an index.
+
+    Args:
+        index: FAISS index
+
+    Returns:
+        int64 ids (row numbers for indexes without explicit ids)
+    """
+    base = faiss.downcast_index(index)
+    if isinstance(base, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.vector_to_array(base.id_map).astype(np.int64)
+    if isinstance(base, faiss.IndexIVF):
+        invlists = base.invlists
+        ids = [faiss.rev_swig_ptr(invlists.get_ids(cell), invlists.list_size(cell)).copy()
+               for cell in range(base.nlist) if invlists.list_size(cell)]
+        return np.concatenate(ids).astype(np.int64) if ids else np.zeros(0, dtype=np.int64)
+    return np.arange(index.ntotal, dtype=np.int64)
+
+
+def index_vectors(index: faiss.Index) -> np.ndarray:
+    """Reconstruct the stored vectors of a flat (possibly id-mapped) index in id order.
+
+    Args:
+        index: Flat FAISS index
+
+    Returns:
+        float32 matrix aligned with index_ids(index)
+    """
+    base = faiss.downcast_index(index)
+    if isinstance(base, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        base = faiss.downcast_index(base.index)
+    return base.reconstruct_n(0, base.ntotal)
+
+
+def index_type_of(index: Optional[faiss.Index]) -> Optional[str]:
+    """Infer the INDEX_TYPES name of an existing index.
+
+    Args:
+        index: FAISS index or None
+
+    Returns:
+        Index type name, or None if no index is given
+    """
+    if index is None:
+        return None
+    base = _unwrap(index)
+    if isinstance(base, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(base, faiss.IndexIVF):
+        return "ivf_flat"
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
+def index_precision_of(index: Optional[faiss.Index]) -> Optional[str]:
+    """Infer the VECTOR_PRECISIONS name of an existing index.
+
+    Args:
+        index: FAISS index or None
+
+    Returns:
+        Precision name, or None if no index is given
+    """
+    if index is None:
+        return None
+    base = _unwrap(index)
+    if isinstance(base, faiss.IndexHNSW):
+        base = faiss.downcast_index(base.storage)
+    if isinstance(base, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        for precision, qtype in _SCALAR_QUANTIZER_TYPES.items():
+            if base.sq.qtype == qtype:
+                return precision
+    return "float32"
+
+
+def train_index(index: faiss.Index, vectors: np.ndarray, max_training_points: int = 100000) -> None:
+    """Train an index on (a sample of) the given vectors if it requires training.
+
+    Args:
+        index: FAISS index
+        vectors: float32 matrix of shape (n, dimension)
+        max_training_points: Upper bound on the sample used for training
+    """
+    if index.is_trained:
+        return
+
+    if len(vectors) > max_training_points:
+        rng = np.random.default_rng(0)
+        vectors = vectors[rng.choice(len(vectors), max_training_points, replace=False)]
+    index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+
+
+def recall_at_k(index: faiss.Index, base_vectors: np.ndarray, query_vectors: np.ndarray,
+                k: int) -> float:
+    """Measure recall@k of an index against an exact flat search.
+
+    Args:
+        index: Index to evaluate, populated with base_vectors in order
+        base_vectors: Vectors stored in the index
+        query_vectors: Queries to run
+        k: Number of neighbours
+
+    Returns:
+        Fraction of the exact top-k neighbours that the index also returned
+    """
+    exact = faiss.IndexFlatL2(base_vectors.shape[1])
+    exact.add(np.ascontiguousarray(base_vectors, dtype=np.float32))
+    _, truth = exact.search(query_vectors, k)
+    _, found = index.search(query_vectors, k)
+
+    hits = 0
+    for expected, returned in zip(truth, found):
+        hits += len(set(expected[expected >= 0]) & set(returned[returned >= 0]))
+    total = int((truth >= 0).sum())
+    return hits / total if total else 1.0
+
+
+def recall_report(base_vectors: np.ndarray, query_vectors: np.ndarray, k: int,
+                  index_types: List[str] = INDEX_TYPES, **index_params) -> List[Dict[str, Any]]:
+    """Build each index type over the same vectors and compare it to exact search.
+
+    Args:
+        base_vectors: Corpus vectors
+        query_vectors: Query vectors
+        k: Number of neighbours
+        index_types: Index types to evaluate
+        **index_params: nlist, pq_m, pq_nbits, hnsw_m, ef_construction, precision,
+            nprobe, ef_search
+
+    Returns:
+        One row per index type with build time, query latency, index size and recall@k
+    """
+    base_vectors = np.ascontiguousarray(base_vectors, dtype=np.float32)
+    query_vectors = np.ascontiguousarray(query_vectors, dtype=np.float32)
+    nprobe = index_params.pop("nprobe", None)
+    ef_search = index_params.pop("ef_search", None)
+
+    rows = []
+    for index_type in index_types:
+        start = time.perf_counter()
+        index = create_index(index_type, base_vectors.shape[1], **index_params)
+        train_index(index, base_vectors)
+        index.add(base_vectors)
+        build_seconds = time.perf_counter() - start
+        apply_search_params(index, nprobe=nprobe, ef_search=ef_search)
+
+        start = time.perf_counter()
+        index.search(query_vectors, k)
+        query_seconds = time.perf_counter() - start
+
+        rows.append({
+            "index_type": index_type,
+            "precision": index_precision_of(index),
+            "build_seconds": build_seconds,
+            "index_mb": len(faiss.serialize_index(index)) / 2 ** 20,
+            "query_ms": 1000 * query_seconds / len(query_vectors),
+            f"recall@{k}": recall_at_k(index, base_vectors, query_vectors, k)
+        })
+    return rows
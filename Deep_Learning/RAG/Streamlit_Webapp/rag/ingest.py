@@ -0,0 +1,235 @@
+"""Parallel extraction, chunking and embedding of uploaded files."""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Tuple, Callable, Optional
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.config import config
+
+SUPPORTED_EXTENSIONS = (".txt", ".pdf", ".docx")
+
+
+def count_pages(path: str) -> int:
+    """Number of extraction units in a file (PDF pages, otherwise 1).
+
+    Args:
+        path: File path
+
+    Returns:
+        Page count
+    """
+    if path.endswith(".pdf"):
+        from PyPDF2 import PdfReader
+        return len(PdfReader(path).pages)
+    return 1
+
+
+def extract_text(path: str, start_page: int = 0, end_page: int = None) -> str:
+    """Extract the text of a file, or of a page range of a PDF.
+
+    Args:
+        path: File path
+        start_page: First PDF page (inclusive)
+        end_page: Last PDF page (exclusive); defaults to the end of the file
+
+    Returns:
+        Extracted text
+    """
+    if path.endswith(".txt"):
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    if path.endswith(".pdf"):
+        from PyPDF2 import PdfReader
+        reader = PdfReader(path)
+        pages = reader.pages[start_page:end_page]
+        return "\n".join((page.extract_text() or "") for page in pages)
+
+    if path.endswith(".docx"):
+        import docx
+        return "\n".join(para.text for para in docx.Document(path).paragraphs)
+
+    raise ValueError(f"Unsupported file format: {os.path.basename(path)}")
+
+
+def extract_and_split(path: str, start_page: int, end_page: int,
+                      chunk_size: int, chunk_overlap: int) -> Tuple[int, List[str]]:
+    """Worker task: extract a page range and split it into chunks.
+
+    Args:
+        path: File path
+        start_page: First page of the range
+        end_page: End of the range (exclusive)
+        chunk_size: Text splitter chunk size
+        chunk_overlap: Text splitter chunk overlap
+
+    Returns:
+        Tuple of (number of pages processed, chunk texts)
+    """
+    text = extract_text(path, start_page, end_page)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return end_page - start_page, splitter.split_text(text)
+
+
+class IngestPipeline:
+    """Extracts pages on a process pool and streams documents into the retriever.
+
+    Files are cut into page ranges that are extracted and chunked in worker
+    processes. A document's chunks are collected (in document order) until
+    all of its page ranges are done; completed documents are then appended
+    to a buffer that is embedded and indexed every ``batch_size`` chunks, so
+    embedding in the main process overlaps with extraction in the workers.
+
+    Each document is added in a single write that also removes its stored
+    version, under the retriever's write lock, so queries see either the old
+    or the complete new version of a re-uploaded document, never a mix of
+    both or neither. A document that fails to extract is not indexed at all
+    and keeps its stored version.
+    """
+
+    def __init__(self, sink, max_workers: int = None, pages_per_task: int = None,
+                 batch_size: int = None, replace_existing: bool = True):
+        """Initialize the pipeline.
+
+        Args:
+            sink: Object with an add_chunks(chunks, metadata, replace_doc_ids)
+                method (DocumentRetriever, RAGPipeline or ServiceClient)
+            max_workers: Number of extraction processes (default: config or CPU count)
+            pages_per_task: PDF pages per worker task
+            batch_size: Number of chunks embedded per batch
+            replace_existing: Replace a stored document with the same id, so
+                re-uploads replace instead of duplicating it
+        """
+        self.sink = sink
+        self.replace_existing = replace_existing
+        self.max_workers = max_workers or config.ingest_workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task or config.ingest_pages_per_task
+        self.batch_size = batch_size or config.ingest_batch_size
+
+    def _tasks(self, paths: List[str],
+               document_ids: List[str]) -> Tuple[List[Tuple[int, int, int, int]], List[str]]:
+        """Cut files into page-range tasks, skipping files whose document id repeats.
+
+        Returns:
+            Tuple of ((doc_index, task_number, start_page, end_page) tasks, errors)
+        """
+        tasks, errors = [], []
+        seen = set()
+        for doc_index, (path, doc_id) in enumerate(zip(paths, document_ids)):
+            # A second file with the same id would replace the first one's chunks
+            if doc_id in seen:
+                errors.append(f"Skipped {os.path.basename(path)}: another file in this upload "
+                              f"has the document id {doc_id}")
+                continue
+            seen.add(doc_id)
+            if not path.endswith(SUPPORTED_EXTENSIONS):
+                errors.append(f"Unsupported file format: {os.path.basename(path)}")
+                continue
+            try:
+                num_pages = count_pages(path)
+            except ImportError:
+                errors.append("Please install PyPDF2 to process PDF files")
+                continue
+            for task_number, start in enumerate(range(0, max(num_pages, 1), self.pages_per_task)):
+                tasks.append((doc_index, task_number, start, min(start + self.pages_per_task, num_pages)))
+        return tasks, errors
+
+    def run(self, paths: List[str], document_ids: List[str] = None,
+            progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Extract, chunk, embed and index a list of files.
+
+        Args:
+            paths: File paths
+            document_ids: Identifier per file (defaults to the file name)
+            progress_callback: Called with the current statistics after each task
+
+        Returns:
+            Statistics: documents, pages, chunks, seconds, pages_per_sec,
+            chunks_per_sec and errors
+        """
+        document_ids = document_ids or [os.path.basename(path) for path in paths]
+        tasks, errors = self._tasks(paths, document_ids)
+        total_pages = sum(end - start for _, _, start, end in tasks)
+        stats = {"documents": 0, "pages": 0, "total_pages": total_pages, "chunks": 0,
+                 "seconds": 0.0, "pages_per_sec": 0.0, "chunks_per_sec": 0.0, "errors": errors}
+
+        tasks_per_doc = {}
+        for doc_index, _, _, _ in tasks:
+            tasks_per_doc[doc_index] = tasks_per_doc.get(doc_index, 0) + 1
+
+        # Results that arrived before earlier page ranges of the same document
+        pending = {}
+        next_task = {doc_index: 0 for doc_index in tasks_per_doc}
+        # Chunks and metadata of documents that are still being extracted
+        partial = {doc_index: ([], []) for doc_index in tasks_per_doc}
+        failed = set()
+        batch_chunks, batch_metadata, batch_docs = [], [], []
+        start_time = time.perf_counter()
+
+        def flush():
+            if batch_docs:
+                replace = [document_ids[doc_index] for doc_index in batch_docs] if self.replace_existing else []
+                self.sink.add_chunks(list(batch_chunks), list(batch_metadata), replace_doc_ids=replace)
+                stats["chunks"] += len(batch_chunks)
+                batch_chunks.clear()
+                batch_metadata.clear()
+                batch_docs.clear()
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(extract_and_split, paths[doc_index], start, end,
+                                config.chunk_size, config.chunk_overlap): (doc_index, task_number)
+                for doc_index, task_number, start, end in tasks
+            }
+
+            for future in as_completed(futures):
+                doc_index, task_number = futures[future]
+                try:
+                    pending[(doc_index, task_number)] = future.result()
+                except Exception as e:
+                    if doc_index not in failed:
+                        errors.append(f"Error processing {document_ids[doc_index]}: {e}")
+                        failed.add(doc_index)
+                        del partial[doc_index]
+                    # Keep the in-order cursor moving past the failed range
+                    pending[(doc_index, task_number)] = (0, [])
+
+                # Collect completed page ranges of this document in order
+                while (doc_index, next_task[doc_index]) in pending:
+                    num_pages, chunks = pending.pop((doc_index, next_task[doc_index]))
+                    next_task[doc_index] += 1
+                    stats["pages"] += num_pages
+                    if doc_index in failed:
+                        continue
+                    doc_chunks, doc_metadata = partial[doc_index]
+                    for chunk in chunks:
+                        doc_metadata.append({
+                            "doc_id": document_ids[doc_index],
+                            "chunk_id": len(doc_chunks),
+                            "doc_index": doc_index
+                        })
+                        doc_chunks.append(chunk)
+                    if next_task[doc_index] == tasks_per_doc[doc_index]:
+                        # The whole document is extracted, so it can replace its stored version
+                        batch_chunks.extend(doc_chunks)
+                        batch_metadata.extend(doc_metadata)
+                        batch_docs.append(doc_index)
+                        del partial[doc_index]
+                        stats["documents"] += 1
+
+                if len(batch_chunks) >= self.batch_size:
+                    flush()
+
+                elapsed = time.perf_counter() - start_time
+                stats.update(seconds=elapsed,
+                             pages_per_sec=stats["pages"] / elapsed if elapsed else 0.0,
+                             chunks_per_sec=stats["chunks"] / elapsed if elapsed else 0.0)
+                if progress_callback:
+                    progress_callback(dict(stats))
+
+        flush()
+        elapsed = time.perf_counter() - start_time
+        stats.update(seconds=elapsed,
+                     pages_per_sec=stats["pages"] / elapsed if elapsed else 0.0,
+                     chunks_per_sec=stats["chunks"] / elapsed if elapsed else 0.0)
+        return stats
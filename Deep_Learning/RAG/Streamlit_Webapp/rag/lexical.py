@@ -0,0 +1,213 @@
+"""In-process BM25 inverted index over chunk texts and rank fusion helpers."""
+import re
+import pickle
+from array import array
+from typing import List, Dict, Tuple, Iterable
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Frequent English words that carry no lexical signal
+STOPWORDS = frozenset((
+    "a an and are as at be but by for from has have he her his i in is it its of on or s t "
+    "she that the their them they this to was were what when where which who why will with you"
+).split())
+
+# Posting lists are compacted once this fraction of their entries belongs to removed chunks
+COMPACTION_RATIO = 0.25
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens without stopwords.
+
+    Args:
+        text: Chunk or query text
+
+    Returns:
+        List of tokens
+    """
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """Fuse several rankings of ids with reciprocal-rank fusion.
+
+    Args:
+        rankings: Lists of ids, best first
+        k: RRF constant; larger values flatten the contribution of top ranks
+
+    Returns:
+        (id, fused score) tuples sorted by descending score
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, vector_id in enumerate(ranking):
+            scores[vector_id] = scores.get(vector_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """Okapi BM25 index keyed by vector id.
+
+    Postings are stored per term as compact int64 id / int32 term-frequency
+    arrays that grow as chunks are added. Document lengths live in an array
+    indexed by vector id; removing a chunk zeroes its length so its postings
+    are skipped, and posting lists are compacted once enough of them are stale.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """Initialize an empty index.
+
+        Args:
+            k1: Term-frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.terms: Dict[str, int] = {}
+        self._ids: List[array] = []
+        self._tfs: List[array] = []
+        self.doc_len = np.zeros(0, dtype=np.int32)
+        self.num_docs = 0
+        self.total_len = 0
+        self._stale_postings = 0
+        self._num_postings = 0
+
+    def __len__(self) -> int:
+        return self.num_docs
+
+    def add(self, ids: Iterable[int], texts: Iterable[str]) -> None:
+        """Index chunks.
+
+        Args:
+            ids: Vector ids of the chunks
+            texts: Chunk texts
+        """
+        for vector_id, text in zip(ids, texts):
+            vector_id = int(vector_id)
+            tokens = tokenize(text)
+            if vector_id >= len(self.doc_len):
+                grown = np.zeros(max(vector_id + 1, 2 * len(self.doc_len)), dtype=np.int32)
+                grown[:len(self.doc_len)] = self.doc_len
+                self.doc_len = grown
+            if self.doc_len[vector_id]:
+                continue
+
+            # Empty chunks still count as documents, with length 1
+            self.doc_len[vector_id] = max(len(tokens), 1)
+            self.num_docs += 1
+            self.total_len += int(self.doc_len[vector_id])
+
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                term_id = self.terms.get(token)
+                if term_id is None:
+                    term_id = self.terms[token] = len(self._ids)
+                    self._ids.append(array("q"))
+                    self._tfs.append(array("i"))
+                self._ids[term_id].append(vector_id)
+                self._tfs[term_id].append(tf)
+                self._num_postings += 1
+
+    def remove(self, ids: Iterable[int]) -> None:
+        """Remove chunks from the index.
+
+        Args:
+            ids: Vector ids of the chunks
+        """
+        for vector_id in ids:
+            vector_id = int(vector_id)
+            if 0 <= vector_id < len(self.doc_len) and self.doc_len[vector_id]:
+                length = int(self.doc_len[vector_id])
+                self.total_len -= length
+                self.num_docs -= 1
+                self.doc_len[vector_id] = 0
+                # The token count bounds the number of postings the chunk had
+                self._stale_postings += length
+        if self._num_postings and self._stale_postings > COMPACTION_RATIO * self._num_postings:
+            self.compact()
+
+    def ids(self) -> np.ndarray:
+        """Vector ids of the indexed chunks."""
+        return np.flatnonzero(self.doc_len).astype(np.int64)
+
+    def _postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Live postings of a term as (ids, term frequencies)."""
+        ids = np.frombuffer(self._ids[term_id], dtype=np.int64)
+        tfs = np.frombuffer(self._tfs[term_id], dtype=np.int32)
+        live = self.doc_len[ids] > 0
+        return ids[live], tfs[live]
+
+    def compact(self) -> None:
+        """Drop postings of removed chunks."""
+        self._num_postings = 0
+        for term_id in range(len(self._ids)):
+            ids, tfs = self._postings(term_id)
+            self._ids[term_id] = array("q", ids.tobytes())
+            self._tfs[term_id] = array("i", tfs.tobytes())
+            self._num_postings += len(ids)
+        self._stale_postings = 0
+
+    def search(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Score chunks against a query with BM25.
+
+        Args:
+            query: Query text
+            k: Number of results
+
+        Returns:
+            Tuple of (scores, vector ids), best first; fewer than k if fewer chunks match
+        """
+        term_ids = [self.terms[token] for token in set(tokenize(query)) if token in self.terms]
+        if not term_ids or not self.num_docs:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+
+        avg_len = self.total_len / self.num_docs
+        all_ids, all_scores = [], []
+        for term_id in term_ids:
+            ids, tfs = self._postings(term_id)
+            if not len(ids):
+                continue
+            idf = np.log(1.0 + (self.num_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_len[ids] / avg_len)
+            all_ids.append(ids)
+            all_scores.append(idf * tfs * (self.k1 + 1.0) / (tfs + norm))
+        if not all_ids:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+
+        unique_ids, inverse = np.unique(np.concatenate(all_ids), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(all_scores))
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return scores[top].astype(np.float32), unique_ids[top]
+
+    def serialize(self) -> bytes:
+        """Serialize the live postings (removed chunks are left out)."""
+        postings = [self._postings(term_id) for term_id in range(len(self._ids))]
+        return pickle.dumps({
+            "k1": self.k1,
+            "b": self.b,
+            "terms": self.terms,
+            "ids": [ids.tobytes() for ids, _ in postings],
+            "tfs": [tfs.tobytes() for _, tfs in postings],
+            "doc_len": self.doc_len,
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def deserialize(cls, data: bytes) -> "BM25Index":
+        """Rebuild an index from serialize() output."""
+        state = pickle.loads(data)
+        index = cls(k1=state["k1"], b=state["b"])
+        index.terms = state["terms"]
+        index._ids = [array("q", ids) for ids in state["ids"]]
+        index._tfs = [array("i", tfs) for tfs in state["tfs"]]
+        index.doc_len = np.array(state["doc_len"], dtype=np.int32)
+        index.num_docs = int(np.count_nonzero(index.doc_len))
+        index.total_len = int(index.doc_len.sum())
+        index._num_postings = sum(len(ids) for ids in index._ids)
+        return index
@@ -0,0 +1,212 @@
+"""Per-stage query timing and aggregated metrics export."""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Tuple
+
+# Query stages, in pipeline order
+STAGES = ("embed", "search", "rerank", "prompt", "generate")
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Metrics servers of this process by (host, port); see serve_metrics
+_servers: Dict[Tuple[str, int], ThreadingHTTPServer] = {}
+_servers_lock = threading.Lock()
+
+
+@contextmanager
+def timed(timings: Dict[str, float], stage: str):
+    """Add the wall-clock time of the block to timings[stage].
+
+    Args:
+        timings: Dictionary of stage name to seconds (None disables timing)
+        stage: Stage name
+    """
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record a value."""
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "sum": self.sum,
+                "buckets": {str(bound): count for bound, count in zip(self.buckets, self.counts)}}
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms, keyed by name and labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Tuple], float] = {}
+        self.histograms: Dict[Tuple[str, Tuple], Histogram] = {}
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        """Add to a counter.
+
+        Args:
+            name: Metric name
+            value: Amount to add
+            labels: Label values
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record a value in a histogram.
+
+        Args:
+            name: Metric name
+            value: Observed value
+            labels: Label values
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    def record_query(self, timings: Dict[str, float], context_stats: Dict[str, int]) -> None:
+        """Record the stage timings and token counts of one answered query.
+
+        Args:
+            timings: Seconds per stage, with the total under "total"
+            context_stats: Prompt packing and token statistics of the answer
+        """
+        self.increment("rag_queries_total")
+        for stage in STAGES:
+            if stage in timings:
+                self.observe("rag_stage_seconds", timings[stage], stage=stage)
+        if "total" in timings:
+            self.observe("rag_query_seconds", timings["total"])
+        for name in ("prompt_tokens", "output_tokens", "packed_tokens", "dropped_tokens"):
+            if name in context_stats:
+                self.increment(f"rag_{name}_total", context_stats[name])
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All metrics as a JSON-serializable dictionary."""
+        def label_text(labels):
+            return ",".join(f"{name}={value}" for name, value in labels)
+
+        with self._lock:
+            return {
+                "counters": {f"{name}{{{label_text(labels)}}}" if labels else name: value
+                             for (name, labels), value in self.counters.items()},
+                "histograms": {f"{name}{{{label_text(labels)}}}" if labels else name: histogram.as_dict()
+                               for (name, labels), histogram in self.histograms.items()},
+            }
+
+    def to_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}" if pairs else ""
+
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{label_text(labels)} {value}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f"{name}_bucket{label_text(labels, [('le', bound)])} {count}")
+                lines.append(f"{name}_bucket{label_text(labels, [('le', '+Inf')])} {histogram.count}")
+                lines.append(f"{name}_sum{label_text(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{label_text(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str) -> None:
+        """Write a snapshot to a JSON file, replacing it atomically.
+
+        Args:
+            path: Output file
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(dict(self.snapshot(), timestamp=time.time()), f, indent=2)
+        os.replace(temp_path, path)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve the Prometheus text format at /metrics on a daemon thread.
+
+        Args:
+            port: TCP port
+            host: Interface to bind
+
+        Returns:
+            The running server; its registry attribute selects the metrics served
+        """
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = self.server.registry.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        server.registry = self
+        threading.Thread(target=server.serve_forever, name="rag-metrics", daemon=True).start()
+        return server
+
+
+def serve_metrics(registry: MetricsRegistry, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve a registry at /metrics, with one server per port for the whole process.
+
+    A pipeline rebuilt in the same process (e.g. after a reset) reuses the
+    running server, which then serves the new pipeline's registry.
+
+    Args:
+        registry: Metrics to serve
+        port: TCP port
+        host: Interface to bind
+
+    Returns:
+        The running server
+    """
+    with _servers_lock:
+        server = _servers.get((host, port))
+        if server is None:
+            server = _servers[(host, port)] = registry.serve(port, host)
+        server.registry = registry
+        return server
@@ -1,21 +1,59 @@
 """RAG pipeline orchestration."""
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Iterator, Tuple
+import numpy as np
 from rag.embeddings import DocumentEmbedder
+from rag.embedding_cache import normalize_text
+from rag.query_cache import LRUCache
 from rag.retriever import DocumentRetriever
+from rag.sharding import ShardedRetriever
 from rag.generator import TextGenerator
+from rag.reranker import CrossEncoderReranker
+from rag.startup import StartupReport
+from rag.metrics import MetricsRegistry, serve_metrics, timed
 from app.config import config
 
 class RAGPipeline:
     """Orchestrates the complete RAG pipeline."""
     
-    def __init__(self):
-        """Initialize the RAG pipeline components."""
-        self.embedder = DocumentEmbedder()
-        self.retriever = DocumentRetriever(embedder=self.embedder)
-        self.generator = TextGenerator()
+    def __init__(self, startup: StartupReport = None):
+        """Initialize the RAG pipeline components.
+        
+        Args:
+            startup: Report recording how long each model and the index take to load
+        """
+        self.startup = startup or StartupReport()
+        with self.startup.step("load embedding model"):
+            self.embedder = DocumentEmbedder()
+        if config.num_shards > 1:
+            self.retriever = ShardedRetriever(embedder=self.embedder)
+        else:
+            self.retriever = DocumentRetriever(embedder=self.embedder)
+        with self.startup.step("load generator model"):
+            self.generator = TextGenerator()
+        # Optional second stage that reorders a wider candidate set
+        self.reranker = None
+        if config.rerank_enabled:
+            with self.startup.step("load reranker model"):
+                self.reranker = CrossEncoderReranker()
+        
+        # Layered query caches; retrieval and answer keys include the index
+        # version, so adding documents invalidates them automatically
+        self.query_embedding_cache = LRUCache(config.query_cache_size)
+        self.retrieval_cache = LRUCache(config.query_cache_size)
+        self.answer_cache = LRUCache(config.answer_cache_size)
+        
+        # Stage latency histograms and token counters over all answered queries,
+        # optionally exported to a JSON file and/or a Prometheus endpoint
+        self.metrics = MetricsRegistry()
+        self._metrics_written = time.monotonic()
+        self.metrics_server = None
+        if config.metrics_port:
+            self.metrics_server = serve_metrics(self.metrics, config.metrics_port)
         
         # Try to load existing index
-        self.retriever.load_index()
+        with self.startup.step("load index"):
+            self.retriever.load_index()
     
     def add_documents(self, documents: List[str], document_ids: List[str] = None) -> None:
         """Add documents to the retrieval system.
@@ -26,6 +64,39 @@ class RAGPipeline:
         """
         self.retriever.add_documents(documents, document_ids)
     
+    def add_chunks(self, doc_chunks: List[str], chunk_metadata: List[Dict[str, Any]],
+                   replace_doc_ids: List[str] = ()) -> None:
+        """Add already split chunks to the retrieval system.
+        
+        Args:
+            doc_chunks: Chunk texts
+            chunk_metadata: Metadata dict (doc_id, chunk_id, doc_index) per chunk
+            replace_doc_ids: Documents whose stored chunks the new chunks replace atomically
+        """
+        self.retriever.add_chunks(doc_chunks, chunk_metadata, replace_doc_ids=replace_doc_ids)
+    
+    def upsert_documents(self, documents: List[str], document_ids: List[str]) -> None:
+        """Add documents, replacing any previously stored version with the same id.
+        
+        Args:
+            documents: List of document texts
+            document_ids: Identifier of each document
+        """
+        self.retriever.upsert_documents(documents, document_ids)
+    
+    def remove_document(self, doc_id: str) -> int:
+        """Remove a document's chunks from the retrieval system.
+        
+        Cached retrievals and answers are invalidated through the index version.
+        
+        Args:
+            doc_id: Document identifier
+            
+        Returns:
+            Number of chunks removed
+        """
+        return self.retriever.remove_document(doc_id)
+    
     def query(self, query: str, top_k: int = None) -> Dict[str, Any]:
         """Process a query through the RAG pipeline.
         
@@ -34,21 +105,316 @@ class RAGPipeline:
             top_k: Number of documents to retrieve
             
         Returns:
-            Dictionary containing the response and retrieved contexts
+            Dictionary containing the response, the retrieved contexts, the
+            context packing and token statistics (tokens packed into and dropped
+            from the prompt, prompt and output lengths) and the seconds spent in
+            each stage (embed, search, rerank, prompt, generate and total;
+            stages skipped thanks to a cache are absent)
         """
+        start = time.perf_counter()
+        timings = {}
+        
         # Retrieve relevant documents
-        retrieved_docs = self.retriever.retrieve(query, top_k)
+        retrieved_docs = self._retrieve_and_rerank([query], top_k, timings)[0]
         
         # Generate answer
-        if retrieved_docs:
-            response = self.generator.generate(query, retrieved_docs)
-        else:
-            response = "I don't have enough information to answer that question."
+        response, context_stats = self._generate(query, retrieved_docs, timings)
         
+        timings["total"] = time.perf_counter() - start
+        self._record_metrics(timings, context_stats)
         return {
             "query": query,
             "response": response,
-            "contexts": retrieved_docs
+            "contexts": retrieved_docs,
+            "context_stats": context_stats,
+            "timings": timings
+        }
+    
+    def query_stream(self, query: str, top_k: int = None) -> Iterator[Dict[str, Any]]:
+        """Process a query, yielding the result as the answer is generated.
+        
+        Each yielded dictionary has the same keys as the result of query(),
+        with "response" holding the text generated so far; the last one is
+        the complete result. Its timings also hold the time to the first
+        piece under "first_token".
+        
+        Args:
+            query: The user's question
+            top_k: Number of documents to retrieve
+            
+        Yields:
+            Dictionaries containing the partial response and retrieved contexts
+        """
+        start = time.perf_counter()
+        timings = {}
+        
+        # Retrieve relevant documents
+        retrieved_docs = self._retrieve_and_rerank([query], top_k, timings)[0]
+        result = {"query": query, "response": "", "contexts": retrieved_docs, "context_stats": {},
+                  "timings": timings}
+        
+        key = self._answer_key(query, retrieved_docs, self.generator.stream_kwargs) if retrieved_docs else None
+        cached = self.answer_cache.get(key) if key is not None else None
+        if key is None or cached is not None:
+            result["response"], result["context_stats"] = cached or self._generate(query, retrieved_docs)
+            timings["total"] = time.perf_counter() - start
+            self._record_metrics(timings, result["context_stats"])
+            yield result
+            return
+        
+        # Stream the answer token by token; the packing statistics are filled before the first piece
+        context_stats = result["context_stats"]
+        for text in self.generator.generate_stream(query, retrieved_docs, context_stats=context_stats,
+                                                   timings=timings):
+            if "first_token" not in timings:
+                timings["first_token"] = time.perf_counter() - start
+            result = dict(result, response=result["response"] + text)
+            yield result
+        
+        timings["total"] = time.perf_counter() - start
+        self._record_metrics(timings, context_stats)
+        result = dict(result, response=result["response"].strip())
+        self.answer_cache.put(key, (result["response"], context_stats))
+        yield result
+    
+    def query_batch(self, queries: List[str], top_k: int = None) -> List[Dict[str, Any]]:
+        """Process several queries, sharing one embedding batch, one index search
+        and one padded generation batch.
+        
+        Args:
+            queries: The user's questions
+            top_k: Number of documents to retrieve per question
+            
+        Returns:
+            List of dictionaries with the same keys as the result of query(), in
+            query order; timings are those of the whole batch, which is the
+            latency every query in it sees, with its size under "batch_size"
+        """
+        start = time.perf_counter()
+        timings = {}
+        
+        # Retrieve relevant documents for all queries at once
+        retrieved_batch = self._retrieve_and_rerank(queries, top_k, timings)
+        
+        answers = self._generate_batch(queries, retrieved_batch, timings)
+        
+        timings["total"] = time.perf_counter() - start
+        for _, context_stats in answers:
+            self._record_metrics(timings, context_stats)
+        return [
+            {
+                "query": query,
+                "response": response,
+                "contexts": retrieved_docs,
+                "context_stats": context_stats,
+                "timings": dict(timings, batch_size=len(queries))
+            }
+            for query, retrieved_docs, (response, context_stats) in zip(queries, retrieved_batch, answers)
+        ]
+    
+    def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed queries, reusing cached embeddings of previously seen queries.
+        
+        Args:
+            queries: Query texts
+            
+        Returns:
+            float32 matrix with one embedding per query
+        """
+        keys = [normalize_text(query) for query in queries]
+        vectors = [self.query_embedding_cache.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        
+        if missing:
+            encoded = self.embedder.embed_queries([queries[i] for i in missing])
+            encoded_np = encoded.cpu().numpy().reshape(len(missing), -1).astype(np.float32)
+            for i, vector in zip(missing, encoded_np):
+                vectors[i] = vector
+                self.query_embedding_cache.put(keys[i], vector)
+        
+        return np.stack(vectors)
+    
+    def _retrieve_batch(self, queries: List[str], top_k: int = None,
+                        timings: Dict[str, float] = None) -> List[List[Dict[str, Any]]]:
+        """Retrieve chunks for queries, searching the index only for uncached ones.
+        
+        Args:
+            queries: Query texts
+            top_k: Number of documents to retrieve per query
+            timings: Optional dictionary to which the seconds spent in the
+                "embed" and "search" stages are added
+            
+        Returns:
+            One list of retrieved chunks per query
+        """
+        if not queries:
+            return []
+        
+        k = top_k or config.top_k
+        version = self.retriever.version
+        keys = [(normalize_text(query), k, version) for query in queries]
+        results = [self.retrieval_cache.get(key) for key in keys]
+        missing = [i for i, docs in enumerate(results) if docs is None]
+        
+        if missing:
+            missing_queries = [queries[i] for i in missing]
+            with timed(timings, "embed"):
+                embeddings = self._embed_queries(missing_queries)
+            with timed(timings, "search"):
+                found = self.retriever.search_embeddings(embeddings, k, queries=missing_queries)
+            for i, docs in zip(missing, found):
+                results[i] = docs
+                self.retrieval_cache.put(keys[i], docs)
+        
+        # Callers get their own lists so cached entries cannot be modified
+        return [list(docs) for docs in results]
+    
+    def _retrieve_and_rerank(self, queries: List[str], top_k: int = None,
+                             timings: Dict[str, float] = None) -> List[List[Dict[str, Any]]]:
+        """Retrieve the chunks passed to the generator, reranking them if enabled.
+        
+        With a reranker, rerank_candidates chunks are retrieved per query and
+        the cross-encoder keeps the best top_k. Queries whose reranking runs
+        over rerank_time_budget_ms keep the retrieval order instead.
+        
+        Args:
+            queries: Query texts
+            top_k: Number of documents to pass to the generator per query
+            timings: Optional dictionary to which the seconds spent in the
+                "embed", "search" and "rerank" stages are added
+            
+        Returns:
+            One list of chunks per query
+        """
+        k = top_k or config.top_k
+        if self.reranker is None:
+            return self._retrieve_batch(queries, k, timings)
+        
+        version = self.retriever.version
+        keys = [(normalize_text(query), k, version, self.reranker.model_name) for query in queries]
+        results = [self.retrieval_cache.get(key) for key in keys]
+        missing = [i for i, docs in enumerate(results) if docs is None]
+        
+        if missing:
+            candidates = self._retrieve_batch([queries[i] for i in missing], max(k, config.rerank_candidates),
+                                              timings)
+            for i, docs in zip(missing, candidates):
+                with timed(timings, "rerank"):
+                    results[i], reranked = self.reranker.rerank(queries[i], docs, k, config.rerank_time_budget_ms)
+                # Fallback orders are not cached so the query is reranked next time
+                if reranked:
+                    self.retrieval_cache.put(keys[i], results[i])
+        
+        return [list(docs) for docs in results]
+    
+    def _generate(self, query: str, retrieved_docs: List[Dict[str, Any]],
+                  timings: Dict[str, float] = None) -> Tuple[str, Dict[str, int]]:
+        """Generate an answer, reusing a cached one for the same question and contexts.
+        
+        Args:
+            query: The user's question
+            retrieved_docs: Retrieved document chunks
+            timings: Optional dictionary to which the seconds spent in the
+                "prompt" and "generate" stages are added
+            
+        Returns:
+            Tuple of (generated text response, context packing and token statistics)
+        """
+        if not retrieved_docs:
+            return "I don't have enough information to answer that question.", {}
+        
+        key = self._answer_key(query, retrieved_docs, self.generator.generation_kwargs)
+        cached = self.answer_cache.get(key)
+        if cached is None:
+            context_stats = {}
+            response = self.generator.generate(query, retrieved_docs, context_stats=context_stats,
+                                               timings=timings)
+            cached = (response, context_stats)
+            self.answer_cache.put(key, cached)
+        return cached
+    
+    def _generate_batch(self, queries: List[str], retrieved_batch: List[List[Dict[str, Any]]],
+                        timings: Dict[str, float] = None) -> List[Tuple[str, Dict[str, int]]]:
+        """Generate answers for several questions, batching those not in the answer cache.
+        
+        Args:
+            queries: The user's questions
+            retrieved_batch: Retrieved document chunks per question
+            timings: Optional dictionary to which the seconds spent on the batch
+                in the "prompt" and "generate" stages are added
+            
+        Returns:
+            List of (generated text response, context packing and token statistics), in question order
+        """
+        answers = [None] * len(queries)
+        # Questions that share a cache key are generated once
+        missing = {}
+        for i, (query, retrieved_docs) in enumerate(zip(queries, retrieved_batch)):
+            if not retrieved_docs:
+                answers[i] = self._generate(query, retrieved_docs)
+                continue
+            key = self._answer_key(query, retrieved_docs, self.generator.generation_kwargs)
+            answers[i] = self.answer_cache.get(key)
+            if answers[i] is None:
+                missing.setdefault(key, []).append(i)
+        
+        if missing:
+            first = [indices[0] for indices in missing.values()]
+            stats_batch = [{} for _ in first]
+            responses = self.generator.generate_batch([queries[i] for i in first],
+                                                      [retrieved_batch[i] for i in first],
+                                                      context_stats_batch=stats_batch,
+                                                      timings=timings)
+            for (key, indices), response, context_stats in zip(missing.items(), responses, stats_batch):
+                self.answer_cache.put(key, (response, context_stats))
+                for i in indices:
+                    answers[i] = (response, context_stats)
+        
+        return answers
+    
+    def _answer_key(self, query: str, retrieved_docs: List[Dict[str, Any]],
+                    generation_kwargs: Dict[str, Any]) -> tuple:
+        """Build the answer cache key for a question, its contexts and decoding settings."""
+        return (
+            normalize_text(query),
+            self.retriever.version,
+            tuple((doc["metadata"]["doc_id"], doc["metadata"]["chunk_id"]) for doc in retrieved_docs),
+            self.generator.model_name,
+            self.generator.backend,
+            tuple(sorted(generation_kwargs.items()))
+        )
+    
+    def _record_metrics(self, timings: Dict[str, float], context_stats: Dict[str, int]) -> None:
+        """Add an answered query to the metrics, writing the metrics file every metrics_flush_seconds."""
+        self.metrics.record_query(timings, context_stats)
+        if config.metrics_file and time.monotonic() - self._metrics_written >= config.metrics_flush_seconds:
+            self._metrics_written = time.monotonic()
+            self.metrics.write_json(config.metrics_file)
+    
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss statistics of each cache layer.
+        
+        Returns:
+            Dictionary of cache name to its statistics
+        """
+        return {
+            "query_embeddings": self.query_embedding_cache.stats(),
+            "retrieval": self.retrieval_cache.stats(),
+            "answers": self.answer_cache.stats()
+        }
+    
+    def document_status(self) -> Dict[str, Any]:
+        """Summary of the indexed documents.
+        
+        Returns:
+            Dictionary with the number of documents and chunks, and the document ids
+        """
+        if not self.retriever.num_chunks:
+            return {"documents": 0, "chunks": 0, "document_ids": []}
+        return {
+            "documents": self.retriever.document_count,
+            "chunks": self.retriever.num_chunks,
+            "document_ids": list(self.retriever.document_ids())
         }
     
     def has_documents(self) -> bool:
@@ -57,4 +423,4 @@ class RAGPipeline:
         Returns:
             Boolean indicating if documents are available
         """
-        return self.retriever.index is not None and self.retriever.index.ntotal > 0
\ No newline at end of file
+        return self.retriever.num_chunks > 0
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""Cross-encoder reranking of retrieved chunks."""
+import os
+import time
+from typing import List, Dict, Any, Tuple
+from sentence_transformers import CrossEncoder
+from app.config import config
+
+class CrossEncoderReranker:
+    """Scores (query, chunk) pairs with a cross-encoder and keeps the best chunks."""
+
+    def __init__(self, model_name: str = None, batch_size: int = None):
+        """Initialize the reranker with a specified model.
+
+        Args:
+            model_name: HuggingFace cross-encoder identifier
+            batch_size: Number of pairs scored per forward pass
+        """
+        self.model_name = model_name or config.rerank_model
+        self.batch_size = batch_size or config.rerank_batch_size
+        self._load_model()
+
+    def _load_model(self):
+        """Load the cross-encoder model."""
+        if config.huggingface_token:
+            os.environ["HUGGINGFACE_TOKEN"] = config.huggingface_token
+
+        try:
+            self.model = CrossEncoder(self.model_name)
+            print(f"Successfully loaded model: {self.model_name}")
+        except Exception as e:
+            raise RuntimeError(f"Failed to load reranking model: {e}")
+
+    def rerank(self, query: str, candidates: List[Dict[str, Any]], top_n: int,
+               time_budget_ms: float = None) -> Tuple[List[Dict[str, Any]], bool]:
+        """Reorder retrieved chunks by cross-encoder relevance.
+
+        Candidates are scored in batches. If the time budget runs out before
+        every candidate is scored, the retrieval order is kept instead.
+
+        Args:
+            query: Query text
+            candidates: Retrieved chunks, best first
+            top_n: Number of chunks to keep
+            time_budget_ms: Per-query scoring budget in milliseconds (None or 0 for no limit)
+
+        Returns:
+            Tuple of (best top_n chunks, whether they were reranked)
+        """
+        if len(candidates) <= 1:
+            return candidates[:top_n], False
+
+        start = time.perf_counter()
+        scores = []
+        for batch_start in range(0, len(candidates), self.batch_size):
+            if time_budget_ms and (time.perf_counter() - start) * 1000 > time_budget_ms:
+                return candidates[:top_n], False
+            batch = candidates[batch_start:batch_start + self.batch_size]
+            scores.extend(self.model.predict([(query, doc["text"]) for doc in batch],
+                                             batch_size=self.batch_size))
+
+        if time_budget_ms and (time.perf_counter() - start) * 1000 > time_budget_ms:
+            return candidates[:top_n], False
+
+        ranked = sorted(zip(candidates, scores), key=lambda pair: float(pair[1]), reverse=True)
+        return [dict(doc, rerank_score=float(score)) for doc, score in ranked[:top_n]], True
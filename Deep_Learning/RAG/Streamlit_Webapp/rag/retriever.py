@@ -1,31 +1,72 @@
 """Document retrieval system for the RAG pipeline."""
 import os
+import pickle
+import threading
 from typing import List, Dict, Any, Tuple
 import numpy as np
 import faiss
-import pickle
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from rag.embeddings import DocumentEmbedder
+from rag.index_factory import (
+    create_index, apply_search_params, train_index, min_training_points,
+    index_type_of, index_precision_of, validate_index_type, validate_precision,
+    with_ids, has_ids, supports_removal, index_ids, index_vectors
+)
+from rag.store import SegmentStore, ChunkStore
+from rag.lexical import BM25Index, reciprocal_rank_fusion
+from rag.concurrency import ReadWriteLock
 from app.config import config
 
+# Rebuild an index that cannot remove vectors (HNSW) once this fraction of it is deleted
+TOMBSTONE_REBUILD_RATIO = 0.25
+
+# Supported values for RAGConfig.retrieval_mode
+RETRIEVAL_MODES = ("dense", "hybrid")
+
 class DocumentRetriever:
     """Handles document retrieval using FAISS vector store."""
     
-    def __init__(self, embedder: DocumentEmbedder = None):
+    def __init__(self, embedder: DocumentEmbedder = None, db_path: str = None):
         """Initialize the retriever.
         
         Args:
             embedder: DocumentEmbedder instance for embedding documents
+            db_path: Directory of the vector store (default: config.vector_db_path)
         """
         self.embedder = embedder or DocumentEmbedder()
-        self.documents = []
+        self.db_path = db_path or config.vector_db_path
         self.index = None
-        self.doc_chunks = []
+        # Incremented whenever the indexed content changes; used to invalidate caches
+        self.version = 0
         
         # Create vector DB directory if it doesn't exist
-        os.makedirs(config.vector_db_path, exist_ok=True)
-        self.index_path = os.path.join(config.vector_db_path, "faiss_index")
-        self.docs_path = os.path.join(config.vector_db_path, "documents.pkl")
+        os.makedirs(self.db_path, exist_ok=True)
+        self.store = SegmentStore(self.db_path)
+        
+        # Chunk texts and metadata are read lazily from the memory-mapped segments
+        self.doc_chunks = ChunkStore(self.store)
+        # IVF indexes opened with IO_FLAG_MMAP must be re-read before adding to them
+        self._index_readonly = False
+        # Deleted vector ids still in an index that cannot remove them; filtered at search time
+        self._tombstones = set()
+        self._search_params = None
+        
+        # BM25 index over the chunk texts, fused with dense results in hybrid mode
+        self.retrieval_mode = (config.retrieval_mode or "hybrid").lower()
+        if self.retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unsupported retrieval mode '{self.retrieval_mode}'. "
+                             f"Options are: {', '.join(RETRIEVAL_MODES)}")
+        self.lexical = BM25Index() if self.retrieval_mode == "hybrid" else None
+        
+        # Files of the pre-segment format, migrated on first load
+        self.index_path = os.path.join(self.db_path, "faiss_index")
+        self.docs_path = os.path.join(self.db_path, "documents.pkl")
+        
+        # Guards the index and segment list: concurrent searches share it, while
+        # adds, loads and the merge thread's segment swap are exclusive
+        self._lock = ReadWriteLock()
+        self._merge_lock = threading.Lock()
+        self._merge_thread = None
         
         # Text splitter for chunking documents
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -40,7 +81,42 @@ class DocumentRetriever:
             documents: List of document texts
             document_ids: Optional list of document identifiers
         """
-        # Split documents into chunks
+        self.add_chunks(*self._split_documents(documents, document_ids))
+    
+    def upsert_documents(self, documents: List[str], document_ids: List[str]) -> None:
+        """Add documents, replacing the chunks of any document with the same id.
+        
+        The old chunks are removed and the new ones added under one write lock,
+        so queries never see both versions or neither.
+        
+        Args:
+            documents: List of document texts
+            document_ids: Identifier of each document
+        """
+        doc_chunks, chunk_metadata = self._split_documents(documents, document_ids)
+        self._add_chunks(doc_chunks, chunk_metadata, replace_doc_ids=document_ids)
+    
+    def remove_document(self, doc_id: str) -> int:
+        """Remove all chunks of a document from the index and the store.
+        
+        Args:
+            doc_id: Document identifier
+            
+        Returns:
+            Number of chunks removed
+        """
+        with self._lock.write_lock():
+            removed = self._remove_document(doc_id)
+            if removed:
+                self.version += 1
+        
+        if removed:
+            self._schedule_merge()
+        return removed
+    
+    def _split_documents(self, documents: List[str],
+                         document_ids: List[str] = None) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Split documents into chunks with their metadata."""
         doc_chunks = []
         chunk_metadata = []
         
@@ -56,27 +132,95 @@ class DocumentRetriever:
                     "doc_index": i
                 })
         
-        # Generate embeddings
-        embeddings = self.embedder.embed_documents(doc_chunks)
+        return doc_chunks, chunk_metadata
+    
+    def add_chunks(self, doc_chunks: List[str], chunk_metadata: List[Dict[str, Any]],
+                   replace_doc_ids: List[str] = ()) -> None:
+        """Embed and add already split chunks to the retrieval system.
         
-        # Convert to numpy array for FAISS
-        embeddings_np = embeddings.cpu().numpy()
+        Args:
+            doc_chunks: Chunk texts
+            chunk_metadata: Metadata dict (doc_id, chunk_id, doc_index) per chunk
+            replace_doc_ids: Documents whose stored chunks are removed in the same
+                write as the new chunks are added
+        """
+        self._add_chunks(doc_chunks, chunk_metadata, replace_doc_ids=replace_doc_ids)
+    
+    def _add_chunks(self, doc_chunks: List[str], chunk_metadata: List[Dict[str, Any]],
+                    replace_doc_ids: List[str] = ()) -> None:
+        """Embed chunks, then remove replaced documents and add the chunks atomically."""
+        if not doc_chunks and not replace_doc_ids:
+            return
         
-        # Create or update FAISS index
-        vector_dimension = embeddings_np.shape[1]
+        if doc_chunks:
+            # Generate embeddings
+            embeddings = self.embedder.embed_documents(doc_chunks)
+            
+            # Convert to numpy array for FAISS
+            embeddings_np = embeddings.cpu().numpy().astype(np.float32)
+            new_chunks = [(chunk, meta) for chunk, meta in zip(doc_chunks, chunk_metadata)]
         
-        if self.index is None:
-            self.index = faiss.IndexFlatL2(vector_dimension)
+        promoted = False
+        with self._lock.write_lock():
+            if self._index_readonly:
+                self._reload_writable_index()
+            removed = sum(self._remove_document(doc_id) for doc_id in replace_doc_ids)
+            
+            if doc_chunks:
+                # Create or update FAISS index
+                if self.index is None:
+                    self.index = self._build_index(embeddings_np)
+                
+                # Add vectors to index under newly allocated ids
+                ids = self.store.allocate_ids(len(doc_chunks))
+                self.index.add_with_ids(embeddings_np, ids)
+                promoted = self._maybe_promote_index()
+                
+                # Persist only the new batch (chunks and metadata) as a segment
+                self.store.append_segment(embeddings_np, new_chunks, ids)
+                if self.lexical is not None:
+                    self.lexical.add(ids, doc_chunks)
+            self.version += 1
         
-        # Add vectors to index
-        self.index.add(embeddings_np.astype(np.float32))
+        if removed or promoted or len(self.store.segments) > config.max_segments:
+            self._schedule_merge()
+    
+    def _remove_document(self, doc_id: str) -> int:
+        """Delete a document's chunks; the caller holds the write lock.
         
-        # Store document chunks and metadata
-        self.doc_chunks.extend([(chunk, meta) for chunk, meta in zip(doc_chunks, chunk_metadata)])
-        self.documents.extend(documents)
+        Returns:
+            Number of chunks removed
+        """
+        ids = self.store.vector_ids(doc_id)
+        if not len(ids):
+            return 0
         
-        # Save index and documents
-        self._save_index()
+        if self._index_readonly:
+            self._reload_writable_index()
+        if self.index is not None:
+            if supports_removal(self.index):
+                self.index.remove_ids(ids)
+            else:
+                self._tombstones.update(int(i) for i in ids)
+                self._search_params = None
+        if self.lexical is not None:
+            self.lexical.remove(ids)
+        self.store.delete_ids(ids)
+        
+        if len(self._tombstones) > TOMBSTONE_REBUILD_RATIO * self.index.ntotal:
+            self._rebuild_index()
+        return len(ids)
+    
+    def _rebuild_index(self) -> None:
+        """Rebuild the index from the live vectors in the store, dropping tombstones."""
+        vectors, ids = self.store.live_vectors()
+        self.index = self._build_index(vectors) if len(ids) else None
+        if self.index is not None:
+            self.index.add_with_ids(vectors, ids)
+            self._maybe_promote_index()
+        self._tombstones = set()
+        self._search_params = None
+        print(f"Rebuilt vector index without deleted chunks ({len(ids)} vectors)")
     
     def retrieve(self, query: str, top_k: int = None) -> List[Dict[str, Any]]:
         """Retrieve relevant document chunks for a query.
@@ -98,44 +242,387 @@ class DocumentRetriever:
         query_embedding_np = query_embedding.cpu().numpy().reshape(1, -1).astype(np.float32)
         
         # Search index
-        distances, indices = self.index.search(query_embedding_np, k)
+        return self.search_embeddings(query_embedding_np, k, queries=[query])[0]
+    
+    def retrieve_batch(self, queries: List[str], top_k: int = None) -> List[List[Dict[str, Any]]]:
+        """Retrieve relevant document chunks for several queries at once.
+        
+        All queries are embedded in one encoder batch and searched with a
+        single FAISS call over the query matrix.
+        
+        Args:
+            queries: Query texts
+            top_k: Number of results to return per query
+            
+        Returns:
+            One list of relevant document chunks per query, in query order
+        """
+        k = top_k or config.top_k
+        
+        if not self.index or self.index.ntotal == 0:
+            raise ValueError("No documents have been indexed yet")
+        if not queries:
+            return []
+        
+        # Embed all queries in one batch
+        query_embeddings = self.embedder.embed_queries(queries)
+        query_embeddings_np = query_embeddings.cpu().numpy().reshape(len(queries), -1).astype(np.float32)
+        
+        # Search index once for the whole batch
+        return self.search_embeddings(query_embeddings_np, k, queries=queries)
+    
+    def search_embeddings(self, query_embeddings: np.ndarray, top_k: int = None,
+                          queries: List[str] = None) -> List[List[Dict[str, Any]]]:
+        """Search the index with already embedded queries.
+        
+        In hybrid mode, and when the query texts are given, the dense and BM25
+        candidate lists are combined with reciprocal-rank fusion.
+        
+        Args:
+            query_embeddings: float32 matrix with one query vector per row
+            top_k: Number of results to return per query
+            queries: Query texts, one per row, for the lexical search
+            
+        Returns:
+            One list of relevant document chunks per query row
+        """
+        k = top_k or config.top_k
+        
+        with self._lock.read_lock():
+            if not self.index or self.index.ntotal == 0:
+                raise ValueError("No documents have been indexed yet")
+            
+            hybrid = self.lexical is not None and queries is not None
+            num_candidates = max(k, config.hybrid_candidates) if hybrid else k
+            distances, indices = self.index.search(np.ascontiguousarray(query_embeddings, dtype=np.float32),
+                                                   num_candidates, params=self._search_parameters())
+            
+            if hybrid:
+                return [self._fuse_results(queries[i], indices[i], num_candidates, k)
+                        for i in range(len(query_embeddings))]
+            return [self._format_results(distances[i], indices[i]) for i in range(len(query_embeddings))]
+    
+    def _fuse_results(self, query: str, dense_ids: np.ndarray, num_candidates: int,
+                      k: int) -> List[Dict[str, Any]]:
+        """Combine dense and BM25 rankings of one query with reciprocal-rank fusion.
+        
+        Args:
+            query: Query text
+            dense_ids: Vector ids returned by the dense search, best first
+            num_candidates: Number of BM25 candidates to fuse
+            k: Number of results
+            
+        Returns:
+            List of relevant document chunks, scored by their fused rank
+            (score_type "rrf", higher is better)
+        """
+        _, lexical_ids = self.lexical.search(query, num_candidates)
+        fused = reciprocal_rank_fusion([[int(i) for i in dense_ids if i >= 0], lexical_ids.tolist()],
+                                       k=config.rrf_k)
         
-        # Format results
         results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.doc_chunks) and idx >= 0:
-                chunk_text, chunk_meta = self.doc_chunks[idx]
+        for vector_id, score in fused:
+            chunk = self.doc_chunks.get(vector_id)
+            if chunk is not None:
+                chunk_text, chunk_meta = chunk
+                results.append({"text": chunk_text, "metadata": chunk_meta, "score": score,
+                                "score_type": "rrf"})
+                if len(results) == k:
+                    break
+        return results
+    
+    def _search_parameters(self):
+        """Search parameters that exclude tombstoned ids, or None if there are none."""
+        if not self._tombstones:
+            return None
+        if self._search_params is None:
+            deleted = faiss.IDSelectorBatch(np.fromiter(self._tombstones, dtype=np.int64))
+            selector = faiss.IDSelectorNot(deleted)
+            # Keep the selectors alive as long as the parameters that point to them
+            self._search_params = (faiss.SearchParameters(sel=selector), selector, deleted)
+        return self._search_params[0]
+    
+    def _format_results(self, distances: np.ndarray, indices: np.ndarray) -> List[Dict[str, Any]]:
+        """Turn one row of FAISS search output into result dicts.
+        
+        Args:
+            distances: Distances of the hits
+            indices: Vector ids of the hits (-1 for missing hits)
+            
+        Returns:
+            List of relevant document chunks with metadata, scored by L2
+            distance (score_type "distance", lower is better)
+        """
+        results = []
+        for i, idx in enumerate(indices):
+            chunk = self.doc_chunks.get(int(idx))
+            if chunk is not None:
+                chunk_text, chunk_meta = chunk
                 results.append({
                     "text": chunk_text,
                     "metadata": chunk_meta,
-                    "score": float(distances[0][i])
+                    "score": float(distances[i]),
+                    "score_type": "distance"
                 })
         
         return results
     
-    def _save_index(self) -> None:
-        """Save the FAISS index and documents to disk."""
-        if self.index is not None:
-            faiss.write_index(self.index, self.index_path)
+    @property
+    def document_count(self) -> int:
+        """Number of distinct documents in the store."""
+        return len(self.store.document_ids())
+    
+    @property
+    def num_chunks(self) -> int:
+        """Number of live (not deleted) chunks."""
+        return self.store.num_live_rows if self.index is not None else 0
+    
+    def document_ids(self) -> List[str]:
+        """Identifiers of the stored documents, in insertion order."""
+        return self.store.document_ids()
+    
+    @property
+    def higher_scores_are_better(self) -> bool:
+        """Whether result scores are similarities (RRF in hybrid mode) rather than L2 distances."""
+        return self.lexical is not None
+    
+    def _target_index_type(self) -> str:
+        """Index type the store should use once it holds enough vectors."""
+        index_type = validate_index_type(config.index_type)
+        ntotal = self.index.ntotal if self.index is not None else 0
+        
+        if index_type == "flat" and config.ivf_promotion_threshold and \
+           ntotal >= config.ivf_promotion_threshold:
+            return "ivf_flat"
+        return index_type
+    
+    def _new_index(self, index_type: str, dimension: int) -> faiss.Index:
+        """Create an empty index of the given type using the configured parameters."""
+        index = with_ids(create_index(
+            index_type,
+            dimension,
+            nlist=config.ivf_nlist,
+            pq_m=config.pq_m,
+            pq_nbits=config.pq_nbits,
+            hnsw_m=config.hnsw_m,
+            ef_construction=config.hnsw_ef_construction,
+            precision=config.vector_precision
+        ))
+        apply_search_params(index, nprobe=config.ivf_nprobe, ef_search=config.hnsw_ef_search)
+        return index
+    
+    def _build_index(self, vectors: np.ndarray) -> faiss.Index:
+        """Create the first index, training it on the first batch when possible.
+        
+        Index types that need more training data than the batch provides start
+        as a flat index and are promoted later by _maybe_promote_index.
+        
+        Args:
+            vectors: First batch of vectors to be added
             
-        with open(self.docs_path, 'wb') as f:
-            pickle.dump((self.documents, self.doc_chunks), f)
+        Returns:
+            Empty (but trained) FAISS index
+        """
+        index_type = validate_index_type(config.index_type)
+        if len(vectors) < min_training_points(index_type, config.ivf_nlist, config.pq_nbits,
+                                              config.vector_precision):
+            # Full-precision flat index until there is enough training data
+            index = with_ids(faiss.IndexFlatL2(vectors.shape[1]))
+        else:
+            index = self._new_index(index_type, vectors.shape[1])
+        train_index(index, vectors)
+        return index
+    
+    def _maybe_promote_index(self) -> bool:
+        """Rebuild a flat index as an ANN or quantized index once it holds enough vectors.
+        
+        Returns:
+            Boolean indicating whether the index was rebuilt
+        """
+        current_type = index_type_of(self.index)
+        current_precision = index_precision_of(self.index)
+        target_type = self._target_index_type()
+        target_precision = validate_precision(config.vector_precision)
+        if target_type == "ivf_pq":
+            target_precision = "float32"
+        
+        if current_type != "flat" or (target_type, target_precision) == (current_type, current_precision):
+            return False
+        if self.index.ntotal < min_training_points(target_type, config.ivf_nlist, config.pq_nbits,
+                                                   target_precision):
+            return False
+        
+        vectors, ids = index_vectors(self.index), index_ids(self.index)
+        index = self._new_index(target_type, vectors.shape[1])
+        train_index(index, vectors)
+        index.add_with_ids(vectors, ids)
+        self.index = index
+        print(f"Promoted vector index from flat/{current_precision} to "
+              f"{target_type}/{index_precision_of(index)} ({index.ntotal} vectors)")
+        return True
+    
+    def _reload_writable_index(self) -> None:
+        """Replace a read-only memory-mapped index with an in-memory copy."""
+        self.index = self.store.read_checkpoint(mmap=False)
+        apply_search_params(self.index, nprobe=config.ivf_nprobe, ef_search=config.hnsw_ef_search)
+        self._index_readonly = False
+    
+    def _schedule_merge(self) -> None:
+        """Start a background segment merge unless one is already running."""
+        with self._merge_lock:
+            if self._merge_thread is not None and self._merge_thread.is_alive():
+                return
+            self._merge_thread = threading.Thread(target=self.merge_segments, daemon=True)
+            self._merge_thread.start()
+    
+    def wait_for_merge(self) -> None:
+        """Block until a running background merge has finished."""
+        thread = self._merge_thread
+        if thread is not None:
+            thread.join()
+    
+    def merge_segments(self) -> None:
+        """Merge small segments and checkpoint the FAISS index.
+        
+        Only the index snapshot and the final segment swap hold the lock;
+        reading, concatenating and writing segment files happens concurrently
+        with queries and new additions.
+        """
+        with self._lock.read_lock():
+            if self.index is None or self._index_readonly:
+                return
+            entries = self.store.merge_candidates()
+            index_bytes = faiss.serialize_index(self.index)
+            ntotal = self.index.ntotal
+            next_id = self.store.manifest["next_id"]
+            lexical_bytes = self.lexical.serialize() if self.lexical is not None else None
+        
+        try:
+            merged, purged = self.store.merge(entries) if entries else (None, [])
+            checkpoint = {"file": self.store.write_checkpoint(index_bytes, ntotal), "ntotal": ntotal,
+                          "next_id": next_id}
+            if lexical_bytes is not None:
+                checkpoint["lexical"] = self.store.write_lexical_checkpoint(lexical_bytes)
+            # Queries must not be reading chunks from files that are being removed
+            with self._lock.write_lock():
+                self.store.replace_segments(entries, merged, checkpoint, purged)
+        except Exception as e:
+            print(f"Error merging segments: {e}")
     
     def load_index(self) -> bool:
-        """Load the FAISS index and documents from disk.
+        """Load the FAISS index and chunk store from disk.
+        
+        The latest index checkpoint is memory-mapped and vectors of segments
+        written after it are added on top; chunks deleted since the checkpoint
+        are removed (or tombstoned for HNSW). The BM25 index is restored the
+        same way from its checkpoint. Otherwise chunk texts are not read
+        until they are returned by a query.
         
         Returns:
             Boolean indicating success
         """
         try:
-            if os.path.exists(self.index_path) and os.path.exists(self.docs_path):
-                self.index = faiss.read_index(self.index_path)
-                
-                with open(self.docs_path, 'rb') as f:
-                    self.documents, self.doc_chunks = pickle.load(f)
-                
-                return True
-            return False
+            if not self.store.load_manifest():
+                return self._migrate_legacy_store()
+            
+            index = self.store.read_checkpoint(mmap=True)
+            if index is not None and not has_ids(index):
+                # Checkpoints written before vector ids existed are rebuilt from the segments
+                index = None
+            covered = self.store.checkpoint_next_id if index is not None else 0
+            vectors, ids = self.store.live_vectors(
+                [entry for entry in self.store.segments if entry["min_id"] >= covered])
+            readonly = index is not None and index_type_of(index) in ("ivf_flat", "ivf_pq")
+            
+            live_ids = self.store.live_ids()
+            tombstones = set()
+            if index is not None:
+                stale = np.setdiff1d(index_ids(index), live_ids)
+                if len(stale) and not supports_removal(index):
+                    tombstones = set(stale.tolist())
+                elif len(stale):
+                    if readonly:
+                        index, readonly = self.store.read_checkpoint(mmap=False), False
+                    index.remove_ids(stale)
+            
+            if len(ids):
+                if index is None:
+                    index = self._build_index(vectors)
+                elif readonly:
+                    index, readonly = self.store.read_checkpoint(mmap=False), False
+                index.add_with_ids(vectors, ids)
+            
+            lexical = self._load_lexical(live_ids) if self.retrieval_mode == "hybrid" else None
+            
+            with self._lock.write_lock():
+                self.index = index
+                self._index_readonly = readonly
+                self._tombstones = tombstones
+                self.lexical = lexical
+                self._search_params = None
+                self.version += 1
+                if self.index is not None:
+                    apply_search_params(self.index, nprobe=config.ivf_nprobe,
+                                        ef_search=config.hnsw_ef_search)
+                    if not readonly:
+                        self._maybe_promote_index()
+            
+            return self.index is not None
         except Exception as e:
             print(f"Error loading index: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def _load_lexical(self, live_ids: np.ndarray) -> BM25Index:
+        """Restore the BM25 index from its checkpoint and the segments written after it.
+        
+        Args:
+            live_ids: Sorted ids of all chunks that are not deleted
+            
+        Returns:
+            BM25 index over the live chunks
+        """
+        data = self.store.read_lexical_checkpoint()
+        lexical = BM25Index.deserialize(data) if data else BM25Index()
+        covered = self.store.checkpoint_next_id if data else 0
+        
+        ids, texts = self.store.live_texts(
+            [entry for entry in self.store.segments if entry["min_id"] >= covered])
+        lexical.add(ids, texts)
+        lexical.remove(np.setdiff1d(lexical.ids(), live_ids))
+        return lexical
+    
+    def _migrate_legacy_store(self) -> bool:
+        """Convert a single-file faiss_index + documents.pkl store into a segment.
+        
+        Returns:
+            Boolean indicating whether a legacy store was found and loaded
+        """
+        if not (os.path.exists(self.index_path) and os.path.exists(self.docs_path)):
+            return False
+        
+        legacy_index = faiss.read_index(self.index_path)
+        with open(self.docs_path, 'rb') as f:
+            _, doc_chunks = pickle.load(f)
+        
+        # Legacy indexes used row positions as ids
+        vectors = legacy_index.reconstruct_n(0, legacy_index.ntotal)
+        ids = self.store.allocate_ids(legacy_index.ntotal)
+        self.store.append_segment(vectors, doc_chunks, ids)
+        index = with_ids(faiss.IndexFlatL2(legacy_index.d))
+        index.add_with_ids(vectors, ids)
+        checkpoint = {
+            "file": self.store.write_checkpoint(faiss.serialize_index(index), index.ntotal),
+            "ntotal": index.ntotal,
+            "next_id": int(ids[-1]) + 1 if len(ids) else 0
+        }
+        self.store.replace_segments([], None, checkpoint)
+        print(f"Migrated legacy vector store ({index.ntotal} vectors) to segments")
+        
+        with self._lock.write_lock():
+            self.index = index
+            if self.lexical is not None:
+                self.lexical = BM25Index()
+                self.lexical.add(ids, [text for text, _ in doc_chunks])
+            self.version += 1
+            apply_search_params(self.index, nprobe=config.ivf_nprobe, ef_search=config.hnsw_ef_search)
+        return True
\ No newline at end of file
@@ -0,0 +1,325 @@
+"""Asyncio HTTP service around RAGPipeline with request micro-batching.
+
+Concurrent queries that arrive within a short window are answered together
+by RAGPipeline.query_batch: one embedding batch, one index search and one
+padded generation batch.
+
+Run from the project root:
+    python -m rag.service --port 8765
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import List, Dict, Any, Tuple
+import numpy as np
+from app.config import config
+
+
+def _to_json(value):
+    """JSON fallback for numpy scalars and arrays in results."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class BadRequest(ValueError):
+    """A request payload with a missing or mistyped field (answered with 400)."""
+
+
+class BatcherStopped(RuntimeError):
+    """A query submitted to, or still waiting in, a stopped QueryBatcher (answered with 503)."""
+
+
+def _field(payload: Dict[str, Any], name: str, value_type, optional: bool = False, item_type=None):
+    """Read a payload field, raising BadRequest if it is missing or has the wrong type.
+
+    Args:
+        payload: Decoded JSON body
+        name: Field name
+        value_type: Expected type
+        optional: Return None for a missing or null field instead of raising
+        item_type: Expected type of every item, for list fields
+
+    Returns:
+        The field value
+    """
+    value = payload.get(name)
+    if value is None:
+        if optional:
+            return None
+        raise BadRequest(f"missing field '{name}'")
+    # bool is an int subclass, but never a valid count
+    if not isinstance(value, value_type) or isinstance(value, bool):
+        raise BadRequest(f"field '{name}' must be of type {value_type.__name__}")
+    if item_type is not None and not all(isinstance(item, item_type) for item in value):
+        raise BadRequest(f"every item of field '{name}' must be of type {item_type.__name__}")
+    return value
+
+
+class QueryBatcher:
+    """Coalesces concurrent queries into RAGPipeline.query_batch calls.
+
+    The first pending query opens a window of batch_window_ms during which
+    further queries join its batch, up to max_batch_size. Batches run one at
+    a time on a worker thread, so queries that arrive while a batch is being
+    answered are collected into the next one.
+    """
+
+    def __init__(self, pipeline, batch_window_ms: float = None, max_batch_size: int = None):
+        """Initialize the batcher.
+
+        Args:
+            pipeline: RAGPipeline answering the batches
+            batch_window_ms: How long the first query of a batch waits for others
+            max_batch_size: Maximum number of queries per batch
+        """
+        self.pipeline = pipeline
+        self.batch_window_ms = config.service_batch_window_ms if batch_window_ms is None else batch_window_ms
+        self.max_batch_size = max_batch_size or config.service_max_batch_size
+        self.batches = 0
+        self.queries = 0
+        self._queue = None
+        self._worker = None
+        # Queries taken from the queue by the batch being collected or answered
+        self._batch = []
+        self._stopped = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-batch")
+
+    async def start(self) -> None:
+        """Start collecting queries on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._stopped = False
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the worker; queued and in-flight queries fail with BatcherStopped."""
+        self._stopped = True
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        pending = list(self._batch)
+        self._batch = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, _, future in pending:
+            if not future.done():
+                future.set_exception(BatcherStopped("The query service is shutting down"))
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, query: str, top_k: int = None) -> Dict[str, Any]:
+        """Answer a query as part of the next batch.
+
+        Args:
+            query: The user's question
+            top_k: Number of documents to retrieve
+
+        Returns:
+            Result dictionary, as returned by RAGPipeline.query
+
+        Raises:
+            BatcherStopped: If the batcher is not running
+        """
+        if self._stopped or self._worker is None:
+            raise BatcherStopped("The query batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, top_k, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[str, int, asyncio.Future]]:
+        """Wait for a query, then gather the queries arriving within the batch window."""
+        loop = asyncio.get_running_loop()
+        batch = self._batch = [await self._queue.get()]
+        deadline = loop.time() + self.batch_window_ms / 1000
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), max(deadline - loop.time(), 0)))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        """Answer batches until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+
+            # query_batch takes a single top_k, so batch queries by it
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[1], []).append(item)
+
+            for top_k, items in groups.items():
+                queries = [query for query, _, _ in items]
+                try:
+                    results = await loop.run_in_executor(self._executor, self.pipeline.query_batch, queries, top_k)
+                except Exception as e:
+                    for _, _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                self.batches += 1
+                self.queries += len(items)
+                for (_, _, future), result in zip(items, results):
+                    if not future.done():
+                        future.set_result(result)
+            self._batch = []
+
+
+class QueryService:
+    """Minimal JSON-over-HTTP endpoint for a RAGPipeline.
+
+    Routes:
+        GET /health: liveness and batching statistics
+        GET /status: RAGPipeline.document_status()
+        GET /metrics: query stage latencies and token counts in the Prometheus text format
+        POST /query: {"query", "top_k"} answered through the QueryBatcher
+        POST /chunks: {"chunks", "metadata", "replace"} passed to RAGPipeline.add_chunks
+        POST /remove: {"doc_id"} passed to RAGPipeline.remove_document
+
+    Malformed requests and payloads get 400, queries cut off by shutdown 503
+    and errors raised by the pipeline 500.
+    """
+
+    def __init__(self, pipeline, batcher: QueryBatcher = None):
+        """Initialize the service.
+
+        Args:
+            pipeline: RAGPipeline to serve
+            batcher: Query batcher (default: one with the configured window)
+        """
+        self.pipeline = pipeline
+        self.batcher = batcher or QueryBatcher(pipeline)
+
+    async def dispatch(self, method: str, path: str, payload: Dict[str, Any]) -> Tuple[HTTPStatus, Any]:
+        """Route a request.
+
+        Args:
+            method: HTTP method
+            path: Request path
+            payload: Decoded JSON body (empty for GET)
+
+        Returns:
+            Tuple of (status, JSON-serializable response, or text sent as text/plain)
+
+        Raises:
+            BadRequest: If the payload is missing a field or has one of the wrong type
+        """
+        loop = asyncio.get_running_loop()
+        route = (method, path)
+
+        if route == ("GET", "/health"):
+            return HTTPStatus.OK, {"status": "ok", "batches": self.batcher.batches,
+                                   "queries": self.batcher.queries}
+        if route == ("GET", "/status"):
+            return HTTPStatus.OK, await loop.run_in_executor(None, self.pipeline.document_status)
+        if route == ("GET", "/metrics"):
+            return HTTPStatus.OK, self.pipeline.metrics.to_prometheus()
+        if route == ("POST", "/query"):
+            query = _field(payload, "query", str)
+            return HTTPStatus.OK, await self.batcher.submit(query, _field(payload, "top_k", int, optional=True))
+        if route == ("POST", "/chunks"):
+            chunks = _field(payload, "chunks", list, item_type=str)
+            metadata = _field(payload, "metadata", list, item_type=dict)
+            replace = _field(payload, "replace", list, optional=True, item_type=str) or []
+            if len(chunks) != len(metadata):
+                raise BadRequest("'chunks' and 'metadata' must have the same length")
+            await loop.run_in_executor(None, self.pipeline.add_chunks, chunks, metadata, replace)
+            return HTTPStatus.OK, {"added": len(chunks)}
+        if route == ("POST", "/remove"):
+            doc_id = _field(payload, "doc_id", str)
+            removed = await loop.run_in_executor(None, self.pipeline.remove_document, doc_id)
+            return HTTPStatus.OK, {"removed": removed}
+        return HTTPStatus.NOT_FOUND, {"error": f"No route for {method} {path}"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one HTTP/1.1 request on a connection."""
+        try:
+            try:
+                method, path, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                payload = json.loads(body) if body else {}
+                if not isinstance(payload, dict):
+                    raise ValueError("the body must be a JSON object")
+            except (ValueError, asyncio.IncompleteReadError) as e:
+                status, response = HTTPStatus.BAD_REQUEST, {"error": f"Invalid request: {e}"}
+            else:
+                # Only payload validation maps to 400; errors raised by the pipeline are server errors
+                try:
+                    status, response = await self.dispatch(method, path, payload)
+                except BadRequest as e:
+                    status, response = HTTPStatus.BAD_REQUEST, {"error": f"Invalid request: {e}"}
+                except BatcherStopped as e:
+                    status, response = HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(e)}
+                except Exception as e:
+                    status, response = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+
+            if isinstance(response, str):
+                data, content_type = response.encode("utf-8"), "text/plain; version=0.0.4"
+            else:
+                data, content_type = json.dumps(response, default=_to_json).encode("utf-8"), "application/json"
+            writer.write(
+                f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: close\r\n\r\n".encode("latin-1") + data
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        """Serve requests until cancelled.
+
+        Args:
+            host: Interface to bind
+            port: TCP port
+        """
+        await self.batcher.start()
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"RAG service listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--batch-window-ms", type=float, default=config.service_batch_window_ms)
+    parser.add_argument("--max-batch-size", type=int, default=config.service_max_batch_size)
+    args = parser.parse_args()
+
+    from rag.pipeline import RAGPipeline
+
+    pipeline = RAGPipeline()
+    service = QueryService(pipeline, QueryBatcher(pipeline, args.batch_window_ms, args.max_batch_size))
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Retrieval over several independent index shards."""
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any
+import numpy as np
+from rag.embeddings import DocumentEmbedder
+from rag.retriever import DocumentRetriever
+from app.config import config
+
+# Records the shard count of a sharded vector store
+SHARDS_FILE = "shards.json"
+
+
+def shard_of(doc_id: str, num_shards: int) -> int:
+    """Shard that holds a document (stable across processes, unlike hash()).
+
+    Args:
+        doc_id: Document identifier
+        num_shards: Number of shards
+
+    Returns:
+        Shard number
+    """
+    return zlib.crc32(str(doc_id).encode("utf-8")) % num_shards
+
+
+class ShardedRetriever:
+    """Splits documents across N DocumentRetriever shards and searches them in parallel.
+
+    Each document is routed to a shard by a hash of its id, so all of its
+    chunks live in one shard. Every shard is a complete vector store in
+    ``<vector_db_path>/shard_NN`` with its own index, segments and checkpoints,
+    so shards can later be served by separate processes. A search runs on all
+    shards on a thread pool and the per-shard results are merged by score.
+    """
+
+    def __init__(self, embedder: DocumentEmbedder = None, num_shards: int = None, db_path: str = None):
+        """Initialize the shards.
+
+        Args:
+            embedder: DocumentEmbedder shared by all shards
+            num_shards: Number of shards (default: config.num_shards)
+            db_path: Directory of the sharded store (default: config.vector_db_path)
+        """
+        self.embedder = embedder or DocumentEmbedder()
+        self.num_shards = num_shards or config.num_shards
+        self.db_path = db_path or config.vector_db_path
+        if self.num_shards < 1:
+            raise ValueError(f"num_shards must be at least 1, got {self.num_shards}")
+        self._check_layout()
+
+        self.shards = [
+            DocumentRetriever(embedder=self.embedder, db_path=os.path.join(self.db_path, f"shard_{i:02d}"))
+            for i in range(self.num_shards)
+        ]
+        self._executor = ThreadPoolExecutor(max_workers=self.num_shards, thread_name_prefix="rag-shard")
+
+    def _check_layout(self) -> None:
+        """Record the shard count, refusing to open a store written with another layout."""
+        os.makedirs(self.db_path, exist_ok=True)
+        layout_path = os.path.join(self.db_path, SHARDS_FILE)
+        if os.path.exists(layout_path):
+            with open(layout_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)["num_shards"]
+            if stored != self.num_shards:
+                raise ValueError(f"Vector store at {self.db_path} has {stored} shards but num_shards is "
+                                 f"{self.num_shards}; re-ingest the documents into a new store to reshard")
+            return
+
+        if any(os.path.exists(os.path.join(self.db_path, name))
+               for name in ("manifest.json", "faiss_index")):
+            raise ValueError(f"Vector store at {self.db_path} is not sharded; "
+                             f"use num_shards = 1 or a new VECTOR_DB_PATH")
+        with open(layout_path, "w", encoding="utf-8") as f:
+            json.dump({"num_shards": self.num_shards}, f)
+
+    @property
+    def version(self) -> int:
+        """Changes whenever any shard's content changes (shard versions only grow)."""
+        return sum(shard.version for shard in self.shards)
+
+    @property
+    def document_count(self) -> int:
+        """Number of distinct documents across shards."""
+        return sum(shard.document_count for shard in self.shards)
+
+    @property
+    def num_chunks(self) -> int:
+        """Number of live chunks across shards."""
+        return sum(shard.num_chunks for shard in self.shards)
+
+    def document_ids(self) -> List[str]:
+        """Identifiers of the stored documents, shard by shard."""
+        return [doc_id for shard in self.shards for doc_id in shard.document_ids()]
+
+    def _group_by_shard(self, doc_chunks: List[str], chunk_metadata: List[Dict[str, Any]]):
+        """Split chunks and their metadata into per-shard lists."""
+        groups = [([], []) for _ in self.shards]
+        for chunk, meta in zip(doc_chunks, chunk_metadata):
+            chunks, metadata = groups[shard_of(meta["doc_id"], self.num_shards)]
+            chunks.append(chunk)
+            metadata.append(meta)
+        return groups
+
+    def add_documents(self, documents: List[str], document_ids: List[str] = None) -> None:
+        """Split documents and add them to their shards.
+
+        Args:
+            documents: List of document texts
+            document_ids: Optional list of document identifiers
+        """
+        self.add_chunks(*self.shards[0]._split_documents(documents, document_ids))
+
+    def add_chunks(self, doc_chunks: List[str], chunk_metadata: List[Dict[str, Any]],
+                   replace_doc_ids: List[str] = ()) -> None:
+        """Embed and add already split chunks to the shards of their documents.
+
+        Args:
+            doc_chunks: Chunk texts
+            chunk_metadata: Metadata dict (doc_id, chunk_id, doc_index) per chunk
+            replace_doc_ids: Documents whose stored chunks are replaced, atomically per shard
+        """
+        groups = self._group_by_shard(doc_chunks, chunk_metadata)
+        for number, (shard, (chunks, metadata)) in enumerate(zip(self.shards, groups)):
+            replace = [doc_id for doc_id in replace_doc_ids if shard_of(doc_id, self.num_shards) == number]
+            if chunks or replace:
+                shard.add_chunks(chunks, metadata, replace_doc_ids=replace)
+
+    def upsert_documents(self, documents: List[str], document_ids: List[str]) -> None:
+        """Add documents, replacing the chunks of any document with the same id.
+
+        Args:
+            documents: List of document texts
+            document_ids: Identifier of each document
+        """
+        doc_chunks, chunk_metadata = self.shards[0]._split_documents(documents, document_ids)
+        self.add_chunks(doc_chunks, chunk_metadata, replace_doc_ids=document_ids)
+
+    def remove_document(self, doc_id: str) -> int:
+        """Remove all chunks of a document.
+
+        Args:
+            doc_id: Document identifier
+
+        Returns:
+            Number of chunks removed
+        """
+        return self.shards[shard_of(doc_id, self.num_shards)].remove_document(doc_id)
+
+    def retrieve(self, query: str, top_k: int = None) -> List[Dict[str, Any]]:
+        """Retrieve relevant document chunks for a query from all shards.
+
+        Args:
+            query: Query text
+            top_k: Number of results to return
+
+        Returns:
+            List of relevant document chunks with metadata
+        """
+        return self.retrieve_batch([query], top_k)[0]
+
+    def retrieve_batch(self, queries: List[str], top_k: int = None) -> List[List[Dict[str, Any]]]:
+        """Retrieve relevant document chunks for several queries at once.
+
+        Args:
+            queries: Query texts
+            top_k: Number of results to return per query
+
+        Returns:
+            One list of relevant document chunks per query, in query order
+        """
+        if not self.num_chunks:
+            raise ValueError("No documents have been indexed yet")
+        if not queries:
+            return []
+
+        query_embeddings = self.embedder.embed_queries(queries)
+        query_embeddings_np = query_embeddings.cpu().numpy().reshape(len(queries), -1).astype(np.float32)
+        return self.search_embeddings(query_embeddings_np, top_k, queries=queries)
+
+    def search_embeddings(self, query_embeddings: np.ndarray, top_k: int = None,
+                          queries: List[str] = None) -> List[List[Dict[str, Any]]]:
+        """Search all non-empty shards in parallel and merge their results by score.
+
+        Each shard returns its own top_k, so the merged top_k is exact for
+        dense search. In hybrid mode shards fuse their own rankings and the
+        RRF scores are merged; BM25 statistics are per shard.
+
+        Args:
+            query_embeddings: float32 matrix with one query vector per row
+            top_k: Number of results to return per query
+            queries: Query texts, one per row, for the lexical search
+
+        Returns:
+            One list of relevant document chunks per query row
+        """
+        k = top_k or config.top_k
+        shards = [shard for shard in self.shards if shard.num_chunks]
+        if not shards:
+            raise ValueError("No documents have been indexed yet")
+
+        futures = [self._executor.submit(shard.search_embeddings, query_embeddings, k, queries)
+                   for shard in shards]
+        shard_results = [future.result() for future in futures]
+
+        # Scores are distances in dense mode and fused similarities in hybrid mode
+        higher_is_better = queries is not None and shards[0].higher_scores_are_better
+        merged = []
+        for i in range(len(query_embeddings)):
+            results = [result for per_shard in shard_results for result in per_shard[i]]
+            results.sort(key=lambda result: result["score"], reverse=higher_is_better)
+            merged.append(results[:k])
+        return merged
+
+    def load_index(self) -> bool:
+        """Load all shards in parallel.
+
+        Returns:
+            Boolean indicating whether any shard has an index
+        """
+        return any(list(self._executor.map(lambda shard: shard.load_index(), self.shards)))
+
+    def merge_segments(self) -> None:
+        """Merge segments and checkpoint the index of every shard."""
+        for shard in self.shards:
+            shard.merge_segments()
+
+    def wait_for_merge(self) -> None:
+        """Block until running background merges of all shards have finished."""
+        for shard in self.shards:
+            shard.wait_for_merge()
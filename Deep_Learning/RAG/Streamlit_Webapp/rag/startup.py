@@ -0,0 +1,158 @@
+"""Cold-start timing and background loading of the RAG pipeline.
+
+This module only uses the standard library, so importing it does not pull in
+torch, transformers or faiss. Print a startup timing report (in a fresh
+process, so imports are not cached) from the project root with:
+    python -m rag.startup --json startup.json
+"""
+import argparse
+import importlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any
+
+# Heavy dependencies, imported one by one so the report shows the cost of each
+HEAVY_MODULES = ("torch", "faiss", "transformers", "sentence_transformers", "langchain_text_splitters")
+
+
+class StartupReport:
+    """Wall-clock time of each cold-start step, and the step in progress."""
+
+    def __init__(self):
+        """Start the clock."""
+        self.timings: Dict[str, float] = {}
+        self.stage = "starting"
+        self._start = time.perf_counter()
+        self._end = None
+
+    @contextmanager
+    def step(self, name: str):
+        """Time a startup step.
+
+        Args:
+            name: Step name shown in the report, e.g. "load generator model"
+        """
+        self.stage = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def finish(self, stage: str = "ready") -> None:
+        """Stop the total clock.
+
+        Args:
+            stage: Final stage ("ready" or "failed")
+        """
+        self.stage = stage
+        self._end = time.perf_counter()
+
+    def as_dict(self) -> Dict[str, float]:
+        """Step timings in seconds, in execution order, with the total (so far, if still starting)."""
+        end = self._end if self._end is not None else time.perf_counter()
+        return dict(self.timings, total=end - self._start)
+
+
+def load_pipeline(report: StartupReport = None):
+    """Import the heavy dependencies and build the pipeline, timing each step.
+
+    Args:
+        report: Report to record into (default: a new one)
+
+    Returns:
+        RAGPipeline instance; its startup attribute holds the report
+    """
+    report = report or StartupReport()
+    for module in HEAVY_MODULES:
+        with report.step(f"import {module}"):
+            importlib.import_module(module)
+    with report.step("import rag.pipeline"):
+        from rag.pipeline import RAGPipeline
+    return RAGPipeline(startup=report)
+
+
+class PipelineLoader:
+    """Builds a pipeline on a background thread so the UI can render meanwhile."""
+
+    def __init__(self, factory=None):
+        """Initialize the loader.
+
+        Args:
+            factory: Callable taking a StartupReport and returning the pipeline
+                (default: load_pipeline)
+        """
+        self.factory = factory or load_pipeline
+        self.report = StartupReport()
+        self.pipeline = None
+        self.error = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self) -> "PipelineLoader":
+        """Start loading; returns self."""
+        self._thread = threading.Thread(target=self._run, name="rag-pipeline-loader", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        try:
+            self.pipeline = self.factory(self.report)
+            self.report.finish()
+            print("Startup timing: " + ", ".join(f"{name} {seconds:.2f}s"
+                                                 for name, seconds in self.report.as_dict().items()))
+        except Exception as e:
+            self.error = e
+            self.report.finish("failed")
+            print(f"Failed to load the RAG pipeline: {e}")
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        """Whether the pipeline has loaded successfully."""
+        return self._done.is_set() and self.error is None
+
+    @property
+    def stage(self) -> str:
+        """Startup step in progress ("ready" or "failed" once done)."""
+        return self.report.stage
+
+    def wait(self, timeout: float = None):
+        """Block until the pipeline is loaded.
+
+        Args:
+            timeout: Seconds to wait (None waits indefinitely)
+
+        Returns:
+            The pipeline
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Pipeline is still loading ({self.stage})")
+        if self.error is not None:
+            raise RuntimeError(f"Failed to load the RAG pipeline: {self.error}")
+        return self.pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = StartupReport()
+    load_pipeline(report)
+    report.finish()
+    timings: Dict[str, Any] = report.as_dict()
+
+    width = max(len(name) for name in timings)
+    for name, seconds in timings.items():
+        print(f"{name:<{width}} {seconds:>8.2f}s")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(timings, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,628 @@
+"""Append-only segmented on-disk storage for the retriever's vectors and chunks."""
+import os
+import json
+import uuid
+import bisect
+import pickle
+import threading
+from collections.abc import Sequence
+from typing import List, Dict, Any, Tuple, Optional
+import numpy as np
+import faiss
+
+MANIFEST_VERSION = 3
+
+# Per-segment columnar files; texts are stored as one UTF-8 blob indexed by offsets
+SEGMENT_FILES = (".vectors.npy", ".ids.npy", ".texts.bin", ".offsets.npy", ".doc_ref.npy",
+                 ".doc_index.npy", ".chunk_id.npy", ".json")
+
+# A segment is rewritten by the merger once this fraction of its rows is deleted
+COMPACTION_RATIO = 0.25
+
+
+class SegmentReader:
+    """Memory-mapped read access to one segment's columns."""
+
+    def __init__(self, base_path: str):
+        """Open the segment files without reading them into memory.
+
+        Args:
+            base_path: Segment path without the column suffix
+        """
+        self.base_path = base_path
+        self.vectors = np.load(base_path + ".vectors.npy", mmap_mode="r")
+        self.ids = np.load(base_path + ".ids.npy", mmap_mode="r")
+        self.offsets = np.load(base_path + ".offsets.npy", mmap_mode="r")
+        self.doc_ref = np.load(base_path + ".doc_ref.npy", mmap_mode="r")
+        self.doc_index = np.load(base_path + ".doc_index.npy", mmap_mode="r")
+        self.chunk_id = np.load(base_path + ".chunk_id.npy", mmap_mode="r")
+        with open(base_path + ".json", "r") as f:
+            self.doc_ids = json.load(f)["doc_ids"]
+
+        # np.memmap cannot map an empty file
+        if os.path.getsize(base_path + ".texts.bin") > 0:
+            self.texts = np.memmap(base_path + ".texts.bin", dtype=np.uint8, mode="r")
+        else:
+            self.texts = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.chunk_id)
+
+    def text(self, row: int) -> str:
+        """Read the text of one chunk."""
+        return bytes(self.texts[self.offsets[row]:self.offsets[row + 1]]).decode("utf-8")
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        """Rebuild the metadata dict of one chunk."""
+        return {
+            "doc_id": self.doc_ids[self.doc_ref[row]],
+            "chunk_id": int(self.chunk_id[row]),
+            "doc_index": int(self.doc_index[row])
+        }
+
+
+def write_segment_files(base_path: str, vectors: np.ndarray, texts: List[str],
+                        metadata: List[Dict[str, Any]], ids: np.ndarray) -> None:
+    """Write a segment in the columnar format read by SegmentReader.
+
+    Args:
+        base_path: Segment path without the column suffix
+        vectors: Chunk vectors in row order
+        texts: Chunk texts
+        metadata: Chunk metadata dicts with doc_id, chunk_id and doc_index
+        ids: Increasing vector ids of the chunks (their ids in the FAISS index)
+    """
+    doc_ids, doc_ref = [], []
+    positions = {}
+    for meta in metadata:
+        if meta["doc_id"] not in positions:
+            positions[meta["doc_id"]] = len(doc_ids)
+            doc_ids.append(meta["doc_id"])
+        doc_ref.append(positions[meta["doc_id"]])
+
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(data) for data in encoded])
+
+    np.save(base_path + ".vectors.npy", np.ascontiguousarray(vectors, dtype=np.float32))
+    np.save(base_path + ".ids.npy", np.asarray(ids, dtype=np.int64))
+    with open(base_path + ".texts.bin", "wb") as f:
+        f.write(b"".join(encoded))
+    np.save(base_path + ".offsets.npy", offsets)
+    np.save(base_path + ".doc_ref.npy", np.asarray(doc_ref, dtype=np.int32))
+    np.save(base_path + ".doc_index.npy", np.asarray([m.get("doc_index", 0) for m in metadata], dtype=np.int32))
+    np.save(base_path + ".chunk_id.npy", np.asarray([m["chunk_id"] for m in metadata], dtype=np.int32))
+    with open(base_path + ".json", "w") as f:
+        json.dump({"doc_ids": doc_ids}, f)
+
+
+class SegmentStore:
+    """Stores each batch of added chunks as an immutable segment.
+
+    A segment holds the vectors, texts, metadata and vector ids of one batch
+    in columnar, memory-mappable files. ``manifest.json`` lists the live
+    segments in id order together with the ids of deleted chunks and an
+    optional FAISS index checkpoint that covers all ids below its ``next_id``,
+    so adding or deleting data only writes the new segment and the manifest.
+    Deleted rows are dropped from the segment files when they are merged.
+    """
+
+    def __init__(self, path: str):
+        """Initialize the store.
+
+        Args:
+            path: Directory holding the manifest, segments and checkpoints
+        """
+        self.path = path
+        self.segments_dir = os.path.join(path, "segments")
+        self.manifest_path = os.path.join(path, "manifest.json")
+        os.makedirs(self.segments_dir, exist_ok=True)
+        self.manifest = self._empty_manifest()
+        # Guards the manifest, which is updated by both writers and the merger
+        self._lock = threading.Lock()
+        self._readers = {}
+        self._deleted = set()
+        # doc_id -> vector ids of its live chunks, built on first use
+        self._doc_vector_ids = None
+
+    @staticmethod
+    def _empty_manifest() -> Dict[str, Any]:
+        """Create the manifest of an empty store."""
+        return {"version": MANIFEST_VERSION, "next_segment": 0, "next_id": 0, "segments": [],
+                "deleted": [], "checkpoint": None}
+
+    @property
+    def segments(self) -> List[Dict[str, Any]]:
+        """Live segments in row order."""
+        return self.manifest["segments"]
+
+    @property
+    def num_rows(self) -> int:
+        """Total number of rows across all segments, including deleted rows not yet merged away."""
+        return sum(segment["count"] for segment in self.segments)
+
+    @property
+    def num_live_rows(self) -> int:
+        """Number of rows that are not deleted."""
+        return self.num_rows - len(self._deleted)
+
+    @property
+    def deleted_ids(self) -> np.ndarray:
+        """Sorted ids of deleted chunks that are still present in segment files."""
+        return np.asarray(self.manifest["deleted"], dtype=np.int64)
+
+    def exists(self) -> bool:
+        """Check whether a manifest has been written."""
+        return os.path.exists(self.manifest_path)
+
+    def load_manifest(self) -> bool:
+        """Read the manifest from disk.
+
+        Returns:
+            Boolean indicating whether a manifest was found
+        """
+        self._readers = {}
+        self._doc_vector_ids = None
+        if not self.exists():
+            self.manifest = self._empty_manifest()
+            self._deleted = set()
+            return False
+
+        with open(self.manifest_path, "r") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version", 1) < MANIFEST_VERSION:
+            self._upgrade_segments()
+        self._deleted = set(self.manifest["deleted"])
+        return True
+
+    def _upgrade_segments(self) -> None:
+        """Bring older segments up to the current format.
+
+        Version 1 segments (.npy + pickled chunks) are rewritten in the columnar
+        format; segments without vector ids use their row numbers, which is
+        what older indexes used as ids.
+        """
+        version = self.manifest.get("version", 1)
+        for entry in self.segments:
+            base_path = self._segment_path(entry["name"])
+            ids = np.arange(entry["start"], entry["start"] + entry["count"], dtype=np.int64)
+            if version == 1:
+                with open(base_path + ".pkl", "rb") as f:
+                    _, chunks = pickle.load(f)
+                vectors = np.load(base_path + ".npy")
+                write_segment_files(base_path, vectors, [text for text, _ in chunks],
+                                    [meta for _, meta in chunks], ids)
+                os.remove(base_path + ".pkl")
+                os.remove(base_path + ".npy")
+            else:
+                np.save(base_path + ".ids.npy", ids)
+            entry["min_id"] = entry["start"]
+
+        self.manifest["next_id"] = self.num_rows
+        self.manifest["deleted"] = []
+        if self.manifest.get("checkpoint"):
+            self.manifest["checkpoint"]["next_id"] = self.manifest["checkpoint"]["ntotal"]
+        self.manifest["version"] = MANIFEST_VERSION
+        self._write_manifest()
+        print(f"Upgraded {len(self.segments)} segments to manifest version {MANIFEST_VERSION}")
+
+    def _write_manifest(self) -> None:
+        """Atomically replace the manifest on disk."""
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _segment_path(self, name: str) -> str:
+        """Base path of a segment's files."""
+        return os.path.join(self.segments_dir, name)
+
+    def _write_segment(self, vectors: np.ndarray, texts: List[str],
+                       metadata: List[Dict[str, Any]], ids: np.ndarray) -> Dict[str, Any]:
+        """Write the files of a new segment without registering it.
+
+        Returns:
+            Manifest entry of the new segment (without its start row)
+        """
+        with self._lock:
+            name = f"seg_{self.manifest['next_segment']:06d}"
+            self.manifest["next_segment"] += 1
+
+        write_segment_files(self._segment_path(name), vectors, texts, metadata, ids)
+        return {"name": name, "count": len(texts), "min_id": int(ids[0]) if len(ids) else 0}
+
+    def _update_starts(self) -> None:
+        """Recompute the start row of every segment after segments changed size."""
+        start = 0
+        for entry in self.segments:
+            entry["start"] = start
+            start += entry["count"]
+
+    def allocate_ids(self, count: int) -> np.ndarray:
+        """Reserve vector ids for new chunks.
+
+        Ids are never reused; the counter is persisted with the next manifest write.
+
+        Args:
+            count: Number of ids
+
+        Returns:
+            Increasing int64 ids
+        """
+        with self._lock:
+            start = self.manifest["next_id"]
+            self.manifest["next_id"] = start + count
+        return np.arange(start, start + count, dtype=np.int64)
+
+    def append_segment(self, vectors: np.ndarray, chunks: List[Tuple[str, Dict[str, Any]]],
+                       ids: np.ndarray = None) -> Dict[str, Any]:
+        """Persist a batch of chunks as a new segment.
+
+        Args:
+            vectors: Vectors of the chunks, in row order
+            chunks: (text, metadata) tuples
+            ids: Vector ids from allocate_ids (allocated here if omitted)
+
+        Returns:
+            Manifest entry of the new segment
+        """
+        if ids is None:
+            ids = self.allocate_ids(len(chunks))
+        entry = self._write_segment(vectors, [text for text, _ in chunks], [meta for _, meta in chunks], ids)
+        with self._lock:
+            entry["start"] = self.num_rows
+            self.segments.append(entry)
+            self._write_manifest()
+            if self._doc_vector_ids is not None:
+                for (_, meta), vector_id in zip(chunks, ids):
+                    self._doc_vector_ids.setdefault(meta["doc_id"], []).append(int(vector_id))
+        return entry
+
+    def delete_ids(self, ids: np.ndarray) -> None:
+        """Mark chunks as deleted.
+
+        The rows stay in their segment files until the segment is merged.
+
+        Args:
+            ids: Vector ids of the chunks to delete
+        """
+        ids = {int(vector_id) for vector_id in ids} - self._deleted
+        if not ids:
+            return
+        with self._lock:
+            self._deleted |= ids
+            self.manifest["deleted"] = sorted(self._deleted)
+            self._write_manifest()
+            if self._doc_vector_ids is not None:
+                for doc_id in list(self._doc_vector_ids):
+                    remaining = [i for i in self._doc_vector_ids[doc_id] if i not in ids]
+                    if remaining:
+                        self._doc_vector_ids[doc_id] = remaining
+                    else:
+                        del self._doc_vector_ids[doc_id]
+
+    def is_deleted(self, vector_id: int) -> bool:
+        """Check whether a chunk has been deleted."""
+        return vector_id in self._deleted
+
+    def _live_mask(self, reader: SegmentReader) -> np.ndarray:
+        """Boolean mask of a segment's rows that are not deleted."""
+        if not self._deleted:
+            return np.ones(len(reader), dtype=bool)
+        return ~np.isin(reader.ids, self.deleted_ids)
+
+    def live_vectors(self, entries: List[Dict[str, Any]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectors and ids of the chunks that are not deleted.
+
+        Args:
+            entries: Segments to read (default: all)
+
+        Returns:
+            Tuple of (float32 vectors, int64 ids) in id order
+        """
+        vectors, ids = [], []
+        for entry in (self.segments if entries is None else entries):
+            reader = self.reader(entry)
+            mask = self._live_mask(reader)
+            vectors.append(np.asarray(reader.vectors)[mask])
+            ids.append(np.asarray(reader.ids)[mask])
+        if not ids:
+            return np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=np.int64)
+        return np.concatenate(vectors), np.concatenate(ids)
+
+    def reader(self, entry: Dict[str, Any]) -> SegmentReader:
+        """Get a (cached) memory-mapped reader for a segment.
+
+        Args:
+            entry: Manifest entry of the segment
+
+        Returns:
+            SegmentReader for the segment
+        """
+        reader = self._readers.get(entry["name"])
+        if reader is None:
+            reader = SegmentReader(self._segment_path(entry["name"]))
+            self._readers[entry["name"]] = reader
+        return reader
+
+    def live_texts(self, entries: List[Dict[str, Any]] = None) -> Tuple[np.ndarray, List[str]]:
+        """Ids and texts of the chunks that are not deleted.
+
+        Args:
+            entries: Segments to read (default: all)
+
+        Returns:
+            Tuple of (int64 ids, chunk texts) in id order
+        """
+        ids, texts = [], []
+        for entry in (self.segments if entries is None else entries):
+            reader = self.reader(entry)
+            rows = np.flatnonzero(self._live_mask(reader))
+            ids.append(np.asarray(reader.ids)[rows])
+            texts.extend(reader.text(row) for row in rows)
+        return (np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64)), texts
+
+    def live_ids(self) -> np.ndarray:
+        """Sorted ids of all chunks that are not deleted."""
+        ids = [np.asarray(self.reader(entry).ids) for entry in self.segments]
+        if not ids:
+            return np.zeros(0, dtype=np.int64)
+        return np.setdiff1d(np.concatenate(ids), self.deleted_ids)
+
+    def _document_map(self) -> Dict[str, List[int]]:
+        """Map of doc_id to the vector ids of its live chunks, in insertion order."""
+        with self._lock:
+            if self._doc_vector_ids is None:
+                doc_vector_ids = {}
+                for entry in self.segments:
+                    reader = self.reader(entry)
+                    ids = np.asarray(reader.ids)
+                    doc_ref = np.asarray(reader.doc_ref)
+                    for ref, doc_id in enumerate(reader.doc_ids):
+                        live = [int(i) for i in ids[doc_ref == ref] if int(i) not in self._deleted]
+                        if live:
+                            doc_vector_ids.setdefault(doc_id, []).extend(live)
+                self._doc_vector_ids = doc_vector_ids
+            return self._doc_vector_ids
+
+    def document_ids(self) -> List[str]:
+        """Distinct identifiers of documents with live chunks, in insertion order."""
+        return list(self._document_map())
+
+    def vector_ids(self, doc_id: str) -> np.ndarray:
+        """Vector ids of a document's live chunks.
+
+        Args:
+            doc_id: Document identifier
+
+        Returns:
+            int64 ids (empty if the document is unknown)
+        """
+        return np.asarray(self._document_map().get(doc_id, []), dtype=np.int64)
+
+    def lookup(self, vector_id: int) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Read a chunk by its vector id.
+
+        Args:
+            vector_id: Id of the chunk in the FAISS index
+
+        Returns:
+            (text, metadata) tuple, or None if the chunk is missing or deleted
+        """
+        if vector_id < 0 or vector_id in self._deleted:
+            return None
+        segments = list(self.segments)
+        position = bisect.bisect_right([entry["min_id"] for entry in segments], vector_id) - 1
+        if position < 0:
+            return None
+
+        reader = self.reader(segments[position])
+        row = int(np.searchsorted(reader.ids, vector_id))
+        if row >= len(reader) or reader.ids[row] != vector_id:
+            return None
+        return reader.text(row), reader.metadata(row)
+
+    @property
+    def checkpoint_next_id(self) -> int:
+        """Ids below this value are covered by the checkpointed index."""
+        checkpoint = self.manifest.get("checkpoint")
+        return checkpoint["next_id"] if checkpoint else 0
+
+    def write_checkpoint(self, index_bytes: np.ndarray, ntotal: int) -> str:
+        """Write a serialized FAISS index as a new checkpoint file.
+
+        The manifest is not updated; see replace_segments.
+
+        Args:
+            index_bytes: Output of faiss.serialize_index
+            ntotal: Number of rows covered by the index
+
+        Returns:
+            File name of the checkpoint
+        """
+        name = f"faiss_index.{ntotal}.{uuid.uuid4().hex[:8]}"
+        tmp_path = os.path.join(self.path, name + ".tmp")
+        index_bytes.tofile(tmp_path)
+        os.replace(tmp_path, os.path.join(self.path, name))
+        return name
+
+    def write_lexical_checkpoint(self, data: bytes) -> str:
+        """Write a serialized BM25 index to be referenced by the next checkpoint.
+
+        Args:
+            data: Output of BM25Index.serialize
+
+        Returns:
+            File name of the lexical checkpoint
+        """
+        name = f"bm25.{uuid.uuid4().hex[:8]}.pkl"
+        tmp_path = os.path.join(self.path, name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(self.path, name))
+        return name
+
+    def read_lexical_checkpoint(self) -> Optional[bytes]:
+        """Read the BM25 index stored with the current checkpoint, if any."""
+        checkpoint = self.manifest.get("checkpoint")
+        if not checkpoint or not checkpoint.get("lexical"):
+            return None
+        with open(os.path.join(self.path, checkpoint["lexical"]), "rb") as f:
+            return f.read()
+
+    def read_checkpoint(self, mmap: bool = True) -> Optional[faiss.Index]:
+        """Load the checkpointed FAISS index, if any.
+
+        Args:
+            mmap: Memory-map the index data instead of reading it (IVF indexes
+                opened this way are read-only)
+
+        Returns:
+            FAISS index covering ids below checkpoint["next_id"], or None
+        """
+        checkpoint = self.manifest.get("checkpoint")
+        if not checkpoint:
+            return None
+        path = os.path.join(self.path, checkpoint["file"])
+        if mmap:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP)
+        return faiss.read_index(path)
+
+    def _deleted_fraction(self, entry: Dict[str, Any]) -> float:
+        """Fraction of a segment's rows that are deleted."""
+        if not self._deleted or not entry["count"]:
+            return 0.0
+        return 1.0 - self._live_mask(self.reader(entry)).sum() / entry["count"]
+
+    def merge_candidates(self) -> List[Dict[str, Any]]:
+        """Pick a contiguous run of trailing segments worth merging.
+
+        Leading segments that are larger than everything after them are left
+        alone, so each row is rewritten a logarithmic number of times, unless
+        enough of their rows are deleted to be worth compacting.
+
+        Returns:
+            Manifest entries to merge (empty if there is nothing to do)
+        """
+        candidates = list(self.segments)
+        while len(candidates) > 1 and candidates[0]["count"] > sum(s["count"] for s in candidates[1:]) \
+                and self._deleted_fraction(candidates[0]) < COMPACTION_RATIO:
+            candidates = candidates[1:]
+        if len(candidates) == 1 and self._deleted_fraction(candidates[0]) > 0:
+            return candidates
+        return candidates if len(candidates) > 1 else []
+
+    def merge(self, entries: List[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], List[int]]:
+        """Concatenate contiguous segments into a new, unregistered segment.
+
+        Deleted rows are left out of the merged segment.
+
+        Args:
+            entries: Contiguous manifest entries to merge
+
+        Returns:
+            Tuple of (manifest entry of the merged segment or None if no rows
+            are left, ids of the deleted rows that were dropped)
+        """
+        vectors, ids, texts, metadata, purged = [], [], [], [], []
+        for entry in entries:
+            reader = SegmentReader(self._segment_path(entry["name"]))
+            mask = self._live_mask(reader)
+            rows = np.flatnonzero(mask)
+            vectors.append(np.asarray(reader.vectors)[mask])
+            ids.append(np.asarray(reader.ids)[mask])
+            purged.extend(int(i) for i in np.asarray(reader.ids)[~mask])
+            texts.extend(reader.text(row) for row in rows)
+            metadata.extend(reader.metadata(row) for row in rows)
+
+        if not texts:
+            return None, purged
+        merged = self._write_segment(np.concatenate(vectors), texts, metadata, np.concatenate(ids))
+        merged["start"] = entries[0]["start"]
+        return merged, purged
+
+    def replace_segments(self, entries: List[Dict[str, Any]], merged: Optional[Dict[str, Any]],
+                         checkpoint: Optional[Dict[str, Any]] = None, purged: List[int] = ()) -> None:
+        """Swap merged segments into the manifest and drop the old files.
+
+        Args:
+            entries: Segments that were merged
+            merged: Their replacement (None if all their rows were deleted)
+            checkpoint: Optional new checkpoint {"file", "ntotal", "next_id", "lexical"}
+            purged: Deleted ids that are no longer in any segment
+        """
+        with self._lock:
+            old_checkpoint = self.manifest.get("checkpoint")
+
+            if entries:
+                names = {entry["name"] for entry in entries}
+                position = next(i for i, s in enumerate(self.segments) if s["name"] in names)
+                remaining = [s for s in self.segments if s["name"] not in names]
+                if merged is not None:
+                    remaining.insert(position, merged)
+                self.manifest["segments"] = remaining
+                self._update_starts()
+            if purged:
+                self._deleted -= set(purged)
+                self.manifest["deleted"] = sorted(self._deleted)
+            if checkpoint is not None:
+                self.manifest["checkpoint"] = checkpoint
+            self._write_manifest()
+
+        if entries:
+            for entry in entries:
+                self._readers.pop(entry["name"], None)
+                for suffix in SEGMENT_FILES:
+                    self._remove(self._segment_path(entry["name"]) + suffix)
+        if checkpoint is not None and old_checkpoint:
+            for key in ("file", "lexical"):
+                if old_checkpoint.get(key) and old_checkpoint[key] != checkpoint.get(key):
+                    self._remove(os.path.join(self.path, old_checkpoint[key]))
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        """Delete a file, tolerating files that are missing or still mapped (Windows)."""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ChunkStore(Sequence):
+    """Read-only sequence of (text, metadata) chunks backed by a SegmentStore.
+
+    Chunks are looked up by row, or by vector id with get(), through the
+    segments' memory maps, so only the chunks that are actually accessed are
+    read from disk. Rows include deleted chunks until they are merged away.
+    """
+
+    def __init__(self, store: SegmentStore):
+        """Initialize the view.
+
+        Args:
+            store: SegmentStore whose segments hold the chunks
+        """
+        self.store = store
+
+    def __len__(self) -> int:
+        return self.store.num_rows
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+
+        segments = list(self.store.segments)
+        if row < 0:
+            row += sum(segment["count"] for segment in segments)
+        position = bisect.bisect_right([segment["start"] for segment in segments], row) - 1
+        if position < 0 or row >= segments[position]["start"] + segments[position]["count"]:
+            raise IndexError("chunk index out of range")
+
+        entry = segments[position]
+        reader = self.store.reader(entry)
+        local_row = row - entry["start"]
+        return reader.text(local_row), reader.metadata(local_row)
+
+    def get(self, vector_id: int) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Look up a live chunk by its vector id (None if missing or deleted)."""
+        return self.store.lookup(vector_id)
@@ -0,0 +1,60 @@
+"""Unit tests for the ReadWriteLock class."""
+import threading
+import time
+import unittest
+from rag.concurrency import ReadWriteLock
+
+class TestReadWriteLock(unittest.TestCase):
+    """Test cases for ReadWriteLock class."""
+    
+    def test_readers_share_the_lock(self):
+        """Test that several readers can hold the lock at once."""
+        lock = ReadWriteLock()
+        both_inside = threading.Barrier(2, timeout=2)
+        
+        def reader():
+            with lock.read_lock():
+                both_inside.wait()
+        
+        threads = [threading.Thread(target=reader) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertFalse(both_inside.broken)
+    
+    def test_writer_excludes_readers(self):
+        """Test that a reader waits for an active writer."""
+        lock = ReadWriteLock()
+        events = []
+        
+        lock.acquire_write()
+        reader = threading.Thread(target=lambda: (lock.acquire_read(), events.append("read"), lock.release_read()))
+        reader.start()
+        time.sleep(0.05)
+        events.append("write done")
+        lock.release_write()
+        reader.join()
+        
+        self.assertEqual(events, ["write done", "read"])
+    
+    def test_waiting_writer_blocks_new_readers(self):
+        """Test that a queued writer goes before readers that arrive after it."""
+        lock = ReadWriteLock()
+        events = []
+        
+        lock.acquire_read()
+        writer = threading.Thread(target=lambda: (lock.acquire_write(), events.append("write"), lock.release_write()))
+        writer.start()
+        time.sleep(0.05)
+        reader = threading.Thread(target=lambda: (lock.acquire_read(), events.append("read"), lock.release_read()))
+        reader.start()
+        time.sleep(0.05)
+        lock.release_read()
+        writer.join()
+        reader.join()
+        
+        self.assertEqual(events, ["write", "read"])
+
+if __name__ == '__main__':
+    unittest.main()
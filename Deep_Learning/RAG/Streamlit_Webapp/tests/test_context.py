@@ -0,0 +1,78 @@
+"""Unit tests for context packing."""
+import unittest
+from unittest.mock import MagicMock
+from rag.context import ContextPacker, overlap_length, remove_overlaps
+
+def make_tokenizer():
+    """Tokenizer mock with one token id per word and an end-of-sequence id of 1."""
+    tokenizer = MagicMock()
+    tokenizer.side_effect = lambda texts, add_special_tokens=True: {
+        "input_ids": [[len(word) + 2 for word in text.split()] for text in texts]
+    }
+    tokenizer.num_special_tokens_to_add.return_value = 1
+    tokenizer.build_inputs_with_special_tokens.side_effect = lambda ids: ids + [1]
+    return tokenizer
+
+class TestContextPacking(unittest.TestCase):
+    """Test cases for overlap removal and ContextPacker."""
+    
+    def test_overlap_length(self):
+        """Test that the longest suffix/prefix overlap is found."""
+        self.assertEqual(overlap_length("alpha beta gamma delta", "gamma delta epsilon", 50), 11)
+        self.assertEqual(overlap_length("alpha beta", "gamma delta", 50), 0)
+        # Overlaps shorter than MIN_OVERLAP_CHARS are coincidences
+        self.assertEqual(overlap_length("the cat", "cat sat", 50), 0)
+    
+    def test_remove_overlaps(self):
+        """Test that spans shared with better-ranked neighbouring chunks are removed."""
+        docs = [
+            {"text": "shared words here and more text", "metadata": {"doc_id": "a", "chunk_id": 1}},
+            {"text": "first chunk ends with shared words here", "metadata": {"doc_id": "a", "chunk_id": 0}},
+            {"text": "first chunk ends with shared words here", "metadata": {"doc_id": "b", "chunk_id": 0}},
+            {"text": "and more text from another document", "metadata": {"doc_id": "c", "chunk_id": 2}},
+        ]
+        
+        texts, removed = remove_overlaps(docs, 50)
+        
+        self.assertEqual(texts[0], docs[0]["text"])
+        self.assertEqual(texts[1], "first chunk ends with")
+        # Exact duplicates are emptied, chunks of other documents are kept
+        self.assertEqual(texts[2], "")
+        self.assertEqual(texts[3], docs[3]["text"])
+        self.assertEqual(removed, len(" shared words here") + len(docs[2]["text"]))
+    
+    def test_pack_fills_budget_in_rank_order(self):
+        """Test that chunks are packed best first and the crossing chunk is truncated."""
+        packer = ContextPacker(make_tokenizer(), max_input_tokens=60, max_overlap_chars=50)
+        docs = [
+            {"text": " ".join(["one"] * 20), "metadata": {"doc_id": "a", "chunk_id": 0}},
+            {"text": " ".join(["two"] * 40), "metadata": {"doc_id": "b", "chunk_id": 0}},
+            {"text": " ".join(["three"] * 10), "metadata": {"doc_id": "c", "chunk_id": 0}},
+        ]
+        
+        input_ids, stats = packer.pack("Question here", "Answer:", docs)
+        
+        self.assertEqual(len(input_ids), 60)
+        self.assertEqual(stats["budget_tokens"], 56)
+        # 2 header tokens per chunk: 20 tokens of the first chunk, 32 of the second
+        self.assertEqual(stats["packed_tokens"], 52)
+        self.assertEqual(stats["packed_chunks"], 2)
+        self.assertEqual(stats["dropped_tokens"], 18)
+        self.assertEqual(stats["dropped_chunks"], 1)
+    
+    def test_pack_drops_short_remainders(self):
+        """Test that a chunk which would keep only a few tokens is dropped."""
+        packer = ContextPacker(make_tokenizer(), max_input_tokens=30, max_overlap_chars=50)
+        docs = [
+            {"text": " ".join(["one"] * 20), "metadata": {"doc_id": "a", "chunk_id": 0}},
+            {"text": " ".join(["two"] * 30), "metadata": {"doc_id": "b", "chunk_id": 0}},
+        ]
+        
+        input_ids, stats = packer.pack("Question", "Answer:", docs)
+        
+        self.assertEqual(stats["packed_chunks"], 1)
+        self.assertEqual(stats["dropped_tokens"], 30)
+        self.assertLessEqual(len(input_ids), 30)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""Unit tests for the EmbeddingCache class."""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from rag.embedding_cache import EmbeddingCache, cache_key
+
+class TestEmbeddingCache(unittest.TestCase):
+    """Test cases for EmbeddingCache class."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "cache.db")
+        self.cache = EmbeddingCache(self.path, max_entries=2)
+    
+    def tearDown(self):
+        """Tear down test fixtures."""
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_cache_key(self):
+        """Test that keys depend on normalized text and model name."""
+        self.assertEqual(cache_key("a  b\n", "model"), cache_key("a b", "model"))
+        self.assertNotEqual(cache_key("a b", "model"), cache_key("a b", "other-model"))
+    
+    def test_put_and_get(self):
+        """Test round-tripping vectors and counting hits and misses."""
+        vector = np.arange(4, dtype=np.float32)
+        self.cache.put_many({"k1": vector})
+        
+        found = self.cache.get_many(["k1", "k2"])
+        np.testing.assert_array_equal(found["k1"], vector)
+        self.assertNotIn("k2", found)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+    
+    def test_persistence(self):
+        """Test that cached vectors survive reopening the database."""
+        self.cache.put_many({"k1": np.ones(3, dtype=np.float32)})
+        self.cache.close()
+        
+        self.cache = EmbeddingCache(self.path, max_entries=2)
+        self.assertIn("k1", self.cache.get_many(["k1"]))
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted over the size bound."""
+        self.cache.put_many({"k1": np.ones(3)})
+        self.cache.put_many({"k2": np.ones(3)})
+        self.cache.get_many(["k1"])
+        self.cache.put_many({"k3": np.ones(3)})
+        
+        found = self.cache.get_many(["k1", "k2", "k3"])
+        self.assertEqual(set(found), {"k1", "k3"})
+        self.assertEqual(self.cache.stats()["entries"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,8 @@
 import unittest
 import torch
 import os
+import shutil
+import tempfile
 from unittest.mock import patch, MagicMock
 from rag.embeddings import DocumentEmbedder
 
@@ -29,8 +31,15 @@ class TestDocumentEmbedder(unittest.TestCase):
             
         self.mock_model.encode.side_effect = mock_encode
         
-        # Initialize the embedder with a test model name
-        self.embedder = DocumentEmbedder(model_name="test-model")
+        # Initialize the embedder with a test model name and a throwaway cache
+        self.temp_dir = tempfile.mkdtemp()
+        self.embedder = DocumentEmbedder(model_name="test-model",
+                                         cache_path=os.path.join(self.temp_dir, "cache.db"))
+    
+    def tearDown(self):
+        """Tear down test fixtures."""
+        self.embedder.cache.close()
+        shutil.rmtree(self.temp_dir)
     
     def test_initialization(self):
         """Test proper initialization of DocumentEmbedder."""
@@ -48,6 +57,22 @@ class TestDocumentEmbedder(unittest.TestCase):
         self.assertIsInstance(embeddings, torch.Tensor)
         self.assertEqual(embeddings.shape[0], len(documents))
     
+    def test_embed_documents_uses_cache(self):
+        """Test that previously embedded chunks are not encoded again."""
+        first = self.embedder.embed_documents(["Chunk one.", "Chunk two."])
+        self.mock_model.encode.reset_mock()
+        
+        # Whitespace-only differences share a cache entry; duplicates are encoded once
+        second = self.embedder.embed_documents(["Chunk  one.\n", "Chunk three.", "Chunk three."])
+        
+        self.mock_model.encode.assert_called_once_with(["Chunk three."], convert_to_tensor=True)
+        self.assertTrue(torch.equal(second[0], first[0]))
+        self.assertTrue(torch.equal(second[1], second[2]))
+        
+        stats = self.embedder.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 4)
+    
     def test_embed_query(self):
         """Test query embedding functionality."""
         query = "Test query"
@@ -59,6 +84,44 @@ class TestDocumentEmbedder(unittest.TestCase):
         # Check that embedding is a tensor
         self.assertIsInstance(embedding, torch.Tensor)
     
+    def test_embed_queries(self):
+        """Test batched query embedding functionality."""
+        queries = ["First query", "Second query"]
+        embeddings = self.embedder.embed_queries(queries)
+        
+        # All queries should be encoded in a single call
+        self.mock_model.encode.assert_called_once_with(queries, convert_to_tensor=True)
+        self.assertEqual(embeddings.shape[0], len(queries))
+    
+    @patch('rag.embeddings.torch.ao.quantization.quantize_dynamic')
+    @patch('rag.embeddings.SentenceTransformer')
+    def test_int8_backend(self, mock_sentence_transformer, mock_quantize):
+        """Test that the int8 backend quantizes the model and keys its own cache entries."""
+        embedder = DocumentEmbedder(model_name="test-model", backend="pytorch_int8",
+                                    cache_path=os.path.join(self.temp_dir, "cache.db"))
+        try:
+            args, kwargs = mock_quantize.call_args
+            self.assertIs(args[0], mock_sentence_transformer.return_value)
+            self.assertEqual(kwargs["dtype"], torch.qint8)
+            self.assertIs(embedder.model, mock_quantize.return_value)
+            self.assertNotEqual(embedder.cache_namespace, self.embedder.cache_namespace)
+        finally:
+            embedder.cache.close()
+    
+    @patch('rag.embeddings.SentenceTransformer')
+    def test_onnx_backend(self, mock_sentence_transformer):
+        """Test that the ONNX backend is requested from sentence-transformers."""
+        embedder = DocumentEmbedder(model_name="test-model", backend="onnx",
+                                    cache_path=os.path.join(self.temp_dir, "cache.db"))
+        embedder.cache.close()
+        
+        mock_sentence_transformer.assert_called_once_with("test-model", backend="onnx")
+    
+    def test_unknown_backend(self):
+        """Test that an unsupported backend is rejected."""
+        with self.assertRaises(ValueError):
+            DocumentEmbedder(model_name="test-model", backend="tensorrt")
+    
     @patch('rag.embeddings.SentenceTransformer')
     def test_model_load_error(self, mock_sentence_transformer):
         """Test handling of model loading errors."""
@@ -75,6 +138,8 @@ class TestDocumentEmbedder(unittest.TestCase):
             with patch('rag.embeddings.config') as mock_config:
                 # Set the mock config to have a token
                 mock_config.huggingface_token = "test-token"
+                mock_config.embedding_cache_size = 0
+                mock_config.embedding_backend = "pytorch"
                 
                 # Create a new embedder which should set the environment variable
                 with patch('rag.embeddings.SentenceTransformer'):
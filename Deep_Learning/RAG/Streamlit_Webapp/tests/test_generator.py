@@ -1,7 +1,9 @@
 """Unit tests for the TextGenerator class."""
+import os
 import unittest
 from unittest.mock import patch, MagicMock
 import torch
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
 from rag.generator import TextGenerator
 
 class TestTextGenerator(unittest.TestCase):
@@ -18,12 +20,17 @@ class TestTextGenerator(unittest.TestCase):
         mock_tokenizer_class.from_pretrained.return_value = self.mock_tokenizer
         mock_model_class.from_pretrained.return_value = self.mock_model
         
-        # Configure tokenizer behavior
-        self.mock_tokenizer.return_value = {"input_ids": torch.tensor([[0, 1, 2, 3]])}
+        # Configure tokenizer behavior: one token id per word, with an end-of-sequence id of 1
+        self.mock_tokenizer.side_effect = lambda texts, add_special_tokens=True: {
+            "input_ids": [[len(word) + 2 for word in text.split()] for text in texts]
+        }
+        self.mock_tokenizer.num_special_tokens_to_add.return_value = 1
+        self.mock_tokenizer.build_inputs_with_special_tokens.side_effect = lambda ids: ids + [1]
         self.mock_tokenizer.decode.return_value = "This is a generated response."
+        self.mock_tokenizer.pad_token_id = 0
         
-        # Configure model behavior
-        self.mock_model.generate.return_value = torch.tensor([[10, 11, 12, 13]])
+        # Configure model behavior: decoder start (pad) token followed by four generated tokens
+        self.mock_model.generate.return_value = torch.tensor([[0, 10, 11, 12, 13]])
         
         # Initialize the generator
         self.generator = TextGenerator(model_name="test-model")
@@ -34,20 +41,34 @@ class TestTextGenerator(unittest.TestCase):
         self.assertIsNotNone(self.generator.tokenizer)
         self.assertIsNotNone(self.generator.model)
     
-    def test_prepare_context(self):
-        """Test context preparation from retrieved documents."""
+    def test_prepare_inputs(self):
+        """Test that retrieved chunks are packed into the prompt ids."""
         context_docs = [
             {"text": "This is document 1.", "metadata": {"doc_id": "doc1"}},
             {"text": "This is document 2.", "metadata": {"doc_id": "doc2"}}
         ]
         
-        context = self.generator._prepare_context(context_docs)
+        input_ids, stats = self.generator._prepare_inputs("Question?", context_docs)
         
-        # Check that context contains both documents
-        self.assertIn("Document 1:", context)
-        self.assertIn("This is document 1.", context)
-        self.assertIn("Document 2:", context)
-        self.assertIn("This is document 2.", context)
+        self.assertEqual(input_ids.shape[0], 1)
+        self.assertEqual(input_ids[0, -1].item(), 1)
+        self.assertEqual(stats["packed_chunks"], 2)
+        self.assertEqual(stats["packed_tokens"], 8)
+        self.assertEqual(stats["dropped_tokens"], 0)
+    
+    def test_prepare_inputs_respects_budget(self):
+        """Test that the prompt never exceeds the input budget."""
+        self.generator.packer.max_input_tokens = 40
+        context_docs = [
+            {"text": " ".join([f"word{i}"] * 30), "metadata": {"doc_id": f"doc{i}", "chunk_id": 0}}
+            for i in range(3)
+        ]
+        
+        input_ids, stats = self.generator._prepare_inputs("Question?", context_docs)
+        
+        self.assertLessEqual(input_ids.shape[1], 40)
+        self.assertEqual(stats["packed_tokens"] + stats["dropped_tokens"], 90)
+        self.assertEqual(stats["dropped_chunks"], 2)
     
     def test_generate(self):
         """Test text generation functionality."""
@@ -59,7 +80,9 @@ class TestTextGenerator(unittest.TestCase):
         ]
         
         # Generate response
-        response = self.generator.generate(query, context_docs)
+        context_stats = {}
+        timings = {}
+        response = self.generator.generate(query, context_docs, context_stats=context_stats, timings=timings)
         
         # Check that tokenizer and model were called
         self.mock_tokenizer.assert_called()
@@ -67,6 +90,70 @@ class TestTextGenerator(unittest.TestCase):
         
         # Check that the response is correct
         self.assertEqual(response, "This is a generated response.")
+        self.assertEqual(context_stats["packed_chunks"], 2)
+        self.assertEqual(context_stats["prompt_tokens"], self.mock_model.generate.call_args.args[0].shape[1])
+        self.assertEqual(context_stats["output_tokens"], 4)
+        self.assertEqual(set(timings), {"prompt", "generate"})
+    
+    @patch('rag.generator.TextIteratorStreamer')
+    def test_generate_stream(self, mock_streamer_class):
+        """Test that streamed text is yielded piece by piece."""
+        mock_streamer_class.return_value.__iter__.return_value = iter(["Paris", "", " is the capital."])
+        context_docs = [{"text": "Paris is the capital of France.", "metadata": {"doc_id": "doc1"}}]
+        
+        context_stats = {}
+        timings = {}
+        pieces = list(self.generator.generate_stream("What is the capital of France?", context_docs,
+                                                     context_stats=context_stats, timings=timings))
+        
+        self.assertEqual(pieces, ["Paris", " is the capital."])
+        self.assertEqual(context_stats["output_tokens"], 4)
+        self.assertEqual(set(timings), {"prompt", "generate"})
+        kwargs = self.mock_model.generate.call_args.kwargs
+        self.assertIs(kwargs["streamer"], mock_streamer_class.return_value)
+        self.assertNotIn("num_beams", kwargs)
+    
+    @patch('rag.generator.TextIteratorStreamer')
+    def test_generate_stream_error(self, mock_streamer_class):
+        """Test that generation errors on the background thread are raised."""
+        mock_streamer_class.return_value.__iter__.return_value = iter([])
+        self.mock_model.generate.side_effect = Exception("Test exception")
+        
+        with self.assertRaises(RuntimeError):
+            list(self.generator.generate_stream("Question?", [{"text": "Context."}]))
+        mock_streamer_class.return_value.end.assert_called_once()
+    
+    @patch('rag.generator.torch.ao.quantization.quantize_dynamic')
+    @patch('rag.generator.AutoTokenizer')
+    @patch('rag.generator.AutoModelForSeq2SeqLM')
+    def test_int8_backend(self, mock_model_class, mock_tokenizer_class, mock_quantize):
+        """Test that the int8 backend dynamically quantizes the Linear layers."""
+        generator = TextGenerator(model_name="test-model", backend="pytorch_int8")
+        
+        mock_quantize.assert_called_once()
+        args, kwargs = mock_quantize.call_args
+        self.assertIs(args[0], mock_model_class.from_pretrained.return_value)
+        self.assertEqual(args[1], {torch.nn.Linear})
+        self.assertEqual(kwargs["dtype"], torch.qint8)
+        self.assertIs(generator.model, mock_quantize.return_value)
+    
+    @patch('rag.generator.AutoTokenizer')
+    @patch('rag.generator.AutoModelForSeq2SeqLM')
+    def test_onnx_backend(self, mock_model_class, mock_tokenizer_class):
+        """Test that the ONNX backend exports the model through optimum."""
+        mock_ort = MagicMock()
+        with patch.dict('sys.modules', {'optimum': MagicMock(), 'optimum.onnxruntime': mock_ort}):
+            generator = TextGenerator(model_name="test-model", backend="onnx")
+        
+        mock_ort.ORTModelForSeq2SeqLM.from_pretrained.assert_called_once_with(
+            "test-model", export=True, use_cache=True)
+        mock_model_class.from_pretrained.assert_not_called()
+        self.assertIs(generator.model, mock_ort.ORTModelForSeq2SeqLM.from_pretrained.return_value)
+    
+    def test_unknown_backend(self):
+        """Test that an unsupported backend is rejected."""
+        with self.assertRaises(ValueError):
+            TextGenerator(model_name="test-model", backend="tensorrt")
     
     @patch('rag.generator.AutoTokenizer')
     @patch('rag.generator.AutoModelForSeq2SeqLM')
@@ -79,5 +166,43 @@ class TestTextGenerator(unittest.TestCase):
         with self.assertRaises(RuntimeError):
             TextGenerator(model_name="error-model")
 
+
+class TestBackendParity(unittest.TestCase):
+    """Output parity of the quantized backends on a real model.
+    
+    Runs only when the model (PARITY_TEST_MODEL, default google/flan-t5-small)
+    is already in the local HuggingFace cache.
+    """
+    
+    model_name = os.getenv("PARITY_TEST_MODEL") or "google/flan-t5-small"
+    
+    @classmethod
+    def setUpClass(cls):
+        """Skip unless the model can be loaded without downloading it."""
+        try:
+            AutoTokenizer.from_pretrained(cls.model_name, local_files_only=True)
+            AutoModelForSeq2SeqLM.from_pretrained(cls.model_name, local_files_only=True)
+        except Exception:
+            raise unittest.SkipTest(f"{cls.model_name} is not in the local model cache")
+    
+    def _check_parity(self, backend):
+        """Assert that a backend reproduces enough of the fp32 answers."""
+        from benchmarks.generator_backends import DEFAULT_MIN_PARITY, parity, run_backend
+        reference, _ = run_backend("pytorch", self.model_name, max_length=32, repeats=1)
+        answers, _ = run_backend(backend, self.model_name, max_length=32, repeats=1)
+        self.assertGreaterEqual(parity(answers, reference), DEFAULT_MIN_PARITY)
+    
+    def test_int8_matches_fp32(self):
+        """Test that dynamic int8 quantization keeps the fp32 answers."""
+        self._check_parity("pytorch_int8")
+    
+    def test_onnx_matches_fp32(self):
+        """Test that the ONNX Runtime export keeps the fp32 answers."""
+        try:
+            import optimum.onnxruntime  # noqa: F401
+        except ImportError:
+            self.skipTest("optimum[onnxruntime] is not installed")
+        self._check_parity("onnx")
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
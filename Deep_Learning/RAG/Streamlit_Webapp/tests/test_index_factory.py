@@ -0,0 +1,97 @@
+"""Unit tests for the FAISS index factory helpers."""
+import unittest
+import numpy as np
+import faiss
+from rag.index_factory import (
+    create_index, apply_search_params, train_index, min_training_points,
+    index_type_of, index_precision_of, recall_at_k, recall_report, validate_index_type,
+    validate_precision
+)
+
+class TestIndexFactory(unittest.TestCase):
+    """Test cases for index construction and recall measurement."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        rng = np.random.default_rng(0)
+        self.vectors = rng.random((500, 32), dtype=np.float32)
+        self.queries = rng.random((10, 32), dtype=np.float32)
+    
+    def test_create_each_index_type(self):
+        """Test that every supported type produces the matching index."""
+        for index_type in ("flat", "ivf_flat", "ivf_pq", "hnsw"):
+            index = create_index(index_type, 32, nlist=4, pq_m=8, pq_nbits=4)
+            self.assertEqual(index_type_of(index), index_type)
+    
+    def test_invalid_index_type(self):
+        """Test that unknown index types are rejected."""
+        with self.assertRaises(ValueError):
+            validate_index_type("annoy")
+        with self.assertRaises(ValueError):
+            create_index("ivf_pq", 30, pq_m=8)
+    
+    def test_min_training_points(self):
+        """Test the training data requirements per index type."""
+        self.assertEqual(min_training_points("flat"), 0)
+        self.assertEqual(min_training_points("hnsw"), 0)
+        self.assertEqual(min_training_points("ivf_flat", nlist=10), 390)
+        self.assertEqual(min_training_points("ivf_pq", nlist=10, pq_nbits=8), 256 * 39)
+    
+    def test_reduced_precision_indexes(self):
+        """Test that float16 and sq8 precisions use scalar quantizers on each index type."""
+        for precision in ("float16", "sq8"):
+            for index_type in ("flat", "ivf_flat", "hnsw"):
+                index = create_index(index_type, 32, nlist=4, hnsw_m=8, precision=precision)
+                self.assertEqual(index_type_of(index), index_type)
+                self.assertEqual(index_precision_of(index), precision)
+        
+        self.assertEqual(min_training_points("flat", precision="sq8"), 1000)
+        self.assertEqual(min_training_points("flat", precision="float16"), 0)
+        with self.assertRaises(ValueError):
+            validate_precision("int4")
+    
+    def test_recall_of_float16_index(self):
+        """Test that float16 storage keeps recall close to exact search."""
+        index = create_index("flat", 32, precision="float16")
+        index.add(self.vectors)
+        self.assertGreaterEqual(recall_at_k(index, self.vectors, self.queries, 5), 0.95)
+    
+    def test_apply_search_params(self):
+        """Test that nprobe and efSearch are set on the right index types."""
+        ivf = create_index("ivf_flat", 32, nlist=4)
+        apply_search_params(ivf, nprobe=3, ef_search=10)
+        self.assertEqual(ivf.nprobe, 3)
+        
+        hnsw = create_index("hnsw", 32, hnsw_m=8)
+        apply_search_params(hnsw, nprobe=3, ef_search=10)
+        self.assertEqual(hnsw.hnsw.efSearch, 10)
+    
+    def test_recall_of_flat_index_is_exact(self):
+        """Test that a flat index has perfect recall."""
+        index = faiss.IndexFlatL2(32)
+        index.add(self.vectors)
+        self.assertEqual(recall_at_k(index, self.vectors, self.queries, 5), 1.0)
+    
+    def test_recall_of_ivf_with_all_cells_is_exact(self):
+        """Test that probing every IVF cell recovers the exact neighbours."""
+        index = create_index("ivf_flat", 32, nlist=4)
+        train_index(index, self.vectors)
+        index.add(self.vectors)
+        apply_search_params(index, nprobe=4)
+        self.assertEqual(recall_at_k(index, self.vectors, self.queries, 5), 1.0)
+    
+    def test_recall_report(self):
+        """Test that the report contains one row per index type."""
+        rows = recall_report(self.vectors, self.queries, 5, index_types=("flat", "hnsw"), hnsw_m=8)
+        self.assertEqual([row["index_type"] for row in rows], ["flat", "hnsw"])
+        self.assertEqual(rows[0]["recall@5"], 1.0)
+    
+    def test_recall_report_precision(self):
+        """Test that reduced precision shrinks the reported index size."""
+        full = recall_report(self.vectors, self.queries, 5, index_types=("flat",))[0]
+        sq8 = recall_report(self.vectors, self.queries, 5, index_types=("flat",), precision="sq8")[0]
+        self.assertEqual(sq8["precision"], "sq8")
+        self.assertLess(sq8["index_mb"], full["index_mb"] / 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+"""Unit tests for the IngestPipeline class."""
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import Future
+from unittest.mock import patch, MagicMock
+from rag.ingest import IngestPipeline, extract_and_split
+
+class InlineExecutor:
+    """Runs tasks in the calling process, so patched task functions apply."""
+    
+    def __init__(self, max_workers=None):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+    
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+class TestIngestPipeline(unittest.TestCase):
+    """Test cases for IngestPipeline class."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.sink = MagicMock()
+        
+        self.config_patcher = patch('rag.ingest.config')
+        self.mock_config = self.config_patcher.start()
+        self.mock_config.chunk_size = 40
+        self.mock_config.chunk_overlap = 0
+        self.mock_config.ingest_workers = 2
+        self.mock_config.ingest_pages_per_task = 8
+        self.mock_config.ingest_batch_size = 3
+    
+    def tearDown(self):
+        """Tear down test fixtures."""
+        self.config_patcher.stop()
+        shutil.rmtree(self.temp_dir)
+    
+    def _write(self, name, text):
+        """Write a test file and return its path."""
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+    
+    def test_extract_and_split(self):
+        """Test that a worker task returns its page count and chunks."""
+        path = self._write("a.txt", "word " * 30)
+        num_pages, chunks = extract_and_split(path, 0, 1, 40, 0)
+        
+        self.assertEqual(num_pages, 1)
+        self.assertGreater(len(chunks), 1)
+    
+    def test_run_streams_chunks_in_batches(self):
+        """Test that chunks are added in batches with per-document chunk ids."""
+        paths = [self._write("a.txt", "alpha " * 30), self._write("b.txt", "beta " * 30)]
+        stats = IngestPipeline(self.sink).run(paths, ["a.txt", "b.txt"])
+        
+        chunks, metadata = [], []
+        for call in self.sink.add_chunks.call_args_list:
+            chunks.extend(call[0][0])
+            metadata.extend(call[0][1])
+        
+        self.assertEqual(stats["documents"], 2)
+        self.assertEqual(stats["pages"], 2)
+        self.assertEqual(stats["chunks"], len(chunks))
+        self.assertGreater(self.sink.add_chunks.call_count, 1)
+        for doc_id in ("a.txt", "b.txt"):
+            chunk_ids = [m["chunk_id"] for m in metadata if m["doc_id"] == doc_id]
+            self.assertEqual(chunk_ids, list(range(len(chunk_ids))))
+    
+    def test_reingest_replaces_existing_documents(self):
+        """Test that each document replaces its stored version in the write that adds it."""
+        paths = [self._write("a.txt", "alpha " * 30), self._write("b.csv", "x,y")]
+        IngestPipeline(self.sink).run(paths, ["a.txt", "b.csv"])
+        
+        self.sink.add_chunks.assert_called_once()
+        chunks, metadata = self.sink.add_chunks.call_args[0]
+        self.assertEqual(self.sink.add_chunks.call_args[1]["replace_doc_ids"], ["a.txt"])
+        self.assertEqual({m["doc_id"] for m in metadata}, {"a.txt"})
+        self.sink.remove_document.assert_not_called()
+        
+        self.sink.reset_mock()
+        IngestPipeline(self.sink, replace_existing=False).run(paths[:1], ["a.txt"])
+        self.assertEqual(self.sink.add_chunks.call_args[1]["replace_doc_ids"], [])
+    
+    def test_failed_reupload_keeps_stored_version(self):
+        """Test that a document failing partway is not indexed, so its stored version stays."""
+        paths = [self._write("a.txt", "alpha"), self._write("b.txt", "beta")]
+        results = {(paths[0], 0): (1, ["new alpha 1"]), (paths[0], 1): RuntimeError("bad page"),
+                   (paths[1], 0): (1, ["new beta"]), (paths[1], 1): (1, ["more beta"])}
+        
+        def extract(path, start, end, chunk_size, chunk_overlap):
+            result = results[(path, start)]
+            if isinstance(result, Exception):
+                raise result
+            return result
+        
+        with patch('rag.ingest.ProcessPoolExecutor', InlineExecutor), \
+                patch('rag.ingest.extract_and_split', side_effect=extract), \
+                patch('rag.ingest.as_completed', side_effect=list), \
+                patch('rag.ingest.count_pages', return_value=2):
+            stats = IngestPipeline(self.sink, pages_per_task=1).run(paths, ["a.txt", "b.txt"])
+        
+        self.assertEqual(stats["documents"], 1)
+        self.assertIn("a.txt", stats["errors"][0])
+        self.sink.add_chunks.assert_called_once()
+        chunks, metadata = self.sink.add_chunks.call_args[0]
+        self.assertEqual(chunks, ["new beta", "more beta"])
+        self.assertEqual(self.sink.add_chunks.call_args[1]["replace_doc_ids"], ["b.txt"])
+        self.sink.remove_document.assert_not_called()
+    
+    def test_duplicate_names_in_one_upload(self):
+        """Test that a second file with the same document id is skipped, not merged or swapped in."""
+        os.makedirs(os.path.join(self.temp_dir, "other"))
+        paths = [self._write("a.txt", "first " * 30), self._write(os.path.join("other", "a.txt"), "second")]
+        stats = IngestPipeline(self.sink).run(paths)
+        
+        self.assertEqual(stats["documents"], 1)
+        self.assertEqual(len(stats["errors"]), 1)
+        self.assertIn("a.txt", stats["errors"][0])
+        chunks, metadata = self.sink.add_chunks.call_args[0]
+        self.assertTrue(all("first" in chunk for chunk in chunks))
+        self.assertEqual({m["doc_index"] for m in metadata}, {0})
+    
+    def test_unsupported_file(self):
+        """Test that unsupported files are reported and skipped."""
+        progress = MagicMock()
+        paths = [self._write("a.csv", "x,y"), self._write("b.txt", "beta")]
+        stats = IngestPipeline(self.sink).run(paths, progress_callback=progress)
+        
+        self.assertEqual(stats["documents"], 1)
+        self.assertEqual(len(stats["errors"]), 1)
+        self.assertIn("a.csv", stats["errors"][0])
+        self.assertEqual(self.sink.add_chunks.call_args[0][1][0]["doc_id"], "b.txt")
+        progress.assert_called()
+
+if __name__ == '__main__':
+    unittest.main()
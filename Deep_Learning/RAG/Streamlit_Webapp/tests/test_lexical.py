@@ -0,0 +1,53 @@
+"""Unit tests for the BM25 index and rank fusion."""
+import unittest
+from rag.lexical import BM25Index, tokenize, reciprocal_rank_fusion
+
+class TestBM25Index(unittest.TestCase):
+    """Test cases for BM25Index."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.index = BM25Index()
+        self.index.add([0, 1, 2], [
+            "Harry Potter went to Hogwarts.",
+            "Hermione Granger reads books in the library.",
+            "An owl delivers letters to Harry."
+        ])
+    
+    def test_tokenize(self):
+        """Test that tokens are lowercased words without stopwords."""
+        self.assertEqual(tokenize("Where is the Philosopher's Stone?"), ["philosopher", "stone"])
+    
+    def test_search_ranks_matching_chunks(self):
+        """Test that chunks sharing rarer query terms rank first."""
+        scores, ids = self.index.search("Harry and the owl", 3)
+        
+        self.assertEqual(ids.tolist(), [2, 0])
+        self.assertGreater(scores[0], scores[1])
+        self.assertEqual(len(self.index.search("quidditch", 3)[1]), 0)
+    
+    def test_remove_and_compact(self):
+        """Test that removed chunks are no longer returned, before and after compaction."""
+        self.index.remove([2])
+        self.assertEqual(self.index.search("owl", 3)[1].tolist(), [])
+        self.assertEqual(self.index.search("harry", 3)[1].tolist(), [0])
+        self.assertEqual(len(self.index), 2)
+        
+        self.index.compact()
+        self.assertEqual(self.index.search("harry", 3)[1].tolist(), [0])
+    
+    def test_serialize_round_trip(self):
+        """Test that a deserialized index returns the same results."""
+        self.index.remove([1])
+        restored = BM25Index.deserialize(self.index.serialize())
+        
+        self.assertEqual(restored.ids().tolist(), [0, 2])
+        self.assertEqual(restored.search("harry owl", 3)[1].tolist(), self.index.search("harry owl", 3)[1].tolist())
+    
+    def test_reciprocal_rank_fusion(self):
+        """Test that ids ranked well by both rankers come first."""
+        fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1]], k=60)
+        self.assertEqual([vector_id for vector_id, _ in fused], [1, 3, 2])
+
+if __name__ == '__main__':
+    unittest.main()
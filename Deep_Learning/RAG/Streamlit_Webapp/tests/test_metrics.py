@@ -0,0 +1,98 @@
+"""Unit tests for the query metrics."""
+import json
+import os
+import tempfile
+import unittest
+import urllib.request
+from rag.metrics import MetricsRegistry, serve_metrics, timed
+
+class TestTimed(unittest.TestCase):
+    """Test cases for the stage timer."""
+    
+    def test_accumulates_per_stage(self):
+        """Test that repeated stages add up and None disables timing."""
+        timings = {}
+        with timed(timings, "search"):
+            pass
+        first = timings["search"]
+        with timed(timings, "search"):
+            pass
+        with timed(None, "search"):
+            pass
+        
+        self.assertEqual(set(timings), {"search"})
+        self.assertGreaterEqual(timings["search"], first)
+    
+    def test_records_on_error(self):
+        """Test that a failing stage is still timed."""
+        timings = {}
+        with self.assertRaises(ValueError):
+            with timed(timings, "generate"):
+                raise ValueError("failure")
+        self.assertIn("generate", timings)
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test cases for MetricsRegistry."""
+    
+    def setUp(self):
+        """Record two queries."""
+        self.metrics = MetricsRegistry()
+        self.metrics.record_query({"embed": 0.002, "search": 0.02, "total": 0.3},
+                                  {"prompt_tokens": 100, "output_tokens": 10})
+        self.metrics.record_query({"embed": 0.2, "total": 0.4}, {})
+    
+    def test_prometheus_format(self):
+        """Test counters and cumulative histogram buckets in the text format."""
+        text = self.metrics.to_prometheus()
+        
+        self.assertIn("# TYPE rag_queries_total counter", text)
+        self.assertIn("rag_queries_total 2", text)
+        self.assertIn("rag_prompt_tokens_total 100", text)
+        self.assertIn("# TYPE rag_stage_seconds histogram", text)
+        self.assertIn('rag_stage_seconds_bucket{stage="embed",le="0.005"} 1', text)
+        self.assertIn('rag_stage_seconds_bucket{stage="embed",le="0.25"} 2', text)
+        self.assertIn('rag_stage_seconds_bucket{stage="embed",le="+Inf"} 2', text)
+        self.assertIn('rag_stage_seconds_count{stage="search"} 1', text)
+        self.assertIn("rag_query_seconds_count 2", text)
+    
+    def test_write_json(self):
+        """Test the JSON snapshot file."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "metrics", "rag.json")
+            self.metrics.write_json(path)
+            with open(path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        
+        self.assertEqual(snapshot["counters"]["rag_output_tokens_total"], 10)
+        self.assertEqual(snapshot["histograms"]["rag_stage_seconds{stage=embed}"]["count"], 2)
+    
+    def test_serve(self):
+        """Test the Prometheus endpoint."""
+        server = self.metrics.serve(0)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+                body = response.read().decode("utf-8")
+        finally:
+            server.shutdown()
+            server.server_close()
+        
+        self.assertIn("rag_queries_total 2", body)
+    
+    def test_serve_metrics_shares_the_port(self):
+        """Test that a second registry on the same port reuses the server instead of rebinding."""
+        server = serve_metrics(self.metrics, 0)
+        try:
+            port = server.server_address[1]
+            replacement = MetricsRegistry()
+            self.assertIs(serve_metrics(replacement, 0), server)
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+                body = response.read().decode("utf-8")
+        finally:
+            server.shutdown()
+            server.server_close()
+        
+        self.assertNotIn("rag_queries_total", body)
+
+if __name__ == '__main__':
+    unittest.main()
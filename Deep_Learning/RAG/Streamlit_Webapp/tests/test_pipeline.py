@@ -0,0 +1,154 @@
+"""Unit tests for the RAGPipeline class."""
+import unittest
+from unittest.mock import patch
+import torch
+from rag.pipeline import RAGPipeline
+
+class TestRAGPipeline(unittest.TestCase):
+    """Test cases for RAGPipeline class."""
+    
+    @patch('rag.pipeline.TextGenerator')
+    @patch('rag.pipeline.DocumentRetriever')
+    @patch('rag.pipeline.DocumentEmbedder')
+    def setUp(self, mock_embedder_class, mock_retriever_class, mock_generator_class):
+        """Set up test fixtures."""
+        self.embedder = mock_embedder_class.return_value
+        self.retriever = mock_retriever_class.return_value
+        self.generator = mock_generator_class.return_value
+        
+        self.embedder.embed_queries.side_effect = lambda queries: torch.rand(len(queries), 8)
+        self.retriever.version = 1
+        self.retriever.search_embeddings.side_effect = lambda embeddings, k, queries=None: [
+            [{"text": "Paris is the capital of France.", "metadata": {"doc_id": "doc1", "chunk_id": 0}, "score": 0.1}]
+            for _ in embeddings
+        ]
+        self.generator.model_name = "test-model"
+        self.generator.generation_kwargs = {"num_beams": 4}
+        self.generator.generate.return_value = "Paris"
+        self.generator.generate_batch.side_effect = lambda queries, docs, context_stats_batch=None, timings=None: [
+            "Paris" for _ in queries
+        ]
+        
+        self.pipeline = RAGPipeline()
+    
+    def test_query(self):
+        """Test that a query is retrieved and answered."""
+        result = self.pipeline.query("What is the capital of France?")
+        
+        self.assertEqual(result["response"], "Paris")
+        self.assertEqual(len(result["contexts"]), 1)
+        self.generator.generate.assert_called_once()
+    
+    def test_query_timings(self):
+        """Test that results carry per-stage timings and are recorded in the metrics."""
+        result = self.pipeline.query("What is the capital of France?")
+        cached = self.pipeline.query("What is the capital of France?")
+        
+        self.assertTrue({"embed", "search", "total"} <= result["timings"].keys())
+        self.assertIn("timings", self.generator.generate.call_args.kwargs)
+        self.assertEqual(set(cached["timings"]), {"total"})
+        self.assertIn("rag_queries_total 2", self.pipeline.metrics.to_prometheus())
+    
+    def test_repeated_query_is_cached(self):
+        """Test that a repeated question skips embedding, search and generation."""
+        self.pipeline.query("What is the capital of France?")
+        self.pipeline.query("What is the  capital of France? ")
+        
+        self.embedder.embed_queries.assert_called_once()
+        self.retriever.search_embeddings.assert_called_once()
+        self.generator.generate.assert_called_once()
+        self.assertEqual(self.pipeline.cache_stats()["retrieval"]["hits"], 1)
+    
+    def test_index_version_invalidates_cache(self):
+        """Test that a new index version triggers a new search but reuses the query embedding."""
+        self.pipeline.query("What is the capital of France?")
+        self.retriever.version = 2
+        self.pipeline.query("What is the capital of France?")
+        
+        self.embedder.embed_queries.assert_called_once()
+        self.assertEqual(self.retriever.search_embeddings.call_count, 2)
+        self.assertEqual(self.generator.generate.call_count, 2)
+    
+    def test_query_batch_only_searches_uncached_queries(self):
+        """Test that batched queries reuse cached retrievals."""
+        self.pipeline.query("First question")
+        results = self.pipeline.query_batch(["First question", "Second question"])
+        
+        self.assertEqual([r["query"] for r in results], ["First question", "Second question"])
+        self.assertEqual(self.embedder.embed_queries.call_args_list[-1][0][0], ["Second question"])
+    
+    def test_query_batch_generates_in_one_batch(self):
+        """Test that uncached answers are generated in a single batch, once per distinct question."""
+        self.pipeline.query("First question")
+        results = self.pipeline.query_batch(["First question", "Second question", "Second  question", "Third question"])
+        
+        self.assertEqual([r["response"] for r in results], ["Paris"] * 4)
+        self.generator.generate_batch.assert_called_once()
+        self.assertEqual(self.generator.generate_batch.call_args.args[0], ["Second question", "Third question"])
+    
+    def test_document_status(self):
+        """Test that the document status summarizes the store."""
+        self.retriever.document_count = 2
+        self.retriever.num_chunks = 7
+        self.retriever.document_ids.return_value = ["a.txt", "b.txt"]
+        
+        status = self.pipeline.document_status()
+        
+        self.assertEqual(status, {"documents": 2, "chunks": 7, "document_ids": ["a.txt", "b.txt"]})
+    
+    def test_query_stream(self):
+        """Test that partial results grow until the full answer."""
+        self.generator.stream_kwargs = {"do_sample": False}
+        self.generator.generate_stream.return_value = iter(["Par", "is "])
+        
+        partials = list(self.pipeline.query_stream("What is the capital of France?"))
+        
+        self.assertEqual([p["response"] for p in partials], ["Par", "Paris ", "Paris"])
+        self.assertEqual(len(partials[-1]["contexts"]), 1)
+        
+        # The streamed answer is cached for the next identical question
+        partials = list(self.pipeline.query_stream("What is the capital of France?"))
+        self.assertEqual([p["response"] for p in partials], ["Paris"])
+        self.generator.generate_stream.assert_called_once()
+    
+    @patch('rag.pipeline.CrossEncoderReranker')
+    @patch('rag.pipeline.TextGenerator')
+    @patch('rag.pipeline.DocumentRetriever')
+    @patch('rag.pipeline.DocumentEmbedder')
+    def test_query_with_reranker(self, mock_embedder_class, mock_retriever_class,
+                                 mock_generator_class, mock_reranker_class):
+        """Test that reranking widens retrieval and passes the reranked chunks to the generator."""
+        mock_embedder_class.return_value.embed_queries.side_effect = lambda queries: torch.rand(len(queries), 8)
+        retriever = mock_retriever_class.return_value
+        retriever.version = 1
+        retriever.search_embeddings.side_effect = lambda embeddings, k, queries=None: [
+            [{"text": f"chunk {i}", "metadata": {"doc_id": "doc1", "chunk_id": i}, "score": 0.0} for i in range(k)]
+            for _ in embeddings
+        ]
+        generator = mock_generator_class.return_value
+        generator.generation_kwargs = {}
+        generator.generate.return_value = "answer"
+        reranker = mock_reranker_class.return_value
+        reranker.model_name = "test-reranker"
+        reranker.rerank.side_effect = lambda query, docs, top_n, budget: (docs[::-1][:top_n], True)
+        
+        with patch('rag.pipeline.config.rerank_enabled', True), \
+             patch('rag.pipeline.config.rerank_candidates', 10):
+            pipeline = RAGPipeline()
+            result = pipeline.query("question", top_k=2)
+            pipeline.query("question", top_k=2)
+        
+        self.assertEqual(retriever.search_embeddings.call_args.args[1], 10)
+        self.assertEqual([doc["metadata"]["chunk_id"] for doc in result["contexts"]], [9, 8])
+        reranker.rerank.assert_called_once()
+    
+    def test_no_context_response(self):
+        """Test the fallback answer when nothing is retrieved."""
+        self.retriever.search_embeddings.side_effect = lambda embeddings, k, queries=None: [[] for _ in embeddings]
+        result = self.pipeline.query("Unknown question")
+        
+        self.assertIn("don't have enough information", result["response"])
+        self.generator.generate.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
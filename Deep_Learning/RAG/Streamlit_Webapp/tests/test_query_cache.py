@@ -0,0 +1,37 @@
+"""Unit tests for the LRUCache class."""
+import unittest
+from rag.query_cache import LRUCache
+
+class TestLRUCache(unittest.TestCase):
+    """Test cases for LRUCache class."""
+    
+    def test_get_and_put(self):
+        """Test basic lookups and hit/miss counting."""
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+    
+    def test_eviction_order(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+    
+    def test_disabled_cache(self):
+        """Test that a zero-sized cache stores nothing."""
+        cache = LRUCache(0)
+        cache.put("a", 1)
+        self.assertIsNone(cache.get("a"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""Unit tests for the CrossEncoderReranker class."""
+import unittest
+from unittest.mock import patch
+import numpy as np
+from rag.reranker import CrossEncoderReranker
+
+class TestCrossEncoderReranker(unittest.TestCase):
+    """Test cases for CrossEncoderReranker class."""
+    
+    @patch('rag.reranker.CrossEncoder')
+    def setUp(self, mock_cross_encoder):
+        """Set up test fixtures."""
+        self.model = mock_cross_encoder.return_value
+        # Score each chunk by the number at the end of its text
+        self.model.predict.side_effect = lambda pairs, batch_size=None: np.array(
+            [float(text.split()[-1]) for _, text in pairs]
+        )
+        self.reranker = CrossEncoderReranker(model_name="test-model", batch_size=2)
+        self.candidates = [
+            {"text": f"chunk {score}", "metadata": {"doc_id": "doc1", "chunk_id": i}, "score": 0.0}
+            for i, score in enumerate([1, 5, 3, 4, 2])
+        ]
+    
+    def test_rerank_orders_by_score(self):
+        """Test that the best scored chunks are kept in score order."""
+        results, reranked = self.reranker.rerank("query", self.candidates, top_n=3)
+        
+        self.assertTrue(reranked)
+        self.assertEqual([doc["metadata"]["chunk_id"] for doc in results], [1, 3, 2])
+        self.assertEqual(results[0]["rerank_score"], 5.0)
+    
+    def test_rerank_scores_in_batches(self):
+        """Test that pairs are scored in batches of batch_size."""
+        self.reranker.rerank("query", self.candidates, top_n=3)
+        
+        self.assertEqual([len(call.args[0]) for call in self.model.predict.call_args_list], [2, 2, 1])
+    
+    @patch('rag.reranker.time.perf_counter')
+    def test_budget_exceeded_keeps_retrieval_order(self, mock_perf_counter):
+        """Test that reranking over the time budget falls back to the retrieval order."""
+        # Each clock read advances 100 ms
+        mock_perf_counter.side_effect = [i * 0.1 for i in range(10)]
+        
+        results, reranked = self.reranker.rerank("query", self.candidates, top_n=3, time_budget_ms=150)
+        
+        self.assertFalse(reranked)
+        self.assertEqual([doc["metadata"]["chunk_id"] for doc in results], [0, 1, 2])
+        self.assertNotIn("rerank_score", results[0])
+        self.assertLess(self.model.predict.call_count, 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,12 +2,14 @@
 import unittest
 import os
 import numpy as np
+import pickle
 import tempfile
 import shutil
 from unittest.mock import patch, MagicMock
 import torch
 import faiss
 from rag.retriever import DocumentRetriever
+from rag.index_factory import index_type_of, index_precision_of
 from rag.embeddings import DocumentEmbedder
 
 class TestDocumentRetriever(unittest.TestCase):
@@ -25,6 +27,20 @@ class TestDocumentRetriever(unittest.TestCase):
         self.mock_config.chunk_size = 100
         self.mock_config.chunk_overlap = 20
         self.mock_config.top_k = 3
+        self.mock_config.index_type = "flat"
+        self.mock_config.ivf_nlist = 4
+        self.mock_config.ivf_nprobe = 2
+        self.mock_config.pq_m = 8
+        self.mock_config.pq_nbits = 4
+        self.mock_config.hnsw_m = 8
+        self.mock_config.hnsw_ef_construction = 40
+        self.mock_config.hnsw_ef_search = 16
+        self.mock_config.ivf_promotion_threshold = 0
+        self.mock_config.vector_precision = "float32"
+        self.mock_config.retrieval_mode = "dense"
+        self.mock_config.hybrid_candidates = 20
+        self.mock_config.rrf_k = 60
+        self.mock_config.max_segments = 8
         
         # Mock the embedder
         self.embedder_patcher = patch('rag.retriever.DocumentEmbedder')
@@ -44,12 +60,16 @@ class TestDocumentRetriever(unittest.TestCase):
             
         self.mock_embedder.embed_documents.side_effect = mock_embed_documents
         self.mock_embedder.embed_query.side_effect = mock_embed_query
+        self.mock_embedder.embed_queries.side_effect = mock_embed_documents
         
         # Create the retriever
         self.retriever = DocumentRetriever()
     
     def tearDown(self):
         """Tear down test fixtures."""
+        # Let background merges finish before the directory is removed
+        self.retriever.wait_for_merge()
+        
         # Stop the patchers
         self.config_patcher.stop()
         self.embedder_patcher.stop()
@@ -60,7 +80,7 @@ class TestDocumentRetriever(unittest.TestCase):
     def test_initialization(self):
         """Test proper initialization of DocumentRetriever."""
         self.assertIsNone(self.retriever.index)
-        self.assertEqual(len(self.retriever.documents), 0)
+        self.assertEqual(self.retriever.document_count, 0)
         self.assertEqual(len(self.retriever.doc_chunks), 0)
     
     def test_add_documents(self):
@@ -76,11 +96,11 @@ class TestDocumentRetriever(unittest.TestCase):
         self.retriever.add_documents(documents, document_ids)
         
         # Check that documents were stored
-        self.assertEqual(len(self.retriever.documents), 2)
+        self.assertEqual(self.retriever.document_count, 2)
         
         # Check that an index was created
         self.assertIsNotNone(self.retriever.index)
-        self.assertIsInstance(self.retriever.index, faiss.IndexFlatL2)
+        self.assertEqual(index_type_of(self.retriever.index), "flat")
         
         # Check that the embedder was called
         self.mock_embedder.embed_documents.assert_called()
@@ -97,7 +117,7 @@ class TestDocumentRetriever(unittest.TestCase):
         
         # Mock the FAISS search method
         original_search = self.retriever.index.search
-        def mock_search(x, k):
+        def mock_search(x, k, params=None):
             # Return mock distances and indices
             distances = np.array([[0.1, 0.2, 0.3]])
             indices = np.array([[0, 1, -1]])  # -1 is an invalid index
@@ -119,6 +139,26 @@ class TestDocumentRetriever(unittest.TestCase):
         # Check scores
         self.assertEqual(results[0]["score"], 0.1)
         self.assertEqual(results[1]["score"], 0.2)
+        self.assertEqual(results[0]["score_type"], "distance")
+    
+    def test_retrieve_batch(self):
+        """Test batched retrieval with one embedding call and one search."""
+        documents = [
+            "This is the first test document.",
+            "This is the second test document with more content."
+        ]
+        self.retriever.add_documents(documents, ["doc1", "doc2"])
+        
+        queries = ["First query", "Second query", "Third query"]
+        results = self.retriever.retrieve_batch(queries, top_k=2)
+        
+        self.mock_embedder.embed_queries.assert_called_once_with(queries)
+        self.assertEqual(len(results), 3)
+        for query_results in results:
+            self.assertEqual(len(query_results), 2)
+            self.assertEqual({r["metadata"]["doc_id"] for r in query_results}, {"doc1", "doc2"})
+        
+        self.assertEqual(self.retriever.retrieve_batch([]), [])
     
     def test_save_and_load_index(self):
         """Test saving and loading the index."""
@@ -135,7 +175,268 @@ class TestDocumentRetriever(unittest.TestCase):
         # Check that the index was loaded
         self.assertTrue(success)
         self.assertIsNotNone(new_retriever.index)
-        self.assertEqual(len(new_retriever.documents), 1)
+        self.assertEqual(new_retriever.document_count, 1)
+    
+    def test_add_writes_one_segment_per_batch(self):
+        """Test that each add only appends a new segment."""
+        self.retriever.add_documents(["This is a test document."])
+        self.retriever.add_documents(["Another test document."])
+        
+        self.assertEqual(len(self.retriever.store.segments), 2)
+        self.assertIsNone(self.retriever.store.manifest["checkpoint"])
+        
+        new_retriever = DocumentRetriever()
+        self.assertTrue(new_retriever.load_index())
+        self.assertEqual(new_retriever.index.ntotal, 2)
+        self.assertEqual(new_retriever.document_count, 1)
+    
+    def test_merge_segments_and_reload(self):
+        """Test that merged segments and the index checkpoint load back in order."""
+        self.mock_config.max_segments = 2
+        for i in range(4):
+            self.retriever.add_documents([f"Test document number {i}."], [f"doc{i}"])
+            self.retriever.wait_for_merge()
+        self.retriever.merge_segments()
+        
+        self.assertLessEqual(len(self.retriever.store.segments), 2)
+        self.assertEqual(self.retriever.store.manifest["checkpoint"]["ntotal"], 4)
+        
+        new_retriever = DocumentRetriever()
+        self.assertTrue(new_retriever.load_index())
+        self.assertEqual(new_retriever.index.ntotal, 4)
+        self.assertEqual([meta["doc_id"] for _, meta in new_retriever.doc_chunks],
+                         ["doc0", "doc1", "doc2", "doc3"])
+        np.testing.assert_array_equal(new_retriever.index.reconstruct_n(0, 4),
+                                      self.retriever.index.reconstruct_n(0, 4))
+    
+    def test_chunks_are_memory_mapped(self):
+        """Test that chunk texts and metadata are served from the columnar segments."""
+        self.retriever.text_splitter.split_text = lambda doc: doc.split("|")
+        self.retriever.add_documents(["first|second ñ|third"], ["doc1"])
+        
+        new_retriever = DocumentRetriever()
+        new_retriever.load_index()
+        self.assertEqual(len(new_retriever.doc_chunks), 3)
+        self.assertEqual(new_retriever.doc_chunks[1],
+                         ("second ñ", {"doc_id": "doc1", "chunk_id": 1, "doc_index": 0}))
+        self.assertEqual(new_retriever.doc_chunks[-1][0], "third")
+        with self.assertRaises(IndexError):
+            new_retriever.doc_chunks[3]
+    
+    def test_ivf_checkpoint_reloaded_before_add(self):
+        """Test adding to a store whose IVF checkpoint was opened memory-mapped."""
+        self.mock_config.index_type = "ivf_flat"
+        self.retriever.text_splitter.split_text = lambda doc: [doc] * 200
+        self.retriever.add_documents(["This is a test document."])
+        self.retriever.merge_segments()
+        
+        new_retriever = DocumentRetriever()
+        new_retriever.load_index()
+        self.assertTrue(new_retriever._index_readonly)
+        new_retriever.add_documents(["Another test document."])
+        self.assertFalse(new_retriever._index_readonly)
+        self.assertEqual(new_retriever.index.ntotal, 201)
+    
+    def test_migrate_legacy_store(self):
+        """Test loading a store written in the single-file format."""
+        index = faiss.IndexFlatL2(384)
+        index.add(np.random.rand(1, 384).astype(np.float32))
+        faiss.write_index(index, os.path.join(self.temp_dir, "faiss_index"))
+        with open(os.path.join(self.temp_dir, "documents.pkl"), "wb") as f:
+            pickle.dump((["A legacy document."], [("A legacy document.", {"doc_id": "old", "chunk_id": 0})]), f)
+        
+        self.assertTrue(self.retriever.load_index())
+        self.assertEqual(len(self.retriever.store.segments), 1)
+        
+        new_retriever = DocumentRetriever()
+        self.assertTrue(new_retriever.load_index())
+        self.assertEqual(new_retriever.doc_chunks[0][1]["doc_id"], "old")
+    
+    def test_hnsw_index_type(self):
+        """Test that the configured ANN index type is used."""
+        self.mock_config.index_type = "hnsw"
+        self.retriever.add_documents(["This is a test document."])
+        
+        self.assertEqual(index_type_of(self.retriever.index), "hnsw")
+        self.assertEqual(faiss.downcast_index(self.retriever.index.index).hnsw.efSearch, 16)
+    
+    def test_ivf_starts_flat_until_trainable(self):
+        """Test that an IVF index is only built once there is enough training data."""
+        self.mock_config.index_type = "ivf_flat"
+        self.retriever.add_documents(["This is a test document."])
+        self.assertEqual(index_type_of(self.retriever.index), "flat")
+        
+        # 4 cells need 4 * 39 training vectors
+        self.retriever.text_splitter.split_text = lambda doc: [doc] * 200
+        self.retriever.add_documents(["Another test document."])
+        
+        ivf = faiss.extract_index_ivf(self.retriever.index)
+        self.assertEqual(ivf.nprobe, 2)
+        self.assertEqual(self.retriever.index.ntotal, len(self.retriever.doc_chunks))
+    
+    def test_flat_promotion_threshold(self):
+        """Test automatic promotion of a flat index to IVF."""
+        self.mock_config.ivf_promotion_threshold = 150
+        self.retriever.text_splitter.split_text = lambda doc: [doc] * 200
+        self.retriever.add_documents(["This is a test document."])
+        
+        self.assertEqual(index_type_of(self.retriever.index), "ivf_flat")
+    
+    def test_float16_vector_storage(self):
+        """Test that float16 precision stores vectors with a scalar quantizer and survives reload."""
+        self.mock_config.vector_precision = "float16"
+        self.retriever.add_documents(["This is a test document."])
+        
+        self.assertEqual(index_precision_of(self.retriever.index), "float16")
+        self.retriever.merge_segments()
+        
+        new_retriever = DocumentRetriever()
+        self.assertTrue(new_retriever.load_index())
+        self.assertEqual(index_precision_of(new_retriever.index), "float16")
+        self.assertEqual(len(new_retriever.retrieve("test", top_k=1)), 1)
+    
+    def test_sq8_starts_full_precision_until_trainable(self):
+        """Test that the 8-bit quantizer is only trained once there is enough data."""
+        self.mock_config.vector_precision = "sq8"
+        self.retriever.add_documents(["This is a test document."])
+        self.assertEqual(index_type_of(self.retriever.index), "flat")
+        
+        self.retriever.text_splitter.split_text = lambda doc: [doc] * 1000
+        self.retriever.add_documents(["Another test document."])
+        
+        self.assertEqual(index_precision_of(self.retriever.index), "sq8")
+        self.assertEqual(self.retriever.index.ntotal, 1001)
+    
+    def test_remove_document(self):
+        """Test that a removed document disappears from the index, results and reloads."""
+        self.retriever.add_documents(["First document.", "Second document."], ["doc1", "doc2"])
+        version = self.retriever.version
+        
+        self.assertEqual(self.retriever.remove_document("doc1"), 1)
+        self.assertEqual(self.retriever.remove_document("missing"), 0)
+        self.retriever.wait_for_merge()
+        
+        self.assertGreater(self.retriever.version, version)
+        self.assertEqual(self.retriever.index.ntotal, 1)
+        self.assertEqual(self.retriever.document_count, 1)
+        results = self.retriever.retrieve("document", top_k=3)
+        self.assertEqual([r["metadata"]["doc_id"] for r in results], ["doc2"])
+        
+        new_retriever = DocumentRetriever()
+        self.assertTrue(new_retriever.load_index())
+        self.assertEqual(new_retriever.index.ntotal, 1)
+        self.assertEqual(new_retriever.store.document_ids(), ["doc2"])
+    
+    def test_removal_after_checkpoint_applied_on_load(self):
+        """Test that chunks deleted after the last checkpoint are removed when loading."""
+        self.retriever.add_documents(["First document.", "Second document."], ["doc1", "doc2"])
+        self.retriever.merge_segments()
+        
+        # Delete without letting the background merge write a new checkpoint
+        with patch.object(self.retriever, "_schedule_merge"):
+            self.retriever.remove_document("doc2")
+        
+        new_retriever = DocumentRetriever()
+        self.assertTrue(new_retriever.load_index())
+        self.assertEqual(new_retriever.index.ntotal, 1)
+        results = new_retriever.retrieve("document", top_k=3)
+        self.assertEqual([r["metadata"]["doc_id"] for r in results], ["doc1"])
+    
+    def test_upsert_documents_replaces_chunks(self):
+        """Test that upserting a document replaces its chunks instead of duplicating them."""
+        self.retriever.add_documents(["Old text.", "Other document."], ["doc1", "doc2"])
+        self.retriever.upsert_documents(["New text."], ["doc1"])
+        
+        self.assertEqual(self.retriever.index.ntotal, 2)
+        texts = {r["text"] for r in self.retriever.retrieve("text", top_k=5)}
+        self.assertEqual(texts, {"New text.", "Other document."})
+    
+    def test_remove_document_from_hnsw_uses_tombstones(self):
+        """Test that HNSW deletions are filtered at search time and survive reloads."""
+        self.mock_config.index_type = "hnsw"
+        self.retriever.text_splitter.split_text = lambda doc: [f"{doc} {i}" for i in range(10)]
+        self.retriever.add_documents(["keep", "drop"], ["keep", "drop"])
+        self.retriever.merge_segments()
+        self.retriever.text_splitter.split_text = lambda doc: [doc]
+        others = [f"other {i}" for i in range(40)]
+        self.retriever.add_documents(others, others)
+        
+        with patch.object(self.retriever, "_schedule_merge"):
+            self.assertEqual(self.retriever.remove_document("drop"), 10)
+        self.assertEqual(len(self.retriever._tombstones), 10)
+        self.assertEqual(self.retriever.index.ntotal, 60)
+        results = self.retriever.retrieve("query", top_k=60)
+        self.assertNotIn("drop", {r["metadata"]["doc_id"] for r in results})
+        
+        new_retriever = DocumentRetriever()
+        self.assertTrue(new_retriever.load_index())
+        self.assertEqual(len(new_retriever._tombstones), 10)
+        results = new_retriever.retrieve("query", top_k=60)
+        self.assertNotIn("drop", {r["metadata"]["doc_id"] for r in results})
+    
+    def test_hnsw_rebuilt_after_many_deletions(self):
+        """Test that an HNSW index is rebuilt once too much of it is tombstoned."""
+        self.mock_config.index_type = "hnsw"
+        self.retriever.add_documents(["First document.", "Second document."], ["doc1", "doc2"])
+        
+        self.retriever.remove_document("doc1")
+        
+        self.assertEqual(self.retriever._tombstones, set())
+        self.assertEqual(self.retriever.index.ntotal, 1)
+        self.assertEqual(index_type_of(self.retriever.index), "hnsw")
+    
+    def test_remove_document_from_ivf(self):
+        """Test that IVF indexes remove vectors by id, including read-only checkpoints."""
+        self.mock_config.index_type = "ivf_flat"
+        self.retriever.text_splitter.split_text = lambda doc: [f"{doc} {i}" for i in range(100)]
+        self.retriever.add_documents(["one", "two"], ["doc1", "doc2"])
+        self.retriever.merge_segments()
+        
+        new_retriever = DocumentRetriever()
+        self.assertTrue(new_retriever.load_index())
+        self.assertTrue(new_retriever._index_readonly)
+        self.assertEqual(new_retriever.remove_document("doc1"), 100)
+        new_retriever.wait_for_merge()
+        
+        self.assertEqual(new_retriever.index.ntotal, 100)
+        results = new_retriever.retrieve("query", top_k=10)
+        self.assertEqual({r["metadata"]["doc_id"] for r in results}, {"doc2"})
+    
+    def test_hybrid_retrieval_finds_rare_terms(self):
+        """Test that BM25 fusion surfaces exact-term matches the dense search misses."""
+        self.mock_config.retrieval_mode = "hybrid"
+        retriever = DocumentRetriever()
+        retriever.text_splitter.split_text = lambda doc: [doc]
+        filler = [f"Generic text about the castle number {i}." for i in range(50)]
+        retriever.add_documents(filler + ["Neville Longbottom lost his toad."],
+                                [f"doc{i}" for i in range(51)])
+        
+        # The mock embeddings are random, so only the lexical ranking can find it
+        results = retriever.retrieve("Where is Neville's toad?", top_k=3)
+        self.assertIn("doc50", [r["metadata"]["doc_id"] for r in results])
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(r["score_type"] == "rrf" for r in results))
+        
+        # Removed chunks disappear from the lexical index too
+        retriever.remove_document("doc50")
+        retriever.wait_for_merge()
+        results = retriever.retrieve("Neville toad", top_k=3)
+        self.assertNotIn("doc50", {r["metadata"]["doc_id"] for r in results})
+    
+    def test_lexical_index_persisted_with_checkpoint(self):
+        """Test that the BM25 index is restored from its checkpoint plus later segments."""
+        self.mock_config.retrieval_mode = "hybrid"
+        retriever = DocumentRetriever()
+        retriever.add_documents(["Hedwig is a snowy owl."], ["owl"])
+        retriever.merge_segments()
+        self.assertIn("lexical", retriever.store.manifest["checkpoint"])
+        retriever.add_documents(["Crookshanks is a cat."], ["cat"])
+        
+        new_retriever = DocumentRetriever()
+        self.assertTrue(new_retriever.load_index())
+        self.assertEqual(len(new_retriever.lexical), 2)
+        _, ids = new_retriever.lexical.search("crookshanks", 1)
+        self.assertEqual(new_retriever.doc_chunks.get(int(ids[0]))[1]["doc_id"], "cat")
     
     def test_retrieve_no_index(self):
         """Test retrieval with no index."""
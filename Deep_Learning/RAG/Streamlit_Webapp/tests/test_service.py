@@ -0,0 +1,142 @@
+"""Unit tests for the query service."""
+import asyncio
+import json
+import time
+import unittest
+from unittest.mock import MagicMock
+from rag.service import QueryBatcher, QueryService, BatcherStopped
+
+def make_pipeline():
+    """Pipeline mock whose batches take 20 ms."""
+    pipeline = MagicMock()
+    
+    def query_batch(queries, top_k=None):
+        time.sleep(0.02)
+        return [{"query": query, "response": f"answer to {query}", "contexts": []} for query in queries]
+    
+    pipeline.query_batch.side_effect = query_batch
+    pipeline.document_status.return_value = {"documents": 1, "chunks": 3, "document_ids": ["a.txt"]}
+    return pipeline
+
+class TestQueryService(unittest.TestCase):
+    """Test cases for QueryBatcher and QueryService."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.pipeline = make_pipeline()
+    
+    def _run(self, coroutine_function):
+        """Run a coroutine function with a started batcher."""
+        async def run():
+            batcher = QueryBatcher(self.pipeline, batch_window_ms=50, max_batch_size=8)
+            await batcher.start()
+            try:
+                return await coroutine_function(batcher)
+            finally:
+                await batcher.stop()
+        return asyncio.run(run())
+    
+    def test_concurrent_queries_share_a_batch(self):
+        """Test that queries arriving within the window are answered in one batch."""
+        async def submit_all(batcher):
+            return await asyncio.gather(*(batcher.submit(f"question {i}") for i in range(5)))
+        
+        results = self._run(submit_all)
+        
+        self.assertEqual([r["response"] for r in results], [f"answer to question {i}" for i in range(5)])
+        self.pipeline.query_batch.assert_called_once()
+        self.assertEqual(len(self.pipeline.query_batch.call_args.args[0]), 5)
+    
+    def test_batches_are_split_by_size_and_top_k(self):
+        """Test that batches respect max_batch_size and a single top_k."""
+        async def submit_all(batcher):
+            queries = [batcher.submit(f"question {i}") for i in range(10)]
+            queries.append(batcher.submit("other question", top_k=3))
+            return await asyncio.gather(*queries)
+        
+        results = self._run(submit_all)
+        
+        self.assertEqual(len(results), 11)
+        sizes = [(len(call.args[0]), call.args[1]) for call in self.pipeline.query_batch.call_args_list]
+        self.assertTrue(all(size <= 8 for size, _ in sizes))
+        self.assertIn((1, 3), sizes)
+    
+    def test_batch_errors_reach_every_query(self):
+        """Test that a failing batch raises in each waiting query."""
+        self.pipeline.query_batch.side_effect = RuntimeError("model failure")
+        
+        async def submit_all(batcher):
+            return await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+        
+        results = self._run(submit_all)
+        
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+    
+    def test_stop_fails_pending_queries(self):
+        """Test that stopping fails queued and in-flight queries and rejects new ones."""
+        async def run():
+            batcher = QueryBatcher(self.pipeline, batch_window_ms=50, max_batch_size=2)
+            await batcher.start()
+            queries = [asyncio.ensure_future(batcher.submit(f"question {i}")) for i in range(5)]
+            # Let the worker take the first batch while the rest stay queued
+            await asyncio.sleep(0.01)
+            await batcher.stop()
+            results = await asyncio.wait_for(asyncio.gather(*queries, return_exceptions=True), 1)
+            with self.assertRaises(BatcherStopped):
+                await batcher.submit("late question")
+            return results
+        
+        results = asyncio.run(run())
+        
+        self.assertTrue(all(isinstance(r, BatcherStopped) for r in results))
+    
+    def test_http_query_and_status(self):
+        """Test the HTTP routes end to end over a local socket."""
+        async def request(port, method, path, payload=None):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            body = json.dumps(payload).encode() if payload is not None else b""
+            writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            head, _, data = response.partition(b"\r\n\r\n")
+            return int(head.split()[1]), json.loads(data)
+        
+        async def run(batcher):
+            service = QueryService(self.pipeline, batcher)
+            server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await asyncio.gather(
+                    request(port, "POST", "/query", {"query": "question"}),
+                    request(port, "GET", "/status"),
+                    request(port, "POST", "/query", {}),
+                    request(port, "POST", "/query", {"query": ["not", "a", "string"]}),
+                    request(port, "POST", "/remove", {"doc_id": "a.txt"}),
+                    request(port, "GET", "/missing"),
+                )
+        
+        self.pipeline.remove_document.side_effect = KeyError("a.txt")
+        query, status, invalid, wrong_type, pipeline_error, missing = self._run(run)
+        
+        self.assertEqual(query, (200, {"query": "question", "response": "answer to question", "contexts": []}))
+        self.assertEqual(status[1]["chunks"], 3)
+        self.assertEqual(invalid[0], 400)
+        self.assertEqual(wrong_type[0], 400)
+        # Errors raised inside the pipeline are not the client's fault
+        self.assertEqual(pipeline_error[0], 500)
+        self.assertEqual(missing[0], 404)
+    
+    def test_metrics_route(self):
+        """Test that /metrics returns the pipeline metrics as text."""
+        self.pipeline.metrics.to_prometheus.return_value = "rag_queries_total 1\n"
+        service = QueryService(self.pipeline)
+        
+        status, body = asyncio.run(service.dispatch("GET", "/metrics", {}))
+        
+        self.assertEqual(status, 200)
+        self.assertEqual(body, "rag_queries_total 1\n")
+
+if __name__ == '__main__':
+    unittest.main()
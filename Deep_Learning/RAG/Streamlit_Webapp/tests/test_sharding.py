@@ -0,0 +1,112 @@
+"""Unit tests for the ShardedRetriever class."""
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+from unittest.mock import patch, MagicMock
+import numpy as np
+import torch
+from rag.retriever import DocumentRetriever
+from rag.sharding import ShardedRetriever, shard_of
+
+def text_embeddings(texts):
+    """Deterministic random embeddings seeded by the text."""
+    return torch.from_numpy(np.stack([
+        np.random.default_rng(zlib.crc32(text.encode())).random(32, dtype=np.float32) for text in texts
+    ]))
+
+class TestShardedRetriever(unittest.TestCase):
+    """Test cases for ShardedRetriever class."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        
+        self.mock_config = MagicMock()
+        self.mock_config.vector_db_path = self.temp_dir
+        self.mock_config.num_shards = 3
+        self.mock_config.chunk_size = 100
+        self.mock_config.chunk_overlap = 0
+        self.mock_config.top_k = 5
+        self.mock_config.index_type = "flat"
+        self.mock_config.ivf_promotion_threshold = 0
+        self.mock_config.vector_precision = "float32"
+        self.mock_config.retrieval_mode = "dense"
+        self.mock_config.hybrid_candidates = 20
+        self.mock_config.rrf_k = 60
+        self.mock_config.max_segments = 8
+        self.config_patchers = [patch('rag.retriever.config', self.mock_config),
+                                patch('rag.sharding.config', self.mock_config)]
+        for patcher in self.config_patchers:
+            patcher.start()
+        
+        self.embedder = MagicMock()
+        self.embedder.embed_documents.side_effect = text_embeddings
+        self.embedder.embed_queries.side_effect = text_embeddings
+        
+        self.documents = [f"document number {i} about topic {i % 7}" for i in range(30)]
+        self.document_ids = [f"doc{i}" for i in range(30)]
+    
+    def tearDown(self):
+        """Tear down test fixtures."""
+        for patcher in self.config_patchers:
+            patcher.stop()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_documents_are_routed_by_id(self):
+        """Test that each document lives in the shard given by its id hash."""
+        retriever = ShardedRetriever(embedder=self.embedder)
+        retriever.add_documents(self.documents, self.document_ids)
+        
+        self.assertEqual(retriever.num_chunks, 30)
+        self.assertEqual(sorted(retriever.document_ids()), sorted(self.document_ids))
+        for number, shard in enumerate(retriever.shards):
+            self.assertTrue(all(shard_of(doc_id, 3) == number for doc_id in shard.document_ids()))
+            self.assertTrue(os.path.isdir(os.path.join(self.temp_dir, f"shard_{number:02d}")))
+        self.assertTrue(all(shard.num_chunks for shard in retriever.shards))
+    
+    def test_search_matches_single_index(self):
+        """Test that merged shard results equal a search over one exact index."""
+        sharded = ShardedRetriever(embedder=self.embedder, db_path=os.path.join(self.temp_dir, "sharded"))
+        sharded.add_documents(self.documents, self.document_ids)
+        single = DocumentRetriever(embedder=self.embedder, db_path=os.path.join(self.temp_dir, "single"))
+        single.add_documents(self.documents, self.document_ids)
+        
+        queries = ["document number 3 about topic 3", "some other question"]
+        for expected, found in zip(single.retrieve_batch(queries, 5), sharded.retrieve_batch(queries, 5)):
+            self.assertEqual([r["metadata"]["doc_id"] for r in found], [r["metadata"]["doc_id"] for r in expected])
+            self.assertTrue(np.allclose([r["score"] for r in found], [r["score"] for r in expected]))
+    
+    def test_remove_upsert_and_reload(self):
+        """Test document updates and loading a sharded store from disk."""
+        retriever = ShardedRetriever(embedder=self.embedder)
+        retriever.add_documents(self.documents, self.document_ids)
+        version = retriever.version
+        
+        self.assertEqual(retriever.remove_document("doc4"), 1)
+        retriever.upsert_documents(["replacement text for doc5"], ["doc5"])
+        self.assertGreater(retriever.version, version)
+        retriever.wait_for_merge()
+        
+        reloaded = ShardedRetriever(embedder=self.embedder)
+        self.assertTrue(reloaded.load_index())
+        self.assertEqual(reloaded.num_chunks, 29)
+        self.assertNotIn("doc4", reloaded.document_ids())
+        result = reloaded.retrieve("replacement text for doc5", 1)[0]
+        self.assertEqual(result["text"], "replacement text for doc5")
+    
+    def test_layout_mismatch(self):
+        """Test that a store is not opened with a different shard count."""
+        ShardedRetriever(embedder=self.embedder)
+        
+        with self.assertRaises(ValueError):
+            ShardedRetriever(embedder=self.embedder, num_shards=2)
+        
+        DocumentRetriever(embedder=self.embedder, db_path=os.path.join(self.temp_dir, "plain")).add_documents(
+            ["text"], ["doc"])
+        with self.assertRaises(ValueError):
+            ShardedRetriever(embedder=self.embedder, db_path=os.path.join(self.temp_dir, "plain"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+"""Unit tests for startup timing and background pipeline loading."""
+import threading
+import unittest
+from rag.startup import StartupReport, PipelineLoader
+
+class TestStartup(unittest.TestCase):
+    """Test cases for StartupReport and PipelineLoader."""
+    
+    def test_report_records_steps_in_order(self):
+        """Test that each step is timed and the total covers them."""
+        report = StartupReport()
+        with report.step("import torch"):
+            self.assertEqual(report.stage, "import torch")
+        with report.step("load index"):
+            pass
+        report.finish()
+        
+        timings = report.as_dict()
+        self.assertEqual(list(timings), ["import torch", "load index", "total"])
+        self.assertGreaterEqual(timings["total"], timings["import torch"] + timings["load index"])
+        self.assertEqual(report.stage, "ready")
+    
+    def test_loader_runs_in_background(self):
+        """Test that the pipeline is built on another thread and reported as ready."""
+        release = threading.Event()
+        
+        def factory(report):
+            with report.step("load generator model"):
+                release.wait(5)
+            return "pipeline"
+        
+        loader = PipelineLoader(factory).start()
+        self.assertFalse(loader.ready)
+        
+        release.set()
+        self.assertEqual(loader.wait(5), "pipeline")
+        self.assertTrue(loader.ready)
+        self.assertIn("load generator model", loader.report.as_dict())
+    
+    def test_loader_failure(self):
+        """Test that a failed load is reported and raised to waiting callers."""
+        def factory(report):
+            raise OSError("model not found")
+        
+        loader = PipelineLoader(factory).start()
+        
+        with self.assertRaises(RuntimeError):
+            loader.wait(5)
+        self.assertFalse(loader.ready)
+        self.assertEqual(loader.stage, "failed")
+
+if __name__ == '__main__':
+    unittest.main()
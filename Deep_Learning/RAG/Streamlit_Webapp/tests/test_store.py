@@ -0,0 +1,131 @@
+"""Unit tests for the SegmentStore class."""
+import os
+import json
+import pickle
+import unittest
+import shutil
+import tempfile
+import numpy as np
+from rag.store import SegmentStore, ChunkStore
+
+class TestSegmentStore(unittest.TestCase):
+    """Test cases for SegmentStore class."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SegmentStore(self.temp_dir)
+    
+    def tearDown(self):
+        """Tear down test fixtures."""
+        shutil.rmtree(self.temp_dir)
+    
+    def _append(self, count):
+        """Append a segment with `count` random rows."""
+        chunks = [(f"chunk {i}", {"doc_id": "doc", "chunk_id": i}) for i in range(count)]
+        return self.store.append_segment(np.random.rand(count, 8), chunks)
+    
+    def test_append_and_read_segment(self):
+        """Test that segments are registered in row order and read back."""
+        first = self._append(3)
+        second = self._append(2)
+        
+        self.assertEqual((first["start"], second["start"]), (0, 3))
+        self.assertEqual(self.store.num_rows, 5)
+        
+        reader = self.store.reader(second)
+        self.assertEqual(reader.vectors.shape, (2, 8))
+        self.assertEqual(reader.vectors.dtype, np.float32)
+        self.assertEqual(len(reader), 2)
+        self.assertEqual(reader.text(1), "chunk 1")
+        self.assertEqual(self.store.document_ids(), ["doc"])
+        
+        reopened = SegmentStore(self.temp_dir)
+        self.assertTrue(reopened.load_manifest())
+        self.assertEqual(reopened.segments, self.store.segments)
+    
+    def test_merge_candidates_skip_large_leading_segments(self):
+        """Test that only the small trailing segments are merged."""
+        self._append(100)
+        self._append(5)
+        self._append(5)
+        
+        candidates = self.store.merge_candidates()
+        self.assertEqual([c["count"] for c in candidates], [5, 5])
+    
+    def test_merge_replaces_segments(self):
+        """Test that merging keeps row order and removes the old segments."""
+        self._append(2)
+        self._append(3)
+        entries = self.store.merge_candidates()
+        merged, purged = self.store.merge(entries)
+        self.store.replace_segments(entries, merged, purged=purged)
+        
+        self.assertEqual(len(self.store.segments), 1)
+        chunks = ChunkStore(self.store)
+        self.assertEqual([meta["chunk_id"] for _, meta in chunks], [0, 1, 0, 1, 2])
+        with self.assertRaises(FileNotFoundError):
+            self.store.reader(entries[0])
+
+    def test_delete_and_compact(self):
+        """Test that deleted chunks are hidden and dropped when their segment is merged."""
+        first = self._append(4)
+        chunks = [(f"other {i}", {"doc_id": "other", "chunk_id": i}) for i in range(2)]
+        self.store.append_segment(np.random.rand(2, 8), chunks)
+        self.assertEqual(self.store.vector_ids("other").tolist(), [4, 5])
+        
+        self.store.delete_ids(self.store.vector_ids("doc")[:3])
+        self.assertIsNone(self.store.lookup(0))
+        self.assertEqual(self.store.lookup(3)[0], "chunk 3")
+        self.assertEqual(self.store.lookup(5)[0], "other 1")
+        self.assertEqual(self.store.live_ids().tolist(), [3, 4, 5])
+        self.assertEqual(self.store.num_live_rows, 3)
+        
+        # The first segment is mostly deleted, so it is compacted despite its size
+        entries = self.store.merge_candidates()
+        self.assertEqual(entries[0]["name"], first["name"])
+        merged, purged = self.store.merge(entries)
+        self.store.replace_segments(entries, merged, purged=purged)
+        
+        self.assertEqual(self.store.num_rows, 3)
+        self.assertEqual(self.store.deleted_ids.tolist(), [])
+        self.assertEqual(self.store.lookup(4)[0], "other 0")
+        
+        reopened = SegmentStore(self.temp_dir)
+        reopened.load_manifest()
+        self.assertEqual(reopened.document_ids(), ["doc", "other"])
+        self.assertEqual(reopened.vector_ids("doc").tolist(), [3])
+        self.assertEqual(reopened.allocate_ids(1).tolist(), [6])
+    
+    def test_upgrade_row_ids(self):
+        """Test that version 2 segments get their row numbers as vector ids."""
+        self._append(2)
+        self._append(3)
+        self.store.manifest["version"] = 2
+        for entry in self.store.segments:
+            del entry["min_id"]
+            os.remove(os.path.join(self.store.segments_dir, entry["name"]) + ".ids.npy")
+        self.store._write_manifest()
+        
+        reopened = SegmentStore(self.temp_dir)
+        self.assertTrue(reopened.load_manifest())
+        self.assertEqual(reopened.live_ids().tolist(), [0, 1, 2, 3, 4])
+        self.assertEqual(reopened.lookup(3)[0], "chunk 1")
+        self.assertEqual(reopened.manifest["next_id"], 5)
+    
+    def test_upgrade_pickle_segments(self):
+        """Test that version 1 segments are rewritten in the columnar format."""
+        base_path = os.path.join(self.store.segments_dir, "seg_000000")
+        np.save(base_path + ".npy", np.random.rand(1, 8).astype(np.float32))
+        with open(base_path + ".pkl", "wb") as f:
+            pickle.dump((["doc"], [("old chunk", {"doc_id": "doc", "chunk_id": 0, "doc_index": 0})]), f)
+        with open(self.store.manifest_path, "w") as f:
+            json.dump({"version": 1, "next_segment": 1, "checkpoint": None,
+                       "segments": [{"name": "seg_000000", "start": 0, "count": 1}]}, f)
+        
+        self.assertTrue(self.store.load_manifest())
+        self.assertEqual(ChunkStore(self.store)[0][0], "old chunk")
+        self.assertFalse(os.path.exists(base_path + ".pkl"))
+
+if __name__ == '__main__':
+    unittest.main()